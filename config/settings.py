@@ -60,17 +60,19 @@ TEMPLATES = [
 WSGI_APPLICATION = "config.wsgi.application"
 
 # ─── Database ───────────────────────────────────────────
-# SQLite for local dev, switch to PostgreSQL for production
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# SQLite for local dev; DATABASE_URL (PostgreSQL) in production, where the
+# web and render worker processes must share one database.
+if os.getenv("DATABASE_URL"):
+    import dj_database_url
+
+    DATABASES = {"default": dj_database_url.parse(os.getenv("DATABASE_URL"), conn_max_age=600)}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        }
     }
-}
-
-# Uncomment for PostgreSQL:
-# import dj_database_url
-# DATABASES = {"default": dj_database_url.parse(os.getenv("DATABASE_URL"))}
 
 # ─── Auth ───────────────────────────────────────────────
 AUTH_PASSWORD_VALIDATORS = [
@@ -109,9 +111,34 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "1000/hour",
+        # /api/generate/stream renders on the request's worker
+        "generate": os.getenv("GENERATE_STREAM_THROTTLE_RATE", "30/hour"),
     },
 }
 
+# ─── Cache ──────────────────────────────────────────────
+# Used for API responses, facet counts and throttling. CACHE_BACKEND is
+# "locmem" (per process), "file" (shared by the processes on one host,
+# CACHE_LOCATION is a directory) or "redis" (shared by all hosts,
+# CACHE_LOCATION is a redis:// URL; works with any Redis-protocol server
+# and needs `pip install redis`).
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "musiclib"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", str(BASE_DIR / "cache")),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379/0"),
+}
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.getenv("CACHE_LOCATION") or CACHE_BACKENDS[CACHE_BACKEND][1],
+        "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "musiclib"),
+    }
+}
+# Seconds a cached list/featured/popular/genres/moods response is served
+# (catalog changes invalidate it sooner); 0 disables the response cache.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv("RESPONSE_CACHE_TIMEOUT", "60"))
+
 # ─── CORS ───────────────────────────────────────────────
 CORS_ALLOWED_ORIGINS = [
     os.getenv("FRONTEND_URL", "http://localhost:3000"),
@@ -128,6 +155,7 @@ CORS_EXPOSE_HEADERS = [
     "content-range",
     "content-length",
     "content-disposition",
+    "x-cache",
 ]
 
 # ─── JWT (for Phase 2 - user auth) ─────────────────────
@@ -137,8 +165,17 @@ SIMPLE_JWT = {
 }
 
 # ─── Supabase S3 Storage ──────────────────────────────
-if not DEBUG:
-    DEFAULT_FILE_STORAGE = "storages.backends.s3boto3.S3Boto3Storage"
+# Opt-in: media stays on the local filesystem unless USE_S3=True. Existing
+# local files are not copied over, so upload MEDIA_ROOT to the bucket (same
+# keys) before switching. USE_S3=True also works locally against any
+# S3-compatible stand-in (MinIO, moto_server) via SUPABASE_S3_ENDPOINT_URL.
+USE_S3 = os.getenv("USE_S3", "False") == "True"
+if USE_S3:
+    # Django 5.1 dropped DEFAULT_FILE_STORAGE; STORAGES is the supported setting.
+    STORAGES = {
+        "default": {"BACKEND": "storages.backends.s3boto3.S3Boto3Storage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
     AWS_ACCESS_KEY_ID = os.getenv("SUPABASE_S3_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY = os.getenv("SUPABASE_S3_SECRET_ACCESS_KEY")
     AWS_STORAGE_BUCKET_NAME = os.getenv("SUPABASE_S3_BUCKET_NAME", "musiclib")
@@ -146,4 +183,59 @@ if not DEBUG:
     AWS_S3_REGION_NAME = os.getenv("SUPABASE_S3_REGION", "ap-southeast-2")
     AWS_S3_CUSTOM_DOMAIN = os.getenv("SUPABASE_S3_PUBLIC_DOMAIN", "")
     AWS_DEFAULT_ACL = None
-    AWS_QUERYSTRING_AUTH = False
+    # False serves public bucket URLs; True signs them for AUDIO_URL_EXPIRE seconds.
+    AWS_QUERYSTRING_AUTH = os.getenv("AWS_QUERYSTRING_AUTH", "False") == "True"
+
+# ─── Audio delivery ───────────────────────────────────
+# "proxy" streams audio through Django. "redirect" answers stream/download
+# with a 302 to the object storage URL so listeners don't hold API workers;
+# local (filesystem) storage is always proxied. "accel" hands local files
+# to nginx (X-Accel-Redirect to AUDIO_ACCEL_PREFIX) or, with
+# AUDIO_ACCEL_HEADER=X-Sendfile, to Apache/lighttpd.
+AUDIO_DELIVERY_MODE = os.getenv("AUDIO_DELIVERY_MODE", "proxy")
+AUDIO_URL_EXPIRE = int(os.getenv("AUDIO_URL_EXPIRE", "300"))  # seconds
+AUDIO_ACCEL_HEADER = os.getenv("AUDIO_ACCEL_HEADER", "X-Accel-Redirect")
+AUDIO_ACCEL_PREFIX = os.getenv("AUDIO_ACCEL_PREFIX", "/protected-media/")
+# Serve stream/download from async views; use with `uvicorn config.asgi:application`.
+AUDIO_ASYNC_STREAMING = os.getenv("AUDIO_ASYNC_STREAMING", "False") == "True"
+
+# ─── Transcoding ──────────────────────────────────────
+# Compressed renditions are encoded with ffmpeg when tracks are ingested
+# (skipped if ffmpeg isn't installed) or by `manage.py transcode_tracks`.
+# `stream` serves the AUDIO_DEFAULT_QUALITY rendition in the first format
+# the client's Accept header allows; ?quality=original sends the source.
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+AUDIO_TRANSCODE_ON_INGEST = os.getenv("AUDIO_TRANSCODE_ON_INGEST", "True") == "True"
+AUDIO_RENDITION_FORMATS = [f.strip() for f in os.getenv("AUDIO_RENDITION_FORMATS", "mp3,aac,opus").split(",") if f.strip()]
+AUDIO_RENDITION_QUALITIES = [q.strip() for q in os.getenv("AUDIO_RENDITION_QUALITIES", "low,medium,high").split(",") if q.strip()]
+AUDIO_DEFAULT_QUALITY = os.getenv("AUDIO_DEFAULT_QUALITY", "medium")
+PREVIEW_SECONDS = int(os.getenv("PREVIEW_SECONDS", "15"))
+
+# HLS: each track is also cut into ~HLS_SEGMENT_SECONDS AAC segments at
+# every HLS_QUALITIES bitrate (`manage.py segment_tracks`, or at ingest).
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "6"))
+HLS_QUALITIES = [q.strip() for q in os.getenv("HLS_QUALITIES", "low,medium,high").split(",") if q.strip()]
+
+# play/download counts are buffered per process and written in bulk every
+# TRACK_COUNTER_FLUSH_INTERVAL seconds (and at exit); 0 writes each one through.
+TRACK_COUNTER_FLUSH_INTERVAL = float(os.getenv("TRACK_COUNTER_FLUSH_INTERVAL", "5"))
+
+# GET /api/tracks/facets/ results are cached per filter combination and
+# invalidated when the catalog changes; this bounds how long other server
+# processes can serve stale counts when CACHES is per-process.
+TRACK_FACETS_CACHE_TIMEOUT = int(os.getenv("TRACK_FACETS_CACHE_TIMEOUT", "300"))
+
+# GET /api/generate/stream renders procedural tracks chunk by chunk while
+# sending them; this caps the duration a client may ask for.
+GENERATE_STREAM_MAX_SECONDS = int(os.getenv("GENERATE_STREAM_MAX_SECONDS", "120"))
+
+# ─── Render jobs ──────────────────────────────────────
+# Jobs are queued in the database and run by `manage.py run_render_worker`.
+RENDER_MAX_CONCURRENT_JOBS = int(os.getenv("RENDER_MAX_CONCURRENT_JOBS", "2"))
+RENDER_JOB_TIMEOUT = int(os.getenv("RENDER_JOB_TIMEOUT", "600"))  # seconds without heartbeat
+RENDER_WORKER_PROCESSES = int(os.getenv("RENDER_WORKER_PROCESSES", "1"))
+
+# Seeded renders are cached on disk, keyed by their parameters. Set
+# RENDER_CACHE_DIR to an empty string to disable the cache.
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", str(BASE_DIR / "render_cache"))
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
@@ -25,6 +25,7 @@ function HomeContent() {
     searchParams.get('genre') ||
     searchParams.get('mood') ||
     searchParams.get('search') ||
+    ['min_bpm', 'max_bpm', 'min_duration', 'max_duration'].some((key) => searchParams.get(key)) ||
     searchParams.get('page');
 
   // Show landing page for unauthenticated users who haven't clicked "Browse"
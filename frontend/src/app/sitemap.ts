@@ -14,11 +14,11 @@ export default async function sitemap(): Promise<MetadataRoute.Sitemap> {
   ];
 
   try {
-    // Fetch all tracks for sitemap
-    let page = 1;
-    let hasNext = true;
-    while (hasNext) {
-      const res = await fetch(`${API_URL}/tracks/?page=${page}`, {
+    // Fetch all tracks for sitemap. Cursor pages cost the same however
+    // deep the crawl goes; page numbers get slower with every page.
+    let url: string | null = `${API_URL}/tracks/?cursor=&page_size=100`;
+    while (url) {
+      const res: Response = await fetch(url, {
         cache: 'no-store',
       });
       if (!res.ok) break;
@@ -31,8 +31,7 @@ export default async function sitemap(): Promise<MetadataRoute.Sitemap> {
           priority: 0.8,
         });
       }
-      hasNext = !!data.next;
-      page++;
+      url = data.next;
     }
   } catch {
     // Silently fail - sitemap will just have the homepage
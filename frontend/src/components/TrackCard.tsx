@@ -16,7 +16,8 @@ export default function TrackCard({ track }: { track: TrackListItem }) {
     if (isCurrentlyPlaying) {
       pause();
     } else {
-      play(track);
+      // Browsing plays the short preview clip; the track page plays the full file.
+      play(track.preview_url ? { ...track, audio_url: track.preview_url } : track);
     }
   };
 
@@ -2,14 +2,32 @@
 
 import { useRouter, useSearchParams } from 'next/navigation';
 import { useEffect, useState } from 'react';
-import { Genre, Mood } from '@/lib/types';
-import { fetchGenres, fetchMoods, fetchLanguages, fetchArtists } from '@/lib/api';
+import { RangeFacet, TrackFacets } from '@/lib/types';
+import { fetchFacets, fetchLanguages, fetchArtists } from '@/lib/api';
+
+// Query parameters that /api/tracks/facets/ understands
+const FACET_PARAMS = [
+  'genre', 'mood', 'tag', 'search', 'featured',
+  'min_bpm', 'max_bpm', 'min_duration', 'max_duration',
+];
+
+function rangeLabel(range: RangeFacet, unit: string): string {
+  if (range.min === null) return `< ${range.max! + 1}${unit}`;
+  if (range.max === null) return `${range.min}+${unit}`;
+  return `${range.min}–${range.max}${unit}`;
+}
+
+function durationLabel(range: RangeFacet): string {
+  const minutes = (seconds: number) => `${seconds / 60}m`;
+  if (range.min === null) return `< ${minutes(range.max! + 1)}`;
+  if (range.max === null) return `${minutes(range.min)}+`;
+  return `${minutes(range.min)}–${minutes(range.max + 1)}`;
+}
 
 export default function TrackFilters() {
   const router = useRouter();
   const searchParams = useSearchParams();
-  const [genres, setGenres] = useState<Genre[]>([]);
-  const [moods, setMoods] = useState<Mood[]>([]);
+  const [facets, setFacets] = useState<TrackFacets | null>(null);
   const [languages, setLanguages] = useState<string[]>([]);
   const [artists, setArtists] = useState<string[]>([]);
 
@@ -18,9 +36,20 @@ export default function TrackFilters() {
   const activeLanguage = searchParams.get('language') || '';
   const activeArtist = searchParams.get('artist') || '';
 
+  // Counts narrowed by the other active filters (cached by the API)
+  const facetParams = new URLSearchParams();
+  for (const key of FACET_PARAMS) {
+    const value = searchParams.get(key);
+    if (value) facetParams.set(key, value);
+  }
+  const facetQuery = facetParams.toString();
+
+  useEffect(() => {
+    const params = Object.fromEntries(new URLSearchParams(facetQuery));
+    fetchFacets(params).then(setFacets).catch(() => {});
+  }, [facetQuery]);
+
   useEffect(() => {
-    fetchGenres().then(setGenres).catch(() => {});
-    fetchMoods().then(setMoods).catch(() => {});
     fetchLanguages().then(setLanguages).catch(() => {});
     fetchArtists().then(setArtists).catch(() => {});
   }, []);
@@ -36,7 +65,52 @@ export default function TrackFilters() {
     router.push(`/?${params.toString()}`);
   };
 
-  const hasFilters = activeGenre || activeMood || activeLanguage || activeArtist;
+  const isActiveRange = (prefix: string, range: RangeFacet) =>
+    searchParams.get(`min_${prefix}`) === (range.min === null ? null : String(range.min)) &&
+    searchParams.get(`max_${prefix}`) === (range.max === null ? null : String(range.max));
+
+  const setRange = (prefix: string, range: RangeFacet) => {
+    const params = new URLSearchParams(searchParams.toString());
+    const active = isActiveRange(prefix, range);
+    params.delete(`min_${prefix}`);
+    params.delete(`max_${prefix}`);
+    if (!active) {
+      if (range.min !== null) params.set(`min_${prefix}`, String(range.min));
+      if (range.max !== null) params.set(`max_${prefix}`, String(range.max));
+    }
+    params.delete('page');
+    router.push(`/?${params.toString()}`);
+  };
+
+  const hasFilters =
+    activeGenre || activeMood || activeLanguage || activeArtist ||
+    ['min_bpm', 'max_bpm', 'min_duration', 'max_duration'].some((key) => searchParams.get(key));
+
+  const rangeRow = (
+    label: string,
+    prefix: string,
+    ranges: RangeFacet[],
+    format: (range: RangeFacet) => string
+  ) => (
+    <div className="flex flex-wrap items-center gap-2">
+      <span className="text-xs font-medium uppercase tracking-wider text-zinc-600">{label}</span>
+      {ranges
+        .filter((range) => range.count > 0 || isActiveRange(prefix, range))
+        .map((range) => (
+          <button
+            key={`${range.min}-${range.max}`}
+            onClick={() => setRange(prefix, range)}
+            className={`rounded-full px-3 py-1 text-xs font-medium transition ${
+              isActiveRange(prefix, range)
+                ? 'bg-sky-500 text-white'
+                : 'bg-zinc-900 text-zinc-400 hover:bg-zinc-800 hover:text-white'
+            }`}
+          >
+            {format(range)} <span className="opacity-60">{range.count}</span>
+          </button>
+        ))}
+    </div>
+  );
 
   return (
     <div className="space-y-3">
@@ -63,9 +137,9 @@ export default function TrackFilters() {
       {/* Genre row */}
       <div className="flex flex-wrap items-center gap-2">
         <span className="text-xs font-medium uppercase tracking-wider text-zinc-600">Genre</span>
-        {genres.map((g) => (
+        {facets?.genre.map((g) => (
           <button
-            key={g.id}
+            key={g.slug}
             onClick={() => setFilter('genre', activeGenre === g.slug ? '' : g.slug)}
             className={`rounded-full px-3 py-1 text-xs font-medium transition ${
               activeGenre === g.slug
@@ -73,7 +147,7 @@ export default function TrackFilters() {
                 : 'bg-zinc-900 text-zinc-400 hover:bg-zinc-800 hover:text-white'
             }`}
           >
-            {g.name}
+            {g.name} <span className="opacity-60">{g.count}</span>
           </button>
         ))}
       </div>
@@ -81,9 +155,9 @@ export default function TrackFilters() {
       {/* Mood row */}
       <div className="flex flex-wrap items-center gap-2">
         <span className="text-xs font-medium uppercase tracking-wider text-zinc-600">Mood</span>
-        {moods.map((m) => (
+        {facets?.mood.map((m) => (
           <button
-            key={m.id}
+            key={m.slug}
             onClick={() => setFilter('mood', activeMood === m.slug ? '' : m.slug)}
             className={`rounded-full px-3 py-1 text-xs font-medium transition ${
               activeMood === m.slug
@@ -91,11 +165,14 @@ export default function TrackFilters() {
                 : 'bg-zinc-900 text-zinc-400 hover:bg-zinc-800 hover:text-white'
             }`}
           >
-            {m.name}
+            {m.name} <span className="opacity-60">{m.count}</span>
           </button>
         ))}
       </div>
 
+      {facets && rangeRow('BPM', 'bpm', facets.bpm, (range) => rangeLabel(range, ''))}
+      {facets && rangeRow('Length', 'duration', facets.duration, durationLabel)}
+
       {/* Artist row */}
       {artists.length > 0 && (
         <div className="flex flex-wrap items-center gap-2">
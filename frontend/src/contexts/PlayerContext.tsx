@@ -72,7 +72,7 @@ export function PlayerProvider({ children }: { children: ReactNode }) {
       const audio = audioRef.current;
       if (!audio || !track.audio_url) return;
 
-      if (currentTrack?.id !== track.id) {
+      if (currentTrack?.id !== track.id || currentTrack.audio_url !== track.audio_url) {
         audio.src = track.audio_url;
         audio.load();
         setCurrentTrack(track);
@@ -4,6 +4,7 @@ import {
   TrackListItem,
   TrackDetail,
   PaginatedResponse,
+  TrackFacets,
   User,
   AuthTokens,
 } from './types';
@@ -52,6 +53,13 @@ export async function fetchMoods(): Promise<Mood[]> {
   return apiFetch('/tracks/moods/');
 }
 
+export async function fetchFacets(
+  params?: Record<string, string>
+): Promise<TrackFacets> {
+  const query = params ? '?' + new URLSearchParams(params).toString() : '';
+  return apiFetch(`/tracks/facets/${query}`);
+}
+
 export async function fetchLanguages(): Promise<string[]> {
   return apiFetch('/tracks/languages/');
 }
@@ -25,6 +25,7 @@ export interface TrackListItem {
   download_count: number;
   play_count: number;
   audio_url: string | null;
+  preview_url?: string | null;
   file_size: number;
   is_featured: boolean;
   created_at: string;
@@ -46,6 +47,7 @@ export interface TrackDetail {
   download_count: number;
   play_count: number;
   audio_url: string | null;
+  preview_url?: string | null;
   file_size: number;
   waveform_data: number[] | null;
   is_featured: boolean;
@@ -59,6 +61,27 @@ export interface PaginatedResponse<T> {
   results: T[];
 }
 
+export interface NamedFacet {
+  slug: string;
+  name: string;
+  count: number;
+}
+
+export interface RangeFacet {
+  min: number | null;
+  max: number | null;
+  count: number;
+}
+
+export interface TrackFacets {
+  count: number;
+  genre: NamedFacet[];
+  mood: NamedFacet[];
+  bpm: RangeFacet[];
+  duration: RangeFacet[];
+  featured: { value: boolean; count: number }[];
+}
+
 export interface User {
   id: number;
   username: string;
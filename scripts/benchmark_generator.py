@@ -0,0 +1,191 @@
+"""
+Benchmark the procedural generator against the original pure-Python loops.
+
+Usage:
+    python scripts/benchmark_generator.py
+    python scripts/benchmark_generator.py --duration 8 --sr 22050 --repeat 5
+    python scripts/benchmark_generator.py --bars 16 --bpm 90
+    python scripts/benchmark_generator.py --render-duration 600 --genres lofi
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+
+from tracks import generator
+from tracks.generator import generate_track, generate_track_stream, genres, oscillators, theory
+from tracks.generator.voices import VoiceCache
+
+
+# ─── Reference implementations (pre-vectorization) ─────
+
+def _ref_sine(freq, duration, sr=22050):
+    num_samples = int(sr * duration)
+    return [math.sin(2 * math.pi * freq * i / sr) for i in range(num_samples)]
+
+
+def _ref_saw(freq, duration, sr=22050):
+    num_samples = int(sr * duration)
+    period = sr / freq if freq > 0 else sr
+    return [2.0 * ((i % period) / period) - 1.0 for i in range(num_samples)]
+
+
+def _ref_square(freq, duration, sr=22050):
+    num_samples = int(sr * duration)
+    period = sr / freq if freq > 0 else sr
+    half = period / 2
+    return [1.0 if (i % period) < half else -1.0 for i in range(num_samples)]
+
+
+def _ref_triangle(freq, duration, sr=22050):
+    num_samples = int(sr * duration)
+    period = sr / freq if freq > 0 else sr
+    return [4.0 * abs((i % period) / period - 0.5) - 1.0 for i in range(num_samples)]
+
+
+def _ref_pulse(freq, duration, sr=22050, duty=0.25):
+    num_samples = int(sr * duration)
+    period = sr / freq if freq > 0 else sr
+    threshold = period * duty
+    return [1.0 if (i % period) < threshold else -1.0 for i in range(num_samples)]
+
+
+def _ref_white_noise(duration, sr=22050):
+    return [random.uniform(-1.0, 1.0) for _ in range(int(sr * duration))]
+
+
+def _ref_rich_tone(freq, duration, sr=22050):
+    harmonics = [(1, 1.0), (2, 0.5), (3, 0.25), (4, 0.125)]
+    num_samples = int(sr * duration)
+    samples = [0.0] * num_samples
+    for harmonic_num, amplitude in harmonics:
+        h_freq = freq * harmonic_num
+        if h_freq >= sr / 2:
+            continue
+        for i in range(num_samples):
+            samples[i] += amplitude * math.sin(2 * math.pi * h_freq * i / sr)
+    peak = max(abs(s) for s in samples) if samples else 1.0
+    return [s / peak for s in samples]
+
+
+OSCILLATOR_CASES = [
+    ("sine", lambda d, sr: _ref_sine(220.0, d, sr), lambda d, sr: oscillators.sine_array(220.0, d, sr)),
+    ("saw", lambda d, sr: _ref_saw(220.0, d, sr), lambda d, sr: oscillators.saw_array(220.0, d, sr)),
+    ("square", lambda d, sr: _ref_square(220.0, d, sr), lambda d, sr: oscillators.square_array(220.0, d, sr)),
+    ("triangle", lambda d, sr: _ref_triangle(220.0, d, sr), lambda d, sr: oscillators.triangle_array(220.0, d, sr)),
+    ("pulse", lambda d, sr: _ref_pulse(220.0, d, sr), lambda d, sr: oscillators.pulse_array(220.0, d, sr)),
+    ("rich_tone", lambda d, sr: _ref_rich_tone(220.0, d, sr), lambda d, sr: oscillators.rich_tone_array(220.0, d, sr)),
+    ("white_noise", lambda d, sr: _ref_white_noise(d, sr), lambda d, sr: oscillators.white_noise_array(d, sr)),
+]
+
+
+def _best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_oscillators(duration, sr, repeat):
+    num_samples = int(sr * duration)
+    print(f"Oscillators: {num_samples} samples per call ({duration}s @ {sr} Hz), best of {repeat}\n")
+    print(f"  {'waveform':<12} {'loop samples/s':>16} {'numpy samples/s':>16} {'speedup':>9}")
+    for name, reference, vectorized in OSCILLATOR_CASES:
+        ref_time = _best_time(lambda reference=reference: reference(duration, sr), repeat)
+        vec_time = _best_time(lambda vectorized=vectorized: vectorized(duration, sr), repeat)
+        print(
+            f"  {name:<12} {num_samples / ref_time:>16,.0f} {num_samples / vec_time:>16,.0f}"
+            f" {ref_time / vec_time:>8.1f}x"
+        )
+
+
+def bench_render(duration, sr, genre_names):
+    print(f"\ngenerate_track: {duration}s @ {sr} Hz, seed 0\n")
+    print(f"  {'genre':<12} {'wall':>9} {'peak alloc':>12}")
+    for name in genre_names:
+        tracemalloc.start()
+        start = time.perf_counter()
+        generate_track(name, duration=duration, sr=sr, seed=0)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {name:<12} {elapsed:>8.2f}s {peak / (1024 * 1024):>10.1f}MB")
+
+
+def bench_stream(duration, sr, genre_names):
+    print(f"\ngenerate_track_stream: {duration}s @ {sr} Hz, seed 0\n")
+    print(f"  {'genre':<12} {'first chunk':>12} {'wall':>9} {'peak alloc':>12}")
+    for name in genre_names:
+        tracemalloc.start()
+        start = time.perf_counter()
+        chunks = generate_track_stream(name, duration=duration, sr=sr, seed=0)
+        next(chunks)  # header
+        next(chunks)
+        first = time.perf_counter() - start
+        for _ in chunks:
+            pass
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {name:<12} {first * 1000:>10.0f}ms {elapsed:>8.2f}s {peak / (1024 * 1024):>10.1f}MB")
+
+
+def bench_voices(bars, bpm, sr, repeat):
+    # Chords, bass and pad of a 4-chord progression, rendered with caching
+    # disabled (every note synthesized, as before the voice cache), with a
+    # cold cache and with a warm one.
+    progression = theory.build_progression(57, "major", theory.GENRE_PROGRESSIONS["lofi"][0])
+    beat_dur = 60.0 / bpm
+    num_samples = int(bars * len(progression) * 4 * beat_dur * sr)
+    osc = oscillators.saw_array
+
+    def render(voices):
+        out = np.zeros(num_samples, dtype=oscillators.DTYPE)
+        generator._render_chords(out, progression, osc, beat_dur, bars, sr, voices)
+        generator._render_bass(out, progression, osc, beat_dur, bars, sr, voices)
+        generator._render_pad(out, progression, osc, beat_dur, bars, sr, voices)
+        return out
+
+    uncached = _best_time(lambda: render(VoiceCache(max_bytes=0)), repeat)
+    cold = _best_time(lambda: render(VoiceCache()), repeat)
+    warm_cache = VoiceCache()
+    render(warm_cache)
+    warm = _best_time(lambda: render(warm_cache), repeat)
+    stats = warm_cache.stats()
+
+    print(f"\nVoice cache: 4 chords x {bars} bars @ {bpm} BPM, {num_samples} samples, best of {repeat}\n")
+    print(f"  {'no cache':<12} {uncached * 1000:>8.1f}ms")
+    print(f"  {'cold cache':<12} {cold * 1000:>8.1f}ms {uncached / cold:>6.1f}x")
+    print(f"  {'warm cache':<12} {warm * 1000:>8.1f}ms {uncached / warm:>6.1f}x")
+    print(f"  {stats['voices']} voices, {stats['size_bytes'] / 1024:.0f}KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the procedural music generator")
+    parser.add_argument("--duration", type=float, default=8.0, help="Seconds of audio per call")
+    parser.add_argument("--sr", type=int, default=22050, help="Sample rate")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (best is reported)")
+    parser.add_argument("--render-duration", type=float, default=60.0, help="Seconds per full render")
+    parser.add_argument("--genres", nargs="*", default=list(genres.GENRE_TEMPLATES), help="Genres to render")
+    parser.add_argument("--bars", type=int, default=16, help="Bars for the voice cache benchmark")
+    parser.add_argument("--bpm", type=int, default=90, help="Tempo for the voice cache benchmark")
+    args = parser.parse_args()
+
+    bench_oscillators(args.duration, args.sr, args.repeat)
+    bench_voices(args.bars, args.bpm, args.sr, args.repeat)
+    bench_render(args.render_duration, args.sr, args.genres)
+    bench_stream(args.render_duration, args.sr, args.genres)
+
+
+if __name__ == "__main__":
+    main()
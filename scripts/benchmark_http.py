@@ -0,0 +1,85 @@
+"""
+HTTP load benchmark for the audio endpoints.
+
+Usage:
+    python scripts/benchmark_http.py http://127.0.0.1:8000/api/tracks/<id>/stream/
+    python scripts/benchmark_http.py http://127.0.0.1/api/tracks/<id>/stream/ --requests 2000 --concurrency 32
+    python scripts/benchmark_http.py <url> --range bytes=0-65535
+
+Run it against gunicorn directly with AUDIO_DELIVERY_MODE=proxy, then
+through nginx (deploy/nginx.conf) with AUDIO_DELIVERY_MODE=accel, to
+compare requests/sec before and after offloading. Uses only the standard
+library; each thread keeps one keep-alive connection.
+"""
+
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def _worker(url, headers, count, results, errors):
+    parts = urlsplit(url)
+    conn_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = conn_class(parts.hostname, parts.port, timeout=30)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            size = len(response.read())
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            conn.close()
+            conn = conn_class(parts.hostname, parts.port, timeout=30)
+            continue
+        if response.status >= 400:
+            errors.append(response.status)
+        results.append((time.perf_counter() - start, size))
+    conn.close()
+
+
+def run(url, requests, concurrency, headers):
+    results, errors = [], []
+    per_thread = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    threads = [
+        threading.Thread(target=_worker, args=(url, headers, n, results, errors))
+        for n in per_thread if n
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return elapsed, results, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark an audio endpoint")
+    parser.add_argument("url", help="URL to request")
+    parser.add_argument("--requests", type=int, default=500, help="Total requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="Parallel connections")
+    parser.add_argument("--range", type=str, default="", help="Range header value, e.g. bytes=0-65535")
+    args = parser.parse_args()
+
+    headers = {"Range": args.range} if args.range else {}
+    elapsed, results, errors = run(args.url, args.requests, args.concurrency, headers)
+    if not results:
+        print(f"All {len(errors)} requests failed")
+        return
+
+    latencies = sorted(r[0] for r in results)
+    total_bytes = sum(r[1] for r in results)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{args.url}  ({args.concurrency} connections{', Range ' + args.range if args.range else ''})\n")
+    print(f"  requests     {len(results)} ok, {len(errors)} errors in {elapsed:.2f}s")
+    print(f"  throughput   {len(results) / elapsed:,.1f} req/s, {total_bytes / elapsed / (1024 * 1024):,.1f} MB/s")
+    print(f"  latency      p50 {statistics.median(latencies) * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark the track list: page-number pagination against keyset cursors.
+
+Usage:
+    python scripts/benchmark_pagination.py
+    python scripts/benchmark_pagination.py --tracks 200000 --page-size 100
+
+Creates a throwaway test database (test_<NAME>, as `manage.py test` would)
+for the configured DATABASES engine, fills it with --tracks synthetic
+tracks, then times single pages at increasing depth (best of 3) and a crawl of the
+whole catalog (what the frontend sitemap does) both ways, through the
+list view. The test database is dropped at the end.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from tracks.models import Track  # noqa: E402
+from tracks.pagination import KeysetPagination  # noqa: E402
+from tracks.views import TrackViewSet  # noqa: E402
+
+BATCH_SIZE = 5000
+DEPTHS = (0.0, 0.1, 0.5, 0.99)
+
+factory = APIRequestFactory()
+list_view = TrackViewSet.as_view({"get": "list"}, throttle_classes=[])
+
+
+def populate(count, seed=0):
+    rng = random.Random(seed)
+    start = timezone.now()
+    for offset in range(0, count, BATCH_SIZE):
+        tracks = [
+            Track(
+                title=f"Track {offset + i}",
+                duration=rng.randint(20, 300),
+                bpm=rng.randint(50, 160),
+                download_count=int(rng.paretovariate(1.2)) - 1,
+            )
+            for i in range(min(BATCH_SIZE, count - offset))
+        ]
+        Track.objects.bulk_create(tracks)
+    # auto_now_add ignores the value given to bulk_create; spread them out
+    # (a few per second, so created_at has ties too).
+    pks = list(Track.objects.order_by("pk").values_list("pk", flat=True))
+    Track.objects.bulk_update(
+        [Track(pk=pk, created_at=start - timedelta(seconds=i // 3)) for i, pk in enumerate(pks)],
+        ["created_at"], batch_size=BATCH_SIZE,
+    )
+
+
+def _get(path):
+    response = list_view(factory.get(path))
+    assert response.status_code == 200, response.data
+    return response.data
+
+
+def _timed(path, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _get(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _cursor_at(offset, ordering):
+    # Cursor of the row just before ``offset``, as the previous page would give
+    paginator = KeysetPagination()
+    paginator.ordering = ordering
+    paginator.field = Track._meta.get_field(ordering.lstrip("-"))
+    direction = "-" if ordering.startswith("-") else ""
+    row = Track.objects.filter(is_active=True).order_by(ordering, f"{direction}pk")[offset - 1]
+    return paginator.encode_cursor(row)
+
+
+def bench_depth(total, page_size, ordering):
+    pages = -(-total // page_size)
+    print(f"  {'page':>8} {'?page=':>10} {'?cursor=':>10}")
+    for depth in DEPTHS:
+        page = max(1, int(pages * depth))
+        offset = (page - 1) * page_size
+        numbered = _timed(f"/api/tracks/?page={page}&ordering={ordering}")
+        cursor = _cursor_at(offset, ordering) if offset else ""
+        keyset = _timed(f"/api/tracks/?cursor={cursor}&page_size={page_size}&ordering={ordering}")
+        print(f"  {page:>8} {numbered * 1000:>8.1f}ms {keyset * 1000:>8.1f}ms")
+
+
+def crawl(path, follow):
+    start = time.perf_counter()
+    pages = rows = 0
+    while path:
+        data = _get(path)
+        pages += 1
+        rows += len(data["results"])
+        path = follow(data)
+    return time.perf_counter() - start, pages, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark track list pagination")
+    parser.add_argument("--tracks", type=int, default=100_000, help="Synthetic tracks to create")
+    parser.add_argument("--page-size", type=int, default=20, help="Cursor page size (page numbers use PAGE_SIZE)")
+    parser.add_argument("--skip-crawl", action="store_true", help="Only time single pages")
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        populate(args.tracks)
+        page_size = args.page_size
+        print(f"{connection.vendor}: {args.tracks} tracks, {page_size} per page\n")
+        for ordering in ("-created_at", "-download_count"):
+            print(f"ordering={ordering}")
+            bench_depth(args.tracks, page_size, ordering)
+            print()
+
+        if args.skip_crawl:
+            return
+        print("Full crawl, ordering=-created_at:")
+        page_numbers = iter(range(2, args.tracks + 2))
+        elapsed, pages, rows = crawl(
+            "/api/tracks/?page=1",
+            lambda data: data["next"] and f"/api/tracks/?page={next(page_numbers)}",
+        )
+        print(f"  ?page=    {pages:>6} pages, {rows} tracks in {elapsed:6.1f}s")
+        elapsed, pages, rows = crawl(
+            f"/api/tracks/?cursor=&page_size={page_size}",
+            lambda data: data["next"] and data["next"].split("testserver", 1)[1],
+        )
+        print(f"  ?cursor=  {pages:>6} pages, {rows} tracks in {elapsed:6.1f}s")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
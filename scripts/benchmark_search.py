@@ -0,0 +1,134 @@
+"""
+Benchmark track search: the full-text index against the old icontains scan.
+
+Usage:
+    python scripts/benchmark_search.py
+    python scripts/benchmark_search.py --tracks 200000 --repeat 5
+    python scripts/benchmark_search.py --queries chill "night dr" mel
+
+Creates a throwaway test database (test_<NAME>, as `manage.py test` would)
+for the configured DATABASES engine, fills it with --tracks synthetic
+tracks and times a first page of results for each query both ways. The
+test database is dropped at the end.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Q  # noqa: E402
+
+from tracks.models import Track  # noqa: E402
+from tracks.search import search_tracks  # noqa: E402
+
+WORDS = (
+    "midnight drive neon pulse autumn leaves urban groove starlight serenade electric sunset morning coffee "
+    "thunder road ocean whisper city lights solar flare rainy window bass drop velvet moon crystal cave "
+    "chill mellow dreamy calm energetic melancholy ambient lofi jazz rock acoustic piano guitar synth "
+    "night rain waves space summer winter forest river mountain desert echo shadow golden silver"
+).split()
+SYLLABLES = "ka lo mi ren sa tor vel an is ur bri da fen gol hal jin".split()
+VOCABULARY_SIZE = 5000
+DEFAULT_QUERIES = ["chill", "mel", "night drive", "velvet moon", "xylophone"]
+PAGE_SIZE = 20
+BATCH_SIZE = 5000
+
+
+def vocabulary(rng):
+    """
+    The music words plus made-up filler, shuffled and drawn with Zipf-like
+    weights: a few words appear in most tracks, most in very few, as in
+    real text.
+    """
+    filler = {"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(VOCABULARY_SIZE * 2)}
+    words = WORDS + sorted(filler - set(WORDS))[:VOCABULARY_SIZE - len(WORDS)]
+    rng.shuffle(words)
+    return words, [1.0 / (rank + 1) for rank in range(len(words))]
+
+
+def populate(count, seed=0):
+    rng = random.Random(seed)
+    words, weights = vocabulary(rng)
+
+    def _phrase(n):
+        return " ".join(rng.choices(words, weights, k=n))
+
+    for start in range(0, count, BATCH_SIZE):
+        Track.objects.bulk_create([
+            Track(
+                title=_phrase(2).title(),
+                artist_name=_phrase(1).title(),
+                tags=",".join(rng.sample(WORDS, 4)),
+                description=_phrase(12),
+                lyrics=_phrase(40),
+                duration=rng.randint(20, 300),
+                bpm=rng.randint(50, 160),
+            )
+            for _ in range(min(BATCH_SIZE, count - start))
+        ])
+
+
+def _icontains(queryset, text):
+    # What DRF's SearchFilter did with search_fields, over the same columns
+    condition = Q()
+    for term in text.split():
+        condition &= (
+            Q(title__icontains=term) | Q(artist_name__icontains=term) | Q(tags__icontains=term)
+            | Q(description__icontains=term) | Q(lyrics__icontains=term)
+        )
+    return queryset.filter(condition).order_by("-created_at")
+
+
+def _indexed(queryset, text):
+    return search_tracks(queryset, text).order_by("-search_rank", "-created_at")
+
+
+def _time_page(build, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        queryset = build(Track.objects.filter(is_active=True), text)
+        total = queryset.count()
+        list(queryset[:PAGE_SIZE])
+        best = min(best, time.perf_counter() - start)
+    return best, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-text track search")
+    parser.add_argument("--tracks", type=int, default=100_000, help="Synthetic tracks to index")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per query (best is reported)")
+    parser.add_argument("--queries", nargs="*", default=DEFAULT_QUERIES, help="Search strings")
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        start = time.perf_counter()
+        populate(args.tracks)
+        print(f"{connection.vendor}: indexed {args.tracks} tracks in {time.perf_counter() - start:.1f}s\n")
+        print(f"  {'query':<14} {'matches':>8} {'icontains':>11} {'index':>9} {'speedup':>8}")
+        for text in args.queries:
+            scan, total = _time_page(_icontains, text, args.repeat)
+            indexed, matches = _time_page(_indexed, text, args.repeat)
+            print(
+                f"  {text!r:<14} {matches:>8} {scan * 1000:>9.1f}ms {indexed * 1000:>7.1f}ms"
+                f" {scan / indexed:>7.1f}x"
+                + ("" if matches == total else f"  (icontains matched {total})")
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -664,6 +664,7 @@ def import_to_django():
 
     from django.core.files import File
     from tracks.models import Track, Genre, Mood
+    from tracks.transcoding import transcode_on_ingest
 
     meta_path = os.path.join(OUTPUT_DIR, "metadata.json")
     if not os.path.exists(meta_path):
@@ -717,7 +718,9 @@ def import_to_django():
                 is_active=True,
                 is_featured=(imported % 5 == 0),
             )
+            track.etag = track.compute_etag(audio_file)
             track.audio_file.save(meta["filename"], File(audio_file), save=True)
+        transcode_on_ingest(track)
 
         print(f"  Imported: {meta['title']} by {artist_name} [{language}] ({meta['genre']}/{meta['mood']})")
         imported += 1
@@ -0,0 +1,132 @@
+"""
+Load test: many slow listeners streaming the same track at once.
+
+Usage:
+    python scripts/load_test_listeners.py http://127.0.0.1:8000/api/tracks/<id>/stream/
+    python scripts/load_test_listeners.py <url> --listeners 2000 --rate 16384 --duration 30 --pid <server pid>
+
+Each listener opens its own connection with a small receive buffer and
+reads at most --rate bytes per second, like a phone on a poor network.
+After --duration seconds it reports how many listeners got response
+headers and were still receiving audio, and (with --pid) the server's
+RSS and thread count. Compare `uvicorn config.asgi:application` with
+AUDIO_ASYNC_STREAMING=True against gunicorn's sync workers.
+
+Both throttle anonymous clients per address (DEFAULT_THROTTLE_RATES
+"anon"); raise that rate for runs with more listeners than it allows.
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+from urllib.parse import urlsplit
+
+READ_SIZE = 4096
+
+
+class Stats:
+    def __init__(self):
+        self.connected = 0
+        self.headers = 0
+        self.receiving = 0
+        self.finished = 0
+        self.errors = 0
+        self.first_byte = []
+        self.bytes = 0
+
+
+async def listener(host, port, path, rate, deadline, stats):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, READ_SIZE * 2)
+    sock.setblocking(False)
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        await loop.sock_connect(sock, (host, port))
+        reader, writer = await asyncio.open_connection(sock=sock)
+    except OSError:
+        stats.errors += 1
+        sock.close()
+        return
+    stats.connected += 1
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=max(deadline - time.perf_counter(), 0.1))
+        stats.headers += 1
+        stats.first_byte.append(time.perf_counter() - start)
+        got_audio = False
+        while time.perf_counter() < deadline:
+            chunk = await asyncio.wait_for(reader.read(READ_SIZE), timeout=max(deadline - time.perf_counter(), 0.1))
+            if not chunk:
+                stats.finished += 1
+                break
+            if not got_audio:
+                stats.receiving += 1
+                got_audio = True
+            stats.bytes += len(chunk)
+            await asyncio.sleep(len(chunk) / rate)
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError):
+        pass
+    finally:
+        writer.close()
+
+
+def _process_info(pid):
+    info = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "Threads"):
+                    info[key] = value.strip()
+    except OSError:
+        pass
+    return info
+
+
+async def run(args):
+    parts = urlsplit(args.url)
+    host, port = parts.hostname, parts.port or 80
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    stats = Stats()
+    deadline = time.perf_counter() + args.duration
+
+    tasks = []
+    for i in range(args.listeners):
+        tasks.append(asyncio.create_task(listener(host, port, path, args.rate, deadline, stats)))
+        if args.ramp and i % 100 == 99:
+            await asyncio.sleep(args.ramp)
+
+    await asyncio.sleep(max(deadline - time.perf_counter() - 1, 0))
+    server = _process_info(args.pid) if args.pid else {}
+    await asyncio.gather(*tasks)
+    return stats, server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hold many slow streaming listeners open")
+    parser.add_argument("url", help="Stream URL")
+    parser.add_argument("--listeners", type=int, default=1000, help="Concurrent connections")
+    parser.add_argument("--rate", type=int, default=16384, help="Bytes per second each listener reads")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to keep listening")
+    parser.add_argument("--ramp", type=float, default=0.05, help="Pause after every 100 connections")
+    parser.add_argument("--pid", type=int, help="Server process id, to report its RSS and threads")
+    args = parser.parse_args()
+
+    stats, server = asyncio.run(run(args))
+    first_byte = sorted(stats.first_byte)
+    p50 = first_byte[len(first_byte) // 2] * 1000 if first_byte else 0
+    p99 = first_byte[min(len(first_byte) - 1, int(len(first_byte) * 0.99))] * 1000 if first_byte else 0
+    print(f"{args.listeners} listeners at {args.rate} B/s for {args.duration:.0f}s -> {args.url}\n")
+    print(f"  connected       {stats.connected} ({stats.errors} connect errors)")
+    print(f"  got headers     {stats.headers} (time to headers p50 {p50:.0f}ms, p99 {p99:.0f}ms)")
+    print(f"  got audio       {stats.receiving} ({stats.finished} reached the end)")
+    print(f"  received        {stats.bytes / (1024 * 1024):.1f} MB")
+    if server:
+        print(f"  server          RSS {server.get('VmRSS', '?')}, {server.get('Threads', '?')} threads")
+
+
+if __name__ == "__main__":
+    main()
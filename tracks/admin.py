@@ -1,19 +1,70 @@
-from django.contrib import admin
-from .models import Track, Genre, Mood
+import os
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.db import transaction
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .cache import bump_catalog_version, catalog_version, reset_response_cache_stats, response_cache_stats
+from .counters import COUNTERS
+from .models import Track, TrackRendition, HLSVariant, Genre, Mood, Tag, RenderJob
+from .transcoding import transcode_on_ingest
 
 
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
-    list_display = ["name", "slug"]
+    list_display = ["name", "slug", "track_count"]
     prepopulated_fields = {"slug": ("name",)}
 
 
 @admin.register(Mood)
 class MoodAdmin(admin.ModelAdmin):
-    list_display = ["name", "slug"]
+    list_display = ["name", "slug", "track_count"]
     prepopulated_fields = {"slug": ("name",)}
 
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    # Tags are created from Track.tags when tracks are saved.
+    list_display = ["name", "slug", "track_count"]
+    search_fields = ["name", "slug"]
+    ordering = ["-track_count", "name"]
+
+
+class TrackRenditionInline(admin.TabularInline):
+    model = TrackRendition
+    extra = 0
+    can_delete = False
+    fields = ["format", "quality", "bitrate", "size", "audio_file", "is_current", "created_at"]
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        # Renditions are made by `manage.py transcode_tracks`, not by hand.
+        return False
+
+    @admin.display(boolean=True, description="Current")
+    def is_current(self, obj):
+        return obj.is_current
+
+
+class HLSVariantInline(admin.TabularInline):
+    model = HLSVariant
+    extra = 0
+    can_delete = False
+    fields = ["quality", "bitrate", "target_duration", "average_bandwidth", "is_current", "created_at"]
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        # Variants are cut by `manage.py segment_tracks`.
+        return False
+
+    @admin.display(boolean=True, description="Current")
+    def is_current(self, obj):
+        return obj.is_current
+
+
 @admin.register(Track)
 class TrackAdmin(admin.ModelAdmin):
     list_display = [
@@ -24,6 +75,8 @@ class TrackAdmin(admin.ModelAdmin):
     search_fields = ["title", "description", "tags"]
     list_editable = ["is_active", "is_featured"]
     readonly_fields = ["download_count", "play_count", "created_at", "updated_at"]
+    inlines = [TrackRenditionInline, HLSVariantInline]
+    change_list_template = "admin/tracks/track/change_list.html"
     
     fieldsets = (
         (None, {
@@ -42,3 +95,89 @@ class TrackAdmin(admin.ModelAdmin):
             "fields": ("download_count", "play_count", "created_at", "updated_at"),
         }),
     )
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if "audio_file" in form.changed_data and obj.audio_file:
+            # New or replaced audio: its renditions and HLS variants are
+            # now stale. Encoded once the whole change form has committed.
+            transaction.on_commit(lambda: transcode_on_ingest(obj))
+
+    def get_urls(self):
+        return [
+            path(
+                "counters/",
+                self.admin_site.admin_view(self.pending_counters_view),
+                name="tracks_track_counters",
+            ),
+            path(
+                "response-cache/",
+                self.admin_site.admin_view(self.response_cache_view),
+                name="tracks_track_response_cache",
+            ),
+        ] + super().get_urls()
+
+    def pending_counters_view(self, request):
+        """Play/download increments buffered in the process serving this page, not yet written."""
+        if request.method == "POST" and self.has_change_permission(request):
+            flushed = COUNTERS.flush()
+            self.message_user(request, f"Flushed pending counts of {flushed} tracks.", messages.SUCCESS)
+            return redirect("admin:tracks_track_counters")
+
+        pending = COUNTERS.pending()
+        titles = dict(Track.objects.filter(pk__in=pending).values_list("pk", "title"))
+        rows = sorted(
+            (
+                {"id": pk, "title": titles.get(pk, "(deleted)"), **deltas}
+                for pk, deltas in pending.items()
+            ),
+            key=lambda row: -(row["play_count"] + row["download_count"]),
+        )
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": f"Pending play/download counts (process {os.getpid()} only)",
+            "rows": rows,
+            "pid": os.getpid(),
+            "flush_interval": settings.TRACK_COUNTER_FLUSH_INTERVAL,
+            "can_flush": self.has_change_permission(request),
+        }
+        return TemplateResponse(request, "admin/tracks/track/pending_counters.html", context)
+
+    def response_cache_view(self, request):
+        """Hit/miss counts of the cached API actions; POST invalidates or resets them."""
+        if request.method == "POST" and self.has_change_permission(request):
+            if "invalidate" in request.POST:
+                bump_catalog_version()
+                self.message_user(request, "Cached responses invalidated.", messages.SUCCESS)
+            else:
+                reset_response_cache_stats()
+                self.message_user(request, "Hit/miss counters reset.", messages.SUCCESS)
+            return redirect("admin:tracks_track_response_cache")
+
+        rows = [
+            {
+                "view": view,
+                **counts,
+                "ratio": counts["hits"] / (counts["hits"] + counts["misses"]) if counts["hits"] + counts["misses"] else None,
+            }
+            for view, counts in response_cache_stats().items()
+        ]
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "API response cache",
+            "rows": rows,
+            "backend": settings.CACHES["default"]["BACKEND"].rsplit(".", 1)[-1],
+            "timeout": settings.RESPONSE_CACHE_TIMEOUT,
+            "version": catalog_version(),
+            "can_change": self.has_change_permission(request),
+        }
+        return TemplateResponse(request, "admin/tracks/track/response_cache.html", context)
+
+
+@admin.register(RenderJob)
+class RenderJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "kind", "status", "progress", "total", "attempts", "worker_id", "created_at"]
+    list_filter = ["kind", "status"]
+    readonly_fields = ["created_at", "started_at", "finished_at", "heartbeat_at"]
@@ -0,0 +1,95 @@
+"""
+ASGI versions of the stream and download actions and of generate/stream.
+
+Enabled with AUDIO_ASYNC_STREAMING=True when serving `config.asgi` under
+uvicorn or daphne. Headers are worked out exactly as in TrackViewSet
+(in a worker thread), but the body is an async iterator: each 64 KB chunk
+is read in a thread only once the server has sent the previous one, so a
+slow listener costs one coroutine and one buffered chunk instead of a
+blocked worker thread.
+
+These are plain Django views, so the DRF throttles of the view each one
+replaces are applied by hand before any work (or counting) is done.
+"""
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
+
+from .models import Track
+from .views import (
+    GenerateStreamView, TrackViewSet,
+    _stream_response, _download_response, _generate_params, _generate_stream_response,
+)
+
+
+async def _get_track(pk):
+    try:
+        return await Track.objects.filter(is_active=True).aget(pk=pk)
+    except Track.DoesNotExist:
+        raise Http404("No Track matches the given query.")
+
+
+def _not_found():
+    return JsonResponse({"error": "File not found"}, status=404)
+
+
+def _throttled(request, view_class):
+    """
+    Run ``view_class``'s throttles as APIView.check_throttles would; a 429
+    response if any refuses the request, else None.
+    """
+    waits = [
+        throttle.wait()
+        for throttle in (throttle_class() for throttle_class in view_class.throttle_classes)
+        # The class stands in for the view: ScopedRateThrottle only reads
+        # its throttle_scope.
+        if not throttle.allow_request(request, view_class)
+    ]
+    if not waits:
+        return None
+    wait = max((w for w in waits if w is not None), default=None)
+    detail = "Request was throttled."
+    if wait is not None:
+        wait = math.ceil(wait)
+        detail += f" Expected available in {wait} second{'' if wait == 1 else 's'}."
+    response = JsonResponse({"detail": detail}, status=429)
+    if wait is not None:
+        response["Retry-After"] = str(wait)
+    return response
+
+
+@require_safe
+async def stream(request, pk):
+    """GET /api/tracks/{id}/stream/ (async, supports Range requests)"""
+    throttled = await sync_to_async(_throttled)(request, TrackViewSet)
+    if throttled is not None:
+        return throttled
+    track = await _get_track(pk)
+    response = await sync_to_async(_stream_response)(request, track, asynchronous=True)
+    return response if response is not None else _not_found()
+
+
+@require_safe
+async def download(request, pk):
+    """GET /api/tracks/{id}/download/ (async)"""
+    throttled = await sync_to_async(_throttled)(request, TrackViewSet)
+    if throttled is not None:
+        return throttled
+    track = await _get_track(pk)
+    response = await sync_to_async(_download_response)(request, track, asynchronous=True)
+    return response if response is not None else _not_found()
+
+
+@require_safe
+async def generate_stream(request):
+    """GET /api/generate/stream (async; each chunk is rendered in a worker thread)"""
+    throttled = await sync_to_async(_throttled)(request, GenerateStreamView)
+    if throttled is not None:
+        return throttled
+    try:
+        params = _generate_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return _generate_stream_response(params, asynchronous=True)
@@ -0,0 +1,124 @@
+"""
+Cached API results.
+
+Cached results (API responses, tracks.facets) include the catalog version
+in their key. tracks.signals bumps the version once a transaction that
+saved or deleted a Track, Genre or Mood commits, so every cached result
+of the old catalog is simply never read again and expires on its own.
+
+Everything lives in Django's default cache (CACHE_BACKEND), so it is only
+shared by all server processes when that is too (file or Redis). With the
+per-process default, other processes notice a change when their entries
+time out.
+
+``cache_response`` caches the data of a read-only viewset action, keyed by
+the host, the query parameters the action reads (normalized), and the
+catalog version, and counts hits and misses per action. Play and download
+counts are written without signals (tracks.counters), so responses that
+show them can be up to RESPONSE_CACHE_TIMEOUT seconds behind.
+"""
+import functools
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+CATALOG_VERSION_KEY = "tracks:catalog-version"
+RESPONSE_KEY_PREFIX = "tracks:response"
+STATS_KEY_PREFIX = "tracks:response-stats"
+
+# Names of the actions wrapped by cache_response, for response_cache_stats()
+CACHED_VIEWS = []
+
+
+def catalog_version():
+    """The current catalog version, starting one if there is none."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    # A fresh timestamp rather than incr(): it can't go back to a version
+    # whose entries are still cached if the key itself is evicted.
+    cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def normalize_query(query_params, params):
+    """
+    Query string of just ``params`` (in a fixed order, values sorted), so
+    ``?b=2&a=1`` and ``?a=1&b=2&utm_source=x`` share a cache entry. Empty
+    values are kept: ``?cursor=`` differs from no cursor.
+    """
+    return urlencode(sorted((name, value) for name in params for value in query_params.getlist(name)))
+
+
+def response_cache_key(request, view_name, params):
+    # Scheme and host too: serializers build absolute URLs from them.
+    query = normalize_query(request.query_params, params)
+    digest = hashlib.sha1(f"{request.scheme}://{request.get_host()}/?{query}".encode()).hexdigest()
+    return f"{RESPONSE_KEY_PREFIX}:{catalog_version()}:{view_name}:{digest}"
+
+
+def _count(view_name, outcome):
+    key = f"{STATS_KEY_PREFIX}:{view_name}:{outcome}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def response_cache_stats():
+    """``{action: {"hits": n, "misses": n}}`` since the counters were last reset."""
+    keys = [f"{STATS_KEY_PREFIX}:{name}:{outcome}" for name in CACHED_VIEWS for outcome in ("hits", "misses")]
+    values = cache.get_many(keys)
+    return {
+        name: {outcome: values.get(f"{STATS_KEY_PREFIX}:{name}:{outcome}", 0) for outcome in ("hits", "misses")}
+        for name in CACHED_VIEWS
+    }
+
+
+def reset_response_cache_stats():
+    cache.delete_many([f"{STATS_KEY_PREFIX}:{name}:{outcome}" for name in CACHED_VIEWS for outcome in ("hits", "misses")])
+
+
+def cache_response(params=(), timeout=None):
+    """
+    Cache the data of successful responses of a viewset action for
+    ``timeout`` seconds (default RESPONSE_CACHE_TIMEOUT). Only the query
+    parameters in ``params`` are part of the key; the action must not
+    depend on any other. Adds an ``X-Cache: HIT|MISS`` header.
+    """
+    def decorator(method):
+        view_name = method.__name__
+        CACHED_VIEWS.append(view_name)
+
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE_TIMEOUT:
+                return method(self, request, *args, **kwargs)
+            key = response_cache_key(request, view_name, params)
+            data = cache.get(key)
+            if data is not None:
+                _count(view_name, "hits")
+                response = Response(data)
+                response["X-Cache"] = "HIT"
+                return response
+
+            _count(view_name, "misses")
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, timeout or settings.RESPONSE_CACHE_TIMEOUT)
+            response["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
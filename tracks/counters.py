@@ -0,0 +1,116 @@
+"""
+Buffered play/download counters.
+
+`play` and `download` used to run ``UPDATE ... SET play_count = play_count + 1``
+on every request, so popular tracks turned into write-lock hot spots
+(the whole database on SQLite). Increments are now added up in memory
+and written every TRACK_COUNTER_FLUSH_INTERVAL seconds by a background
+thread: one UPDATE per track for all of its pending plays and downloads,
+in one transaction. Pending deltas are also flushed when the process
+exits, and can be inspected (and flushed) from the Track admin.
+
+Each server process keeps its own buffer, so counts shown by the API
+lag by up to one interval. TRACK_COUNTER_FLUSH_INTERVAL=0 writes every
+increment straight through, as before.
+"""
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import F
+
+from .models import Track
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("play_count", "download_count")
+
+
+class TrackCounters:
+    """Per-process buffer of counter increments, keyed by track id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+        self._pid = None
+        self._thread = None
+        self._wake = threading.Event()
+
+    def increment(self, track_id, field, n=1):
+        if field not in FIELDS:
+            raise ValueError(f"Unknown counter: {field!r}")
+        interval = settings.TRACK_COUNTER_FLUSH_INTERVAL
+        if interval <= 0:
+            Track.objects.filter(pk=track_id).update(**{field: F(field) + n})
+            return
+        with self._lock:
+            self._ensure_flusher(interval)
+            self._pending[track_id][field] += n
+
+    def pending(self):
+        """Copy of the unflushed deltas: {track id: {field: delta}}."""
+        with self._lock:
+            return {track_id: dict(deltas) for track_id, deltas in self._pending.items()}
+
+    def flush(self):
+        """
+        Write all pending deltas, one UPDATE per track, and return the
+        number of tracks updated. On a database error the deltas are put
+        back to be retried on the next flush.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+        if not pending:
+            return 0
+        try:
+            with transaction.atomic():
+                # Same row order in every process, so concurrent flushes
+                # can't deadlock on Postgres.
+                for track_id in sorted(pending, key=str):
+                    deltas = {field: F(field) + n for field, n in pending[track_id].items() if n}
+                    Track.objects.filter(pk=track_id).update(**deltas)
+        except DatabaseError:
+            logger.exception("Flushing counters for %d tracks failed; will retry", len(pending))
+            with self._lock:
+                for track_id, deltas in pending.items():
+                    for field, n in deltas.items():
+                        self._pending[track_id][field] += n
+            return 0
+        return len(pending)
+
+    def _ensure_flusher(self, interval):
+        # Called with the lock held. A forked worker inherits the parent's
+        # buffer but not its thread, so the buffer is reset and a new
+        # thread started in each process.
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        if self._pid is not None:
+            self._pending.clear()
+        self._pid = pid
+        self._wake = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval, self._wake), name="track-counters", daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self, interval, wake):
+        while not wake.wait(interval):
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def shutdown(self):
+        """Stop the flusher thread and write what is left."""
+        self._wake.set()
+        self.flush()
+
+
+# Shared by every request in the process.
+COUNTERS = TrackCounters()
+atexit.register(COUNTERS.shutdown)
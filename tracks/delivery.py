@@ -0,0 +1,97 @@
+"""
+How audio bytes reach listeners.
+
+In "redirect" mode stream/download answer with a 302 to the object's URL
+on remote storage (S3/Supabase): presigned and short-lived when
+AWS_QUERYSTRING_AUTH is on, the public URL otherwise. The object store
+then handles Range requests itself, so API workers no longer cap the
+number of concurrent listeners. Files on local storage are always proxied.
+
+In "accel" mode files on local storage are handed to the fronting web
+server with an internal-redirect header (nginx X-Accel-Redirect, or
+X-Sendfile for Apache/lighttpd), which then serves the bytes, Ranges
+included, with kernel sendfile. See deploy/nginx.conf.
+"""
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseRedirect
+from django.utils._os import safe_join
+
+PROXY = "proxy"
+REDIRECT = "redirect"
+ACCEL = "accel"
+
+
+def is_local(fieldfile):
+    try:
+        fieldfile.storage.path(fieldfile.name)
+    except NotImplementedError:
+        return False
+    return True
+
+
+def redirect_url(fieldfile, content_type=None, attachment_filename=None):
+    """
+    The URL to redirect to for ``fieldfile``, or None when it should be
+    proxied (proxy mode, or storage without its own URLs).
+    """
+    if settings.AUDIO_DELIVERY_MODE != REDIRECT or not fieldfile or is_local(fieldfile):
+        return None
+
+    # Response header overrides need a signed URL; S3 rejects them on
+    # anonymous (public URL) requests.
+    parameters = {}
+    if getattr(fieldfile.storage, "querystring_auth", False):
+        if content_type:
+            parameters["ResponseContentType"] = content_type
+        if attachment_filename:
+            parameters["ResponseContentDisposition"] = f'attachment; filename="{attachment_filename}"'
+    try:
+        return fieldfile.storage.url(
+            fieldfile.name, parameters=parameters or None, expire=settings.AUDIO_URL_EXPIRE,
+        )
+    except TypeError:
+        # Storage backends whose url() takes no expiry/parameters
+        return fieldfile.storage.url(fieldfile.name)
+
+
+def redirect_response(url):
+    response = HttpResponseRedirect(url)
+    # Shorter than the URL lifetime so caches never replay an expired link.
+    max_age = max(settings.AUDIO_URL_EXPIRE // 2, 0)
+    response["Cache-Control"] = f"private, max-age={max_age}"
+    return response
+
+
+def accel_enabled(fieldfile=None):
+    if settings.AUDIO_DELIVERY_MODE != ACCEL:
+        return False
+    return fieldfile is None or (bool(fieldfile) and is_local(fieldfile))
+
+
+def accel_response(path, content_type=None):
+    """
+    An empty response telling the front server to send the file at
+    ``path`` (relative to MEDIA_ROOT) itself.
+    """
+    response = HttpResponse(content_type=content_type)
+    if settings.AUDIO_ACCEL_HEADER.lower() == "x-sendfile":
+        response["X-Sendfile"] = safe_join(settings.MEDIA_ROOT, path)
+    else:
+        prefix = settings.AUDIO_ACCEL_PREFIX.rstrip("/")
+        response[settings.AUDIO_ACCEL_HEADER] = f"{prefix}/{quote(path.lstrip('/'))}"
+    return response
+
+
+def serve_media(request, path):
+    """MEDIA_URL view for production: offloads to the front server in accel mode."""
+    full_path = safe_join(settings.MEDIA_ROOT, path)
+    if not os.path.isfile(full_path):
+        raise Http404("File not found")
+    if settings.AUDIO_DELIVERY_MODE == ACCEL:
+        return accel_response(path)
+    from django.views.static import serve
+
+    return serve(request, path, document_root=settings.MEDIA_ROOT)
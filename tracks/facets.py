@@ -0,0 +1,141 @@
+"""
+Facet counts for the track list filters (``/api/tracks/facets/``).
+
+Counts for every TrackFilter dimension (genre, mood, BPM and duration
+ranges, featured) come from one grouped query: active tracks matching the
+``tag`` and ``search`` parameters, grouped by genre, mood, featured,
+BPM bucket, duration bucket and whether each applied range filter
+matches. The groups are then added up in Python so that each dimension
+is narrowed by every applied filter except its own. With ``?genre=lofi``,
+the genre counts still show the other genres, counted within the same
+mood, BPM and duration.
+
+Results are cached per filter combination under the catalog version
+(tracks.cache), so any track, genre or mood change invalidates them.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Count, IntegerField, Q, Value, When
+
+from .cache import catalog_version
+from .search import search_terms, search_tracks
+
+# Inclusive (min, max) ranges, in the units of ?min_bpm=/?max_bpm= and
+# ?min_duration=/?max_duration= (seconds); None is open-ended.
+BPM_BUCKETS = [(None, 59), (60, 79), (80, 99), (100, 119), (120, 139), (140, None)]
+DURATION_BUCKETS = [(None, 59), (60, 119), (120, 179), (180, 299), (300, None)]
+
+# Filters applied to every count, not faceted themselves
+NARROWING_FILTERS = ("tag",)
+
+
+def _bucket(field, buckets):
+    whens = [When(**{f"{field}__isnull": True}, then=Value(None))]
+    whens += [When(**{f"{field}__lte": high}, then=Value(i)) for i, (_, high) in enumerate(buckets[:-1])]
+    return Case(*whens, default=Value(len(buckets) - 1), output_field=IntegerField())
+
+
+def _in_range(field, low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(**{f"{field}__gte": low})
+    if high is not None:
+        condition &= Q(**{f"{field}__lte": high})
+    return Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField())
+
+
+def _range_facet(buckets, counts):
+    return [{"min": low, "max": high, "count": counts.get(i, 0)} for i, (low, high) in enumerate(buckets)]
+
+
+def _named_facet(counts):
+    return [
+        {"slug": slug, "name": name, "count": n}
+        for (slug, name), n in sorted(counts.items(), key=lambda item: item[0][1])
+    ]
+
+
+def track_facets(filterset, search=""):
+    """
+    Facet counts for the queryset of a validated TrackFilter, under its
+    filters and the ``search`` text.
+    """
+    filters = filterset.form.cleaned_data
+    queryset = filterset.queryset
+    for name in NARROWING_FILTERS:
+        if filters.get(name) not in (None, ""):
+            queryset = filterset.filters[name].filter(queryset, filters[name])
+    queryset = search_tracks(queryset, search)
+
+    annotations = {
+        "bpm_bucket": _bucket("bpm", BPM_BUCKETS),
+        "duration_bucket": _bucket("duration", DURATION_BUCKETS),
+    }
+    # Predicates of the applied faceted filters, evaluated on each group
+    applied = {}
+    if filters.get("genre"):
+        applied["genre"] = lambda row, slug=filters["genre"]: row["genre__slug"] == slug
+    if filters.get("mood"):
+        applied["mood"] = lambda row, slug=filters["mood"]: row["mood__slug"] == slug
+    for dimension, field in (("bpm", "bpm"), ("duration", "duration")):
+        low, high = filters.get(f"min_{dimension}"), filters.get(f"max_{dimension}")
+        if low is not None or high is not None:
+            annotations[f"{dimension}_match"] = _in_range(field, low, high)
+            applied[dimension] = lambda row, flag=f"{dimension}_match": row[flag]
+    if filters.get("featured") is not None:
+        applied["featured"] = lambda row, featured=filters["featured"]: row["is_featured"] == featured
+
+    rows = (
+        queryset.order_by()
+        .annotate(**annotations)
+        .values("genre__slug", "genre__name", "mood__slug", "mood__name", "is_featured", *annotations)
+        .annotate(n=Count("pk"))
+    )
+
+    keys = {
+        "genre": lambda row: row["genre__slug"] and (row["genre__slug"], row["genre__name"]),
+        "mood": lambda row: row["mood__slug"] and (row["mood__slug"], row["mood__name"]),
+        "bpm": lambda row: row["bpm_bucket"],
+        "duration": lambda row: row["duration_bucket"],
+        "featured": lambda row: row["is_featured"],
+    }
+    counts = {dimension: {} for dimension in keys}
+    total = 0
+    for row in rows:
+        matches = {dimension: bool(test(row)) for dimension, test in applied.items()}
+        if all(matches.values()):
+            total += row["n"]
+        for dimension, key in keys.items():
+            value = key(row)
+            if value is None or not all(ok for other, ok in matches.items() if other != dimension):
+                continue
+            counts[dimension][value] = counts[dimension].get(value, 0) + row["n"]
+
+    return {
+        "count": total,
+        "genre": _named_facet(counts["genre"]),
+        "mood": _named_facet(counts["mood"]),
+        "bpm": _range_facet(BPM_BUCKETS, counts["bpm"]),
+        "duration": _range_facet(DURATION_BUCKETS, counts["duration"]),
+        "featured": [{"value": value, "count": counts["featured"].get(value, 0)} for value in (True, False)],
+    }
+
+
+def _cache_key(filters, search):
+    params = {name: str(value) for name, value in filters.items() if value not in (None, "")}
+    params["search"] = " ".join(search_terms(search))
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"tracks:facets:{catalog_version()}:{digest}"
+
+
+def cached_track_facets(filterset, search=""):
+    """track_facets(), cached for TRACK_FACETS_CACHE_TIMEOUT seconds per filter combination."""
+    key = _cache_key(filterset.form.cleaned_data, search)
+    facets = cache.get(key)
+    if facets is None:
+        facets = track_facets(filterset, search)
+        cache.set(key, facets, settings.TRACK_FACETS_CACHE_TIMEOUT)
+    return facets
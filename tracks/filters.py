@@ -1,4 +1,6 @@
 import django_filters
+from django.utils.text import slugify
+
 from .models import Track
 
 
@@ -10,7 +12,12 @@ class TrackFilter(django_filters.FilterSet):
     min_bpm = django_filters.NumberFilter(field_name="bpm", lookup_expr="gte")
     max_bpm = django_filters.NumberFilter(field_name="bpm", lookup_expr="lte")
     featured = django_filters.BooleanFilter(field_name="is_featured")
+    tag = django_filters.CharFilter(method="filter_tag", label="Tag slug or name")
 
     class Meta:
         model = Track
-        fields = ["genre", "mood", "min_duration", "max_duration", "min_bpm", "max_bpm", "featured"]
+        fields = ["genre", "mood", "min_duration", "max_duration", "min_bpm", "max_bpm", "featured", "tag"]
+
+    def filter_tag(self, queryset, name, value):
+        # Joins the indexed tag_set table; "Hip Hop" and "hip-hop" both work.
+        return queryset.filter(tag_set__slug=slugify(value))
@@ -1,130 +1,152 @@
+import heapq
+import itertools
 import random
+from typing import NamedTuple
 
-from . import oscillators, envelopes, effects, theory, drums, mixer, genres
+import numpy as np
+
+from . import oscillators, envelopes, effects, theory, drums, mixer, genres, encoder
+from .oscillators import DTYPE
+from .voices import VOICES
 
 
 def _get_osc_func(name):
     osc_map = {
-        "sine": oscillators.sine_wave,
-        "saw": oscillators.saw_wave,
-        "square": oscillators.square_wave,
-        "triangle": oscillators.triangle_wave,
-        "pulse": oscillators.pulse_wave,
+        "sine": oscillators.sine_array,
+        "saw": oscillators.saw_array,
+        "square": oscillators.square_array,
+        "triangle": oscillators.triangle_array,
+        "pulse": oscillators.pulse_array,
     }
-    return osc_map.get(name, oscillators.sine_wave)
+    return osc_map.get(name, oscillators.sine_array)
 
 
-def _apply_effects_chain(samples, chain, sr=22050):
+def _apply_effects_chain(buf, chain, sr=22050):
     for effect_name, *params in chain:
         if effect_name == "low_pass":
-            samples = effects.low_pass_filter(samples, cutoff=params[0], sr=sr)
+            effects.low_pass_array(buf, cutoff=params[0], sr=sr)
+        elif effect_name == "high_pass":
+            effects.high_pass_array(buf, params[0], sr, *params[1:])
+        elif effect_name == "band_pass":
+            effects.band_pass_array(buf, params[0], sr, *params[1:])
+        elif effect_name == "resonant_low_pass":
+            effects.resonant_low_pass_array(buf, params[0], sr, *params[1:])
         elif effect_name == "reverb":
-            samples = effects.simple_reverb(samples, sr=sr, mix=params[0])
+            effects.reverb_array(buf, sr=sr, mix=params[0])
+        elif effect_name == "hall":
+            effects.hall_reverb_array(buf, sr, params[0], *params[1:])
         elif effect_name == "distortion":
-            samples = effects.distortion(samples, gain=params[0])
+            effects.distortion_array(buf, gain=params[0])
         elif effect_name == "bitcrush":
-            samples = effects.bitcrush(samples, bits=params[0])
-    return samples
+            effects.bitcrush_array(buf, bits=params[0])
+    return buf
+
+
+def _add_at(out, offset, tone):
+    n = min(len(tone), len(out) - offset)
+    if n > 0:
+        out[offset:offset + n] += tone[:n]
+
+
+CHORD_ENVELOPE = (0.02, 0.1, 0.6, 0.1)
+BASS_ENVELOPE = (0.01, 0.05, 0.7, 0.05)
+MELODY_ENVELOPE = (0.01, 0.05, 0.5, 0.08)
+PAD_ENVELOPE = (0.3, 0.2, 0.4, 0.3)
 
 
-def _render_chords(chord_progression, osc_func, beat_dur, bars, sr, scale_name):
-    samples = []
+def _render_chords(out, chord_progression, osc_func, beat_dur, bars, sr, voices=VOICES):
+    note_samples = int(beat_dur * 4 * sr)  # whole note per chord
+    offset = 0
     for _ in range(bars):
         for root_midi, chord_type in chord_progression:
+            if offset >= len(out):
+                return out
             freqs = theory.get_chord_freqs(root_midi, chord_type)
-            note_samples = int(beat_dur * 4 * sr)  # whole note per chord
-            chord_buf = [0.0] * note_samples
             for freq in freqs:
-                tone = osc_func(freq, beat_dur * 4, sr)
-                env = envelopes.adsr_envelope(
-                    len(tone), attack=0.02, decay=0.1, sustain=0.6, release=0.1, sr=sr
-                )
-                for i in range(min(len(tone), note_samples)):
-                    chord_buf[i] += tone[i] * env[i] / len(freqs)
-            samples.extend(chord_buf)
-    return samples
-
-
-def _render_bass(chord_progression, osc_func, beat_dur, bars, sr):
-    samples = []
+                tone = voices.get(osc_func, freq, beat_dur * 4, sr, CHORD_ENVELOPE, len(freqs))
+                _add_at(out, offset, tone[:note_samples])
+            offset += note_samples
+    return out
+
+
+def _render_bass(out, chord_progression, osc_func, beat_dur, bars, sr, voices=VOICES):
+    offset = 0
     for _ in range(bars):
         for root_midi, chord_type in chord_progression:
             bass_midi = root_midi - 12
             freq = theory.midi_to_freq(bass_midi)
             note_dur = beat_dur
             for beat in range(4):
-                tone = osc_func(freq, note_dur, sr)
-                env = envelopes.adsr_envelope(
-                    len(tone), attack=0.01, decay=0.05, sustain=0.7, release=0.05, sr=sr
-                )
-                tone = envelopes.apply_envelope(tone, env)
-                samples.extend(tone)
-    return samples
+                if offset >= len(out):
+                    return out
+                tone = voices.get(osc_func, freq, note_dur, sr, BASS_ENVELOPE)
+                _add_at(out, offset, tone)
+                offset += len(tone)
+    return out
 
 
-def _render_melody(chord_progression, scale_notes, osc_func, beat_dur, bars, sr, rest_prob):
-    all_samples = []
+def _render_melody(out, chord_progression, scale_notes, osc_func, beat_dur, bars, sr, rest_prob, rng, voices=VOICES):
+    offset = 0
     for _ in range(bars):
         for root_midi, chord_type in chord_progression:
+            if offset >= len(out):
+                return out
             chord_midis = [root_midi + i for i in theory.CHORD_TYPES.get(chord_type, [0, 4, 7])]
             melody_notes = theory.generate_melody(
                 scale_notes, num_beats=4, beat_duration=beat_dur,
-                sr=sr, rest_prob=rest_prob, chord_tones_midi=chord_midis,
+                sr=sr, rest_prob=rest_prob, chord_tones_midi=chord_midis, rng=rng,
             )
             for midi_note, dur in melody_notes:
                 num_note_samples = int(dur * sr)
-                if midi_note == 0:
-                    all_samples.extend([0.0] * num_note_samples)
-                else:
+                if midi_note != 0:
                     freq = theory.midi_to_freq(midi_note)
-                    tone = osc_func(freq, dur, sr)
-                    env = envelopes.adsr_envelope(
-                        len(tone), attack=0.01, decay=0.05, sustain=0.5, release=0.08, sr=sr
-                    )
-                    tone = envelopes.apply_envelope(tone, env)
-                    all_samples.extend(tone)
-    return all_samples
+                    _add_at(out, offset, voices.get(osc_func, freq, dur, sr, MELODY_ENVELOPE))
+                offset += num_note_samples
+    return out
 
 
-def _render_pad(chord_progression, osc_func, beat_dur, bars, sr):
-    samples = []
+def _render_pad(out, chord_progression, osc_func, beat_dur, bars, sr, voices=VOICES):
+    chord_dur = beat_dur * 4
+    note_samples = int(chord_dur * sr)
+    offset = 0
     for _ in range(bars):
         for root_midi, chord_type in chord_progression:
+            if offset >= len(out):
+                return out
             freqs = theory.get_chord_freqs(root_midi, chord_type)
-            chord_dur = beat_dur * 4
-            note_samples = int(chord_dur * sr)
-            chord_buf = [0.0] * note_samples
             for freq in freqs:
-                tone = osc_func(freq * 2, chord_dur, sr)
-                env = envelopes.adsr_envelope(
-                    len(tone), attack=0.3, decay=0.2, sustain=0.4, release=0.3, sr=sr
-                )
-                for i in range(min(len(tone), note_samples)):
-                    chord_buf[i] += tone[i] * env[i] / len(freqs)
-            samples.extend(chord_buf)
-    return samples
+                tone = voices.get(osc_func, freq * 2, chord_dur, sr, PAD_ENVELOPE, len(freqs))
+                _add_at(out, offset, tone[:note_samples])
+            offset += note_samples
+    return out
+
 
+class _Arrangement(NamedTuple):
+    template: dict
+    bpm: int
+    chord_progression: list
+    scale_notes: list
+    beat_dur: float
+    bars: int
+    duration: float  # seconds actually rendered
+    num_samples: int
 
-def generate_track(genre_name, bpm=None, duration=8, sr=22050):
-    template = genres.get_genre_template(genre_name)
+
+def _arrange(genre_name, bpm, duration, sr, rng):
+    # The musical choices, drawn from ``rng`` (the ``random`` module or a
+    # random.Random) in the same order by every render mode.
+    genre_key = genres.resolve_genre_key(genre_name)
+    template = genres.GENRE_TEMPLATES[genre_key]
 
     if bpm is None:
-        bpm = random.randint(*template["bpm_range"])
-
-    scale_name = random.choice(template["scales"])
-    root_midi = random.randint(*template["root_range"])
-
-    genre_key = genre_name.lower().replace("-", "").replace(" ", "")
-    prog_options = theory.GENRE_PROGRESSIONS.get(genre_key)
-    if not prog_options:
-        for alias, target in genres.GENRE_ALIASES.items():
-            if alias.replace("-", "").replace(" ", "") == genre_key:
-                prog_options = theory.GENRE_PROGRESSIONS.get(target)
-                break
-    if not prog_options:
-        prog_options = theory.GENRE_PROGRESSIONS["electronic"]
-
-    progression_degrees = random.choice(prog_options)
+        bpm = rng.randint(*template["bpm_range"])
+
+    scale_name = rng.choice(template["scales"])
+    root_midi = rng.randint(*template["root_range"])
+
+    prog_options = theory.GENRE_PROGRESSIONS.get(genre_key) or theory.GENRE_PROGRESSIONS["electronic"]
+
+    progression_degrees = rng.choice(prog_options)
     chord_progression = theory.build_progression(root_midi, scale_name, progression_degrees)
 
     beat_dur = 60.0 / bpm
@@ -132,60 +154,259 @@ def generate_track(genre_name, bpm=None, duration=8, sr=22050):
     bars = max(1, int(duration / bar_dur))
     actual_duration = bars * bar_dur
 
-    target_samples = int(duration * sr)
-    scale_notes = theory.get_scale_notes(root_midi, scale_name, octaves=3)
+    return _Arrangement(
+        template=template,
+        bpm=bpm,
+        chord_progression=chord_progression,
+        scale_notes=theory.get_scale_notes(root_midi, scale_name, octaves=3),
+        beat_dur=beat_dur,
+        bars=bars,
+        duration=min(actual_duration, duration),
+        num_samples=min(int(duration * sr), int(actual_duration * sr)),
+    )
+
+
+def render_track(genre_name, bpm=None, duration=8, sr=22050, seed=None):
+    # A private random.Random, like iter_render_track: seeding the global
+    # one would reset every other user of ``random`` in the process.
+    rng = random.Random(seed)
+    arr = _arrange(genre_name, bpm, duration, sr, rng)
+    template = arr.template
+    chord_progression, beat_dur, bars = arr.chord_progression, arr.beat_dur, arr.bars
+
+    # Layers render one at a time into a single preallocated scratch buffer,
+    # already trimmed to the target duration, and are mixed down in place.
+    num_samples = arr.num_samples
     fx_config = template.get("effects", {})
+    vols = template["volumes"]
+    mixed = np.zeros(num_samples, dtype=DTYPE)
+    layer = np.zeros(num_samples, dtype=DTYPE)
 
-    def _trim(layer):
-        return layer[:target_samples] if len(layer) > target_samples else layer
+    def _mix_layer(name):
+        _apply_effects_chain(layer, fx_config.get(name, []), sr)
+        mixer.mix_into(mixed, layer, vols.get(name, 0))
+        layer.fill(0.0)
 
-    # Render layers (trim before effects to avoid processing excess samples)
-    chord_osc = _get_osc_func(template["chord_osc"])
-    chord_layer = _trim(_render_chords(chord_progression, chord_osc, beat_dur, bars, sr, scale_name))
-    chord_layer = _apply_effects_chain(chord_layer, fx_config.get("chords", []), sr)
+    _render_chords(layer, chord_progression, _get_osc_func(template["chord_osc"]), beat_dur, bars, sr)
+    _mix_layer("chords")
 
-    bass_osc = _get_osc_func(template["bass_osc"])
-    bass_layer = _trim(_render_bass(chord_progression, bass_osc, beat_dur, bars, sr))
-    bass_layer = _apply_effects_chain(bass_layer, fx_config.get("bass", []), sr)
+    _render_bass(layer, chord_progression, _get_osc_func(template["bass_osc"]), beat_dur, bars, sr)
+    _mix_layer("bass")
 
     if template["drum_patterns"]:
-        drum_layer = drums.sequence_drums(
-            template["drum_patterns"], bpm, min(actual_duration, duration), sr,
-            swing=template.get("swing", 0.0),
+        drums.sequence_drums(
+            template["drum_patterns"], arr.bpm, arr.duration, sr,
+            swing=template.get("swing", 0.0), out=layer,
         )
-    else:
-        drum_layer = [0.0] * target_samples
+        _mix_layer("drums")
 
-    melody_osc = _get_osc_func(template["melody_osc"])
-    melody_layer = _trim(_render_melody(
-        chord_progression, scale_notes, melody_osc, beat_dur, bars, sr,
-        rest_prob=template.get("melody_rest_prob", 0.2),
-    ))
-    melody_layer = _apply_effects_chain(melody_layer, fx_config.get("melody", []), sr)
+    _render_melody(
+        layer, chord_progression, arr.scale_notes, _get_osc_func(template["melody_osc"]),
+        beat_dur, bars, sr, rest_prob=template.get("melody_rest_prob", 0.2), rng=rng,
+    )
+    _mix_layer("melody")
 
     pad_osc_name = template.get("pad_osc")
-    if pad_osc_name and template["volumes"].get("pad", 0) > 0:
-        pad_osc = _get_osc_func(pad_osc_name)
-        pad_layer = _trim(_render_pad(chord_progression, pad_osc, beat_dur, bars, sr))
-        pad_layer = _apply_effects_chain(pad_layer, fx_config.get("pad", []), sr)
-    else:
-        pad_layer = [0.0] * target_samples
-
-    # Mix
+    if pad_osc_name and vols.get("pad", 0) > 0:
+        _render_pad(layer, chord_progression, _get_osc_func(pad_osc_name), beat_dur, bars, sr)
+        _mix_layer("pad")
+
+    _apply_effects_chain(mixed, fx_config.get("master", []), sr)
+    mixer.normalize_array(mixed)
+    envelopes.fade_in_array(mixed, duration=0.05, sr=sr)
+    envelopes.fade_out_array(mixed, duration=0.3, sr=sr)
+    return mixed
+
+
+# ─── Streaming render ──────────────────────────────────
+# Each layer is a lazy sequence of (sample offset, tone) notes, placed in
+# the same spots as by the _render_* functions above. Notes are mixed into
+# a per-layer buffer one chunk (a pass through the chord progression) at a
+# time; tails ringing past the chunk end carry over into the next chunk.
+
+def _iter_chord_notes(chord_progression, osc_func, beat_dur, sr, envelope, octave=1, voices=VOICES):
+    note_samples = int(beat_dur * 4 * sr)
+    offset = 0
+    for root_midi, chord_type in itertools.cycle(chord_progression):
+        freqs = theory.get_chord_freqs(root_midi, chord_type)
+        for freq in freqs:
+            tone = voices.get(osc_func, freq * octave, beat_dur * 4, sr, envelope, len(freqs))
+            yield offset, tone[:note_samples]
+        offset += note_samples
+
+
+def _iter_bass_notes(chord_progression, osc_func, beat_dur, sr, voices=VOICES):
+    offset = 0
+    for root_midi, _ in itertools.cycle(chord_progression):
+        freq = theory.midi_to_freq(root_midi - 12)
+        for _ in range(4):
+            tone = voices.get(osc_func, freq, beat_dur, sr, BASS_ENVELOPE)
+            yield offset, tone
+            offset += len(tone)
+
+
+def _iter_melody_notes(chord_progression, scale_notes, osc_func, beat_dur, sr, rest_prob, rng, voices=VOICES):
+    offset = 0
+    for root_midi, chord_type in itertools.cycle(chord_progression):
+        chord_midis = [root_midi + i for i in theory.CHORD_TYPES.get(chord_type, [0, 4, 7])]
+        melody_notes = theory.generate_melody(
+            scale_notes, num_beats=4, beat_duration=beat_dur,
+            sr=sr, rest_prob=rest_prob, chord_tones_midi=chord_midis, rng=rng,
+        )
+        for midi_note, dur in melody_notes:
+            if midi_note != 0:
+                yield offset, voices.get(osc_func, theory.midi_to_freq(midi_note), dur, sr, MELODY_ENVELOPE)
+            offset += int(dur * sr)
+
+
+def _iter_drum_hits(patterns, bpm, duration, sr, swing):
+    def hits(sound, onsets):
+        for offset in onsets:
+            yield int(offset), sound
+
+    return heapq.merge(*(
+        hits(drums.one_shot(key, sr), drums.compile_onsets(pattern, bpm, duration, sr, swing))
+        for key, pattern in patterns.items()
+        if key in drums.DRUM_SOUNDS and pattern
+    ), key=lambda hit: hit[0])
+
+
+class _LayerStream:
+    """One layer's notes and effects state, mixed down a chunk at a time."""
+
+    def __init__(self, notes, chain, volume, max_chunk, tail, sr):
+        self.notes = notes
+        self.effects = effects.EffectChain(chain, sr)
+        self.volume = volume
+        self.buf = np.zeros(max_chunk + tail, dtype=DTYPE)
+        self._next = next(notes, None)
+
+    def mix_chunk(self, out, start):
+        """Add the notes starting before ``start + len(out)`` and mix the chunk into ``out``."""
+        n = len(out)
+        while self._next is not None and self._next[0] < start + n:
+            offset, tone = self._next
+            _add_at(self.buf, offset - start, tone)
+            self._next = next(self.notes, None)
+        chunk = self.buf[:n]
+        self.effects.process(chunk)
+        mixer.mix_into(out, chunk, self.volume)
+        tail = len(self.buf) - n
+        self.buf[:tail] = self.buf[n:]
+        self.buf[tail:] = 0.0
+
+
+STREAM_TARGET_PEAK = 0.85
+STREAM_FADE_IN = 0.05
+STREAM_FADE_OUT = 0.3
+
+
+def _chunk_bounds(num_samples, chunk_samples, min_last):
+    # One chunk per pass through the progression; a short remainder is
+    # merged into the last chunk so the fade-out never spans two chunks.
+    start = 0
+    while start < num_samples:
+        end = start + chunk_samples
+        if num_samples - end < min_last:
+            end = num_samples
+        yield start, end
+        start = end
+
+
+def _stream_layers(arr, sr, rng):
+    template = arr.template
+    fx_config = template.get("effects", {})
     vols = template["volumes"]
-    layers = [chord_layer, bass_layer, drum_layer, melody_layer, pad_layer]
-    volumes = [vols["chords"], vols["bass"], vols["drums"], vols["melody"], vols.get("pad", 0)]
+    progression, beat_dur = arr.chord_progression, arr.beat_dur
 
-    mixed = mixer.mix_layers(layers, volumes)
-    mixed = _apply_effects_chain(mixed, fx_config.get("master", []), sr)
-
-    # Truncate to target duration
-    target_samples = int(duration * sr)
-    if len(mixed) > target_samples:
-        mixed = mixed[:target_samples]
-
-    mixed = mixer.normalize(mixed)
-    mixed = envelopes.fade_in(mixed, duration=0.05, sr=sr)
-    mixed = envelopes.fade_out(mixed, duration=0.3, sr=sr)
-
-    return mixer.samples_to_wav_bytes(mixed, sr)
+    layers = [
+        ("chords", _iter_chord_notes(progression, _get_osc_func(template["chord_osc"]), beat_dur, sr, CHORD_ENVELOPE)),
+        ("bass", _iter_bass_notes(progression, _get_osc_func(template["bass_osc"]), beat_dur, sr)),
+    ]
+    if template["drum_patterns"]:
+        layers.append(("drums", _iter_drum_hits(
+            template["drum_patterns"], arr.bpm, arr.duration, sr, template.get("swing", 0.0),
+        )))
+    layers.append(("melody", _iter_melody_notes(
+        progression, arr.scale_notes, _get_osc_func(template["melody_osc"]),
+        beat_dur, sr, template.get("melody_rest_prob", 0.2), rng,
+    )))
+    pad_osc_name = template.get("pad_osc")
+    if pad_osc_name and vols.get("pad", 0) > 0:
+        layers.append(("pad", _iter_chord_notes(
+            progression, _get_osc_func(pad_osc_name), beat_dur, sr, PAD_ENVELOPE, octave=2,
+        )))
+    return [(name, notes, fx_config.get(name, []), vols.get(name, 0)) for name, notes in layers]
+
+
+def _iter_render(arr, sr, rng):
+    chunk_samples = len(arr.chord_progression) * int(arr.beat_dur * 4 * sr)
+    fade_out = int(STREAM_FADE_OUT * sr)
+    max_chunk = chunk_samples + fade_out
+    # The longest note is a whole-note chord (drum hits are shorter), so
+    # that much tail room holds everything ringing past a chunk.
+    tail = int(arr.beat_dur * 4 * sr)
+    layers = [
+        _LayerStream(notes, chain, volume, max_chunk, tail, sr)
+        for _, notes, chain, volume in _stream_layers(arr, sr, rng)
+    ]
+    master = effects.EffectChain(arr.template.get("effects", {}).get("master", []), sr)
+    mixed = np.zeros(max_chunk, dtype=DTYPE)
+
+    gain = None
+    for start, end in _chunk_bounds(arr.num_samples, chunk_samples, fade_out):
+        out = mixed[:end - start]
+        out.fill(0.0)
+        for layer in layers:
+            layer.mix_chunk(out, start)
+        master.process(out)
+        if gain is None:
+            # The whole-track peak isn't known yet, so the gain that
+            # normalizes the first chunk is kept for the rest.
+            peak = np.abs(out).max() if len(out) else 0.0
+            gain = STREAM_TARGET_PEAK / peak if peak > 0 else 1.0
+        out *= gain
+        if start == 0:
+            envelopes.fade_in_array(out, duration=STREAM_FADE_IN, sr=sr)
+        if end == arr.num_samples:
+            envelopes.fade_out_array(out, duration=STREAM_FADE_OUT, sr=sr)
+        yield out.copy()
+
+
+def iter_render_track(genre_name, bpm=None, duration=8, sr=22050, seed=None):
+    """
+    Render a track incrementally, yielding float32 chunks of one pass
+    through the chord progression each (a few seconds), in constant memory
+    however long ``duration`` is.
+
+    Same notes as ``render_track`` with the same seed, but filters and
+    reverbs run in streaming mode and the gain is fixed after the first
+    chunk rather than normalized over the whole track, so the samples
+    differ slightly. Uses its own random.Random, so concurrent streams
+    don't disturb each other.
+    """
+    rng = random.Random(seed)
+    return _iter_render(_arrange(genre_name, bpm, duration, sr, rng), sr, rng)
+
+
+def generate_track_stream(genre_name, bpm=None, duration=8, sr=22050, fmt="pcm16", seed=None, wav=True):
+    """
+    Encoded chunks of ``iter_render_track``: a WAV header with the final
+    size first, or headerless little-endian PCM with ``wav=False``.
+    """
+    rng = random.Random(seed)
+    arr = _arrange(genre_name, bpm, duration, sr, rng)
+    chunks = _iter_render(arr, sr, rng)
+    if wav:
+        return encoder.wav_chunks(chunks, sr, fmt, num_frames=arr.num_samples)
+    return (bytes(encoder.encode(chunk, fmt)) for chunk in chunks)
+
+
+def generate_track(genre_name, bpm=None, duration=8, sr=22050, fmt="pcm16", seed=None):
+    return mixer.samples_to_wav_bytes(render_track(genre_name, bpm, duration, sr, seed), sr, fmt)
+
+
+def generate_track_to_file(fileobj, genre_name, bpm=None, duration=8, sr=22050, fmt="pcm16", seed=None):
+    # Encodes straight into ``fileobj`` chunk by chunk, so the float render
+    # and a full copy of the encoded bytes are never held at the same time.
+    encoder.write_wav(fileobj, render_track(genre_name, bpm, duration, sr, seed), sr, fmt)
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from . import genres
+
+# Bump whenever a generator change alters the audio rendered for a given
+# (genre, bpm, duration, sr, seed), so stale entries stop matching.
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def render_key(genre_name, bpm=None, duration=8, sr=22050, fmt="pcm16", seed=None):
+    """
+    Content address of a seeded render. Genre aliases resolve to the same
+    template key, so "Lo-Fi" and "lofi" share entries. Unseeded renders are
+    not reproducible and have no key.
+    """
+    if seed is None:
+        return None
+    params = {
+        "genre": genres.resolve_genre_key(genre_name),
+        "bpm": None if bpm is None else int(bpm),
+        "duration": float(duration),
+        "sr": int(sr),
+        "fmt": fmt,
+        "seed": int(seed),
+        "version": CACHE_VERSION,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+class RenderCache:
+    """
+    On-disk cache of encoded renders, stored as ``<directory>/<ab>/<key>.wav``.
+
+    Reads bump the file's mtime, and once the directory grows past
+    ``max_bytes`` the least recently used files are deleted. Writes go
+    through a temp file and ``os.replace`` so concurrent workers never see a
+    partial entry. Hit/miss counters are per process.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.wav")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def get_file(self, key, dest):
+        """Copy the entry to the file ``dest``; False on a miss."""
+        path = self.path(key)
+        try:
+            shutil.copyfile(path, dest)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key, data):
+        self._store(key, lambda f: f.write(data))
+
+    def put_file(self, key, src):
+        """Like put(), copying the contents of the file ``src``."""
+        def copy(f):
+            with open(src, "rb") as source:
+                shutil.copyfileobj(source, f)
+        self._store(key, copy)
+
+    def _store(self, key, write):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with self._lock:
+            if self._size is not None:
+                self._size += size - replaced
+            if self.size_bytes() > self.max_bytes:
+                self._evict()
+
+    def size_bytes(self):
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        entries = list(self._entries())
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in self._entries():
+                _unlink(path)
+            self._size = 0
+
+    def _entries(self):
+        # (path, size, mtime) for every cached file
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".wav"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield entry.path, st.st_size, st.st_mtime
+
+    def _evict(self):
+        # Rescan rather than trusting the running total: other processes
+        # share the directory. Evict down to 90% so we don't rescan on
+        # every subsequent put.
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        size = sum(s for _, s, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, entry_size, _ in entries:
+            if size <= target:
+                break
+            if _unlink(path):
+                size -= entry_size
+                self.evictions += 1
+        self._size = size
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+_default_cache = None
+
+
+def default_cache():
+    """The cache configured by RENDER_CACHE_DIR / RENDER_CACHE_MAX_BYTES, or None."""
+    global _default_cache
+    from django.conf import settings
+
+    directory = getattr(settings, "RENDER_CACHE_DIR", "")
+    if not directory:
+        return None
+    if _default_cache is None or _default_cache.directory != str(directory):
+        _default_cache = RenderCache(directory, getattr(settings, "RENDER_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+    return _default_cache
@@ -1,63 +1,60 @@
-import math
-import random
+import functools
+import zlib
 
-from .oscillators import sine_wave, white_noise
-from .envelopes import adsr_envelope, apply_envelope
-from .effects import low_pass_filter
+import numpy as np
 
+from .oscillators import DTYPE, sine_array, white_noise_array
+from .envelopes import adsr_array
+from .effects import low_pass_array
 
-def kick(sr=22050):
+
+def kick(sr=22050, rng=None):
     duration = 0.15
     num_samples = int(sr * duration)
-    samples = []
-    for i in range(num_samples):
-        t = i / sr
-        freq = 150.0 * math.exp(-30.0 * t) + 50.0
-        samples.append(math.sin(2 * math.pi * freq * t))
-    env = adsr_envelope(num_samples, attack=0.002, decay=0.1, sustain=0.0, release=0.05, sr=sr)
-    return apply_envelope(samples, env)
+    t = np.arange(num_samples, dtype=np.float64) / sr
+    freq = 150.0 * np.exp(-30.0 * t) + 50.0
+    samples = np.sin(2 * np.pi * freq * t).astype(DTYPE)
+    samples *= adsr_array(num_samples, attack=0.002, decay=0.1, sustain=0.0, release=0.05, sr=sr)
+    return samples
 
 
-def snare(sr=22050):
+def snare(sr=22050, rng=None):
     duration = 0.15
     num_samples = int(sr * duration)
-    tone = sine_wave(200, duration, sr)
-    noise = white_noise(duration, sr)
-    mixed = [tone[i] * 0.4 + noise[i] * 0.6 for i in range(num_samples)]
-    env = adsr_envelope(num_samples, attack=0.001, decay=0.08, sustain=0.0, release=0.06, sr=sr)
-    return apply_envelope(mixed, env)
+    mixed = sine_array(200, duration, sr)
+    mixed *= 0.4
+    mixed += white_noise_array(duration, sr, rng) * 0.6
+    mixed *= adsr_array(num_samples, attack=0.001, decay=0.08, sustain=0.0, release=0.06, sr=sr)
+    return mixed
 
 
-def hihat_closed(sr=22050):
+def hihat_closed(sr=22050, rng=None):
     duration = 0.05
     num_samples = int(sr * duration)
-    noise = white_noise(duration, sr)
-    filtered = low_pass_filter(noise, cutoff=8000, sr=sr)
-    env = adsr_envelope(num_samples, attack=0.001, decay=0.03, sustain=0.0, release=0.02, sr=sr)
-    return apply_envelope(filtered, env)
+    filtered = low_pass_array(white_noise_array(duration, sr, rng), cutoff=8000, sr=sr)
+    filtered *= adsr_array(num_samples, attack=0.001, decay=0.03, sustain=0.0, release=0.02, sr=sr)
+    return filtered
 
 
-def hihat_open(sr=22050):
+def hihat_open(sr=22050, rng=None):
     duration = 0.15
     num_samples = int(sr * duration)
-    noise = white_noise(duration, sr)
-    filtered = low_pass_filter(noise, cutoff=9000, sr=sr)
-    env = adsr_envelope(num_samples, attack=0.001, decay=0.08, sustain=0.1, release=0.06, sr=sr)
-    return apply_envelope(filtered, env)
+    filtered = low_pass_array(white_noise_array(duration, sr, rng), cutoff=9000, sr=sr)
+    filtered *= adsr_array(num_samples, attack=0.001, decay=0.08, sustain=0.1, release=0.06, sr=sr)
+    return filtered
 
 
-def clap(sr=22050):
+def clap(sr=22050, rng=None):
     duration = 0.12
     num_samples = int(sr * duration)
-    result = [0.0] * num_samples
+    result = np.zeros(num_samples, dtype=DTYPE)
     for burst in range(3):
         offset = int(burst * 0.01 * sr)
-        burst_len = int(0.02 * sr)
-        noise = white_noise(0.02, sr)
-        for i in range(min(burst_len, num_samples - offset)):
-            result[offset + i] += noise[i] * 0.5
-    env = adsr_envelope(num_samples, attack=0.001, decay=0.06, sustain=0.0, release=0.05, sr=sr)
-    return apply_envelope(result, env)
+        noise = white_noise_array(0.02, sr, rng)
+        n = min(len(noise), num_samples - offset)
+        result[offset:offset + n] += noise[:n] * 0.5
+    result *= adsr_array(num_samples, attack=0.001, decay=0.06, sustain=0.0, release=0.05, sr=sr)
+    return result
 
 
 DRUM_SOUNDS = {
@@ -69,38 +66,48 @@ DRUM_SOUNDS = {
 }
 
 
-def sequence_drums(patterns, bpm, duration, sr=22050, swing=0.0):
-    num_samples = int(sr * duration)
-    output = [0.0] * num_samples
-    beat_duration = 60.0 / bpm
-    step_duration = beat_duration / 4  # 16th notes
 
-    sound_cache = {}
+@functools.lru_cache(maxsize=64)
+def one_shot(instrument_key, sr=22050):
+    # Noise is seeded from the instrument and sample rate rather than the
+    # global ``random`` state, so a cached one-shot sounds the same in every
+    # render and drum layers don't shift the random stream of later layers.
+    rng = np.random.default_rng(zlib.crc32(f"{instrument_key}:{sr}".encode()))
+    sound = DRUM_SOUNDS[instrument_key](sr, rng=rng)
+    sound.flags.writeable = False
+    return sound
+
+
+def compile_onsets(pattern, bpm, duration, sr=22050, swing=0.0):
+    """
+    Sample offsets of every hit in ``pattern`` (16th-note steps, "x" = hit)
+    within ``duration`` seconds. Odd steps are lengthened by the swing amount.
+    """
+    step_duration = 60.0 / bpm / 4
+    num_steps = int(duration / step_duration) + 2
+    increments = np.full(num_steps, step_duration, dtype=np.float64)
+    increments[1::2] += swing * step_duration * 0.5
+    # Sequential cumsum, so onsets land on the same samples as stepping
+    # a float clock through the pattern.
+    times = np.concatenate(([0.0], np.cumsum(increments)[:-1]))
+    hits = np.frombuffer(pattern.encode(), dtype=np.uint8) == ord("x")
+    times = times[np.resize(hits, num_steps) & (times < duration)]
+    return (times * sr).astype(np.int64)
+
+
+def sequence_drums(patterns, bpm, duration, sr=22050, swing=0.0, out=None):
+    num_samples = int(sr * duration)
+    if out is None:
+        out = np.zeros(num_samples, dtype=DTYPE)
+    num_samples = min(num_samples, len(out))
 
     for instrument_key, pattern in patterns.items():
-        if instrument_key not in DRUM_SOUNDS:
+        if instrument_key not in DRUM_SOUNDS or not pattern:
             continue
-        if instrument_key not in sound_cache:
-            sound_cache[instrument_key] = DRUM_SOUNDS[instrument_key](sr)
-        sound = sound_cache[instrument_key]
-
-        pattern_len = len(pattern)
-        step = 0
-        current_time = 0.0
-
-        while current_time < duration:
-            pattern_idx = step % pattern_len
-            char = pattern[pattern_idx]
-
-            if char == "x":
-                sample_offset = int(current_time * sr)
-                for j in range(len(sound)):
-                    idx = sample_offset + j
-                    if idx < num_samples:
-                        output[idx] += sound[j]
-
-            swing_offset = swing * step_duration * 0.5 if step % 2 == 1 else 0.0
-            current_time += step_duration + swing_offset
-            step += 1
-
-    return output
+        sound = one_shot(instrument_key, sr)
+        for offset in compile_onsets(pattern, bpm, duration, sr, swing):
+            n = min(len(sound), num_samples - offset)
+            if n > 0:
+                out[offset:offset + n] += sound[:n]
+
+    return out
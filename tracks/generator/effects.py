@@ -1,36 +1,128 @@
-import math
+import numpy as np
 
+from . import iir, reverb
+from .oscillators import DTYPE
+
+
+# ─── In-place array effects ────────────────────────────
+# Each function processes ``buf`` (a float32 ndarray) in place and returns it.
+
+def low_pass_array(buf, cutoff=1000.0, sr=22050):
+    return iir.one_pole_lowpass(cutoff, sr).process(buf, out=buf)
+
+
+def high_pass_array(buf, cutoff=200.0, sr=22050, q=0.7071):
+    return iir.biquad_highpass(cutoff, sr, q).process(buf, out=buf)
+
+
+def band_pass_array(buf, center=1000.0, sr=22050, q=1.0):
+    return iir.biquad_bandpass(center, sr, q).process(buf, out=buf)
+
+
+def resonant_low_pass_array(buf, cutoff=1000.0, sr=22050, resonance=0.5):
+    return iir.resonant_lowpass(cutoff, sr, resonance).process(buf, out=buf)
+
+
+def reverb_array(buf, sr=22050, decay=0.3, mix=0.25):
+    wet = reverb.convolve(buf, reverb.tap_spectra(sr, decay))
+    peak = np.abs(wet).max() if len(wet) else 1.0
+    if peak > 1.0:
+        wet /= peak
+    buf *= 1.0 - mix
+    buf += wet * mix
+    return buf
+
+
+def hall_reverb_array(buf, sr=22050, mix=0.3, length=1.5, decay=0.3):
+    wet = reverb.convolve(buf, reverb.diffuse_spectra(sr, decay, length))
+    peak = np.abs(wet).max() if len(wet) else 1.0
+    if peak > 1.0:
+        wet /= peak
+    buf *= 1.0 - mix
+    buf += wet * mix
+    return buf
+
+
+def distortion_array(buf, gain=2.0):
+    buf *= gain
+    return np.tanh(buf, out=buf)
+
+
+def bitcrush_array(buf, bits=8):
+    levels = 2 ** bits
+    buf *= levels
+    np.round(buf, out=buf)
+    buf /= levels
+    return buf
+
+
+# ─── Streaming effects ─────────────────────────────────
+
+class EffectChain:
+    """
+    A genre effects chain that keeps filter and reverb state between
+    ``process`` calls, so a track rendered chunk by chunk has no seams.
+
+    Takes the same ``(name, *params)`` steps as the one-shot array
+    effects. Reverb wet signal is not peak-normalized here, since the
+    peak of the whole track is not known while streaming.
+    """
+
+    def __init__(self, chain, sr=22050):
+        self._steps = [step for step in (_streaming_step(name, params, sr) for name, *params in chain) if step]
+
+    def process(self, buf):
+        """Process one chunk in place."""
+        for step in self._steps:
+            step(buf)
+        return buf
+
+
+def _filter_step(filt):
+    return lambda buf: filt.process(buf, out=buf)
+
+
+def _reverb_step(rev):
+    def step(buf):
+        buf[:] = rev.process(buf)
+    return step
+
+
+def _streaming_step(name, params, sr):
+    if name == "low_pass":
+        return _filter_step(iir.one_pole_lowpass(params[0], sr))
+    if name == "high_pass":
+        return _filter_step(iir.biquad_highpass(params[0], sr, *params[1:]))
+    if name == "band_pass":
+        return _filter_step(iir.biquad_bandpass(params[0], sr, *params[1:]))
+    if name == "resonant_low_pass":
+        return _filter_step(iir.resonant_lowpass(params[0], sr, *params[1:]))
+    if name == "reverb":
+        return _reverb_step(reverb.ConvolutionReverb(reverb.tap_spectra(sr), mix=params[0]))
+    if name == "hall":
+        length = params[1] if len(params) > 1 else 1.5
+        decay = params[2] if len(params) > 2 else 0.3
+        return _reverb_step(reverb.ConvolutionReverb(reverb.diffuse_spectra(sr, decay, length), mix=params[0]))
+    if name == "distortion":
+        return lambda buf: distortion_array(buf, gain=params[0])
+    if name == "bitcrush":
+        return lambda buf: bitcrush_array(buf, bits=params[0])
+    return None
+
+
+# ─── List API (compatibility layer) ────────────────────
 
 def low_pass_filter(samples, cutoff=1000.0, sr=22050):
-    rc = 1.0 / (2.0 * math.pi * cutoff)
-    dt = 1.0 / sr
-    alpha = dt / (rc + dt)
-    result = [0.0] * len(samples)
-    result[0] = alpha * samples[0]
-    for i in range(1, len(samples)):
-        result[i] = result[i - 1] + alpha * (samples[i] - result[i - 1])
-    return result
+    return low_pass_array(np.array(samples, dtype=DTYPE), cutoff, sr).tolist()
 
 
 def simple_reverb(samples, sr=22050, decay=0.3, mix=0.25):
-    delay_ms = [23, 37, 53, 71]
-    delays = [int(d * sr / 1000) for d in delay_ms]
-    result = list(samples)
-    n = len(samples)
-    for delay in delays:
-        tap_decay = decay * (delays[0] / delay) ** 0.5
-        for i in range(delay, n):
-            result[i] += samples[i - delay] * tap_decay
-    peak = max(abs(s) for s in result) if result else 1.0
-    if peak > 1.0:
-        result = [s / peak for s in result]
-    return [samples[i] * (1.0 - mix) + result[i] * mix for i in range(n)]
+    return reverb_array(np.array(samples, dtype=DTYPE), sr, decay, mix).tolist()
 
 
 def distortion(samples, gain=2.0):
-    return [math.tanh(gain * s) for s in samples]
+    return distortion_array(np.array(samples, dtype=DTYPE), gain).tolist()
 
 
 def bitcrush(samples, bits=8):
-    levels = 2 ** bits
-    return [round(s * levels) / levels for s in samples]
+    return bitcrush_array(np.array(samples, dtype=DTYPE), bits).tolist()
@@ -0,0 +1,146 @@
+import struct
+
+import numpy as np
+
+# name -> (WAVE format tag, bytes per sample)
+FORMATS = {
+    "pcm16": (1, 2),
+    "pcm24": (1, 3),
+    "float32": (3, 4),
+}
+HEADER_SIZE = 44
+CHUNK_FRAMES = 65536
+UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+def _format(fmt):
+    try:
+        return FORMATS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown WAV format: {fmt!r} (expected one of {', '.join(FORMATS)})")
+
+
+def wav_header(num_frames, sr=22050, fmt="pcm16", channels=1):
+    """
+    Build a 44-byte RIFF/WAVE header. Pass ``num_frames=None`` when the
+    length is not known up front (streaming); the size fields are then set
+    to 0xFFFFFFFF, which players treat as "read until EOF".
+    """
+    format_tag, width = _format(fmt)
+    block_align = channels * width
+    if num_frames is None:
+        data_size = riff_size = UNKNOWN_SIZE
+    else:
+        data_size = num_frames * block_align
+        riff_size = min(36 + data_size, UNKNOWN_SIZE)
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, format_tag, channels, sr, sr * block_align, block_align, width * 8,
+        b"data", min(data_size, UNKNOWN_SIZE),
+    )
+
+
+def encode_into(samples, out, offset=0, fmt="pcm16"):
+    """
+    Clip and quantize ``samples`` (floats in [-1, 1]) straight into the
+    writable buffer ``out`` at byte ``offset``. Works in CHUNK_FRAMES slices
+    so the temporary arrays stay small. Returns the number of bytes written.
+
+    Samples are scaled in float64 from their own dtype (no float32 round
+    trip), so 16-bit output matches the old per-sample ``struct.pack`` path.
+    """
+    _, width = _format(fmt)
+    samples = np.asarray(samples)
+    view = memoryview(out).cast("B")
+    for start in range(0, len(samples), CHUNK_FRAMES):
+        chunk = samples[start:start + CHUNK_FRAMES]
+        pos = offset + start * width
+        dst = view[pos:pos + len(chunk) * width]
+        if fmt == "pcm16":
+            # int() truncation toward zero, as the original struct.pack path did
+            scaled = np.clip(np.multiply(chunk, 32767.0, dtype=np.float64), -32767.0, 32767.0)
+            np.copyto(np.frombuffer(dst, dtype="<i2"), scaled, casting="unsafe")
+        elif fmt == "pcm24":
+            scaled = np.clip(np.multiply(chunk, 8388607.0, dtype=np.float64), -8388607.0, 8388607.0)
+            as_bytes = scaled.astype("<i4").view(np.uint8).reshape(-1, 4)
+            np.frombuffer(dst, dtype=np.uint8).reshape(-1, 3)[:] = as_bytes[:, :3]
+        else:
+            np.copyto(np.frombuffer(dst, dtype="<f4"), chunk)
+    return len(samples) * width
+
+
+def encode(samples, fmt="pcm16"):
+    _, width = _format(fmt)
+    out = bytearray(len(samples) * width)
+    encode_into(samples, out, 0, fmt)
+    return out
+
+
+def encode_wav(samples, sr=22050, fmt="pcm16"):
+    """Encode a whole mono signal as a WAV file in one preallocated bytearray."""
+    _, width = _format(fmt)
+    out = bytearray(HEADER_SIZE + len(samples) * width)
+    out[:HEADER_SIZE] = wav_header(len(samples), sr, fmt)
+    encode_into(samples, out, HEADER_SIZE, fmt)
+    return out
+
+
+def write_wav(fileobj, samples, sr=22050, fmt="pcm16"):
+    with WavStreamWriter(fileobj, sr, fmt, num_frames=len(samples)) as writer:
+        for start in range(0, len(samples), CHUNK_FRAMES):
+            writer.write(samples[start:start + CHUNK_FRAMES])
+
+
+class WavStreamWriter:
+    """
+    Write a mono WAV file chunk by chunk: the RIFF header goes out first,
+    then each ``write()`` appends encoded samples. When ``num_frames`` is
+    not given, the header uses placeholder sizes which ``close()`` patches
+    if the file is seekable.
+    """
+
+    def __init__(self, fileobj, sr=22050, fmt="pcm16", num_frames=None):
+        self.fileobj = fileobj
+        self.sr = sr
+        self.fmt = fmt
+        self.num_frames = num_frames
+        self.frames_written = 0
+        self._buf = bytearray(CHUNK_FRAMES * _format(fmt)[1])
+        fileobj.write(wav_header(num_frames, sr, fmt))
+
+    def write(self, samples):
+        width = _format(self.fmt)[1]
+        for start in range(0, len(samples), CHUNK_FRAMES):
+            chunk = samples[start:start + CHUNK_FRAMES]
+            size = encode_into(chunk, self._buf, 0, self.fmt)
+            self.fileobj.write(memoryview(self._buf)[:size])
+        self.frames_written += len(samples)
+        return len(samples) * width
+
+    def close(self):
+        if self.num_frames is None and _seekable(self.fileobj):
+            end = self.fileobj.tell()
+            self.fileobj.seek(0)
+            self.fileobj.write(wav_header(self.frames_written, self.sr, self.fmt))
+            self.fileobj.seek(end)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _seekable(fileobj):
+    try:
+        return fileobj.seekable()
+    except AttributeError:
+        return False
+
+
+def wav_chunks(chunks, sr=22050, fmt="pcm16", num_frames=None):
+    """Yield a WAV header followed by the encoded bytes of each sample chunk."""
+    yield wav_header(num_frames, sr, fmt)
+    for chunk in chunks:
+        yield bytes(encode(chunk, fmt))
@@ -176,11 +176,17 @@ GENRE_ALIASES = {
 }
 
 
-def get_genre_template(genre_name):
+def resolve_genre_key(genre_name):
+    # Canonical template key for a genre name or alias ("Lo-Fi" -> "lofi",
+    # "trap" -> "hiphop"); unknown genres fall back to "electronic".
     key = genre_name.lower().replace("-", "").replace(" ", "")
     if key in GENRE_TEMPLATES:
-        return GENRE_TEMPLATES[key]
+        return key
     for alias_key, target in GENRE_ALIASES.items():
         if alias_key.replace("-", "").replace(" ", "") == key:
-            return GENRE_TEMPLATES[target]
-    return GENRE_TEMPLATES["electronic"]
+            return target
+    return "electronic"
+
+
+def get_genre_template(genre_name):
+    return GENRE_TEMPLATES[resolve_genre_key(genre_name)]
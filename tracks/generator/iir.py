@@ -0,0 +1,166 @@
+import functools
+import math
+
+import numpy as np
+
+from .oscillators import DTYPE
+
+try:
+    from scipy.signal import lfilter as _scipy_lfilter
+except ImportError:  # scipy is optional, the NumPy block solver below is used instead
+    _scipy_lfilter = None
+
+BLOCK_SIZE = 256
+
+
+# ─── Block solver ──────────────────────────────────────
+# Without scipy, the recursion is evaluated in blocks of BLOCK_SIZE samples
+# using the state-space form of the transposed direct form II filter (the
+# same state layout as scipy.signal.lfilter's ``zi``). Inside a block the
+# output is a matrix product with the impulse response; only the filter
+# state is carried from block to block in Python.
+
+def _normalize(b, a):
+    b = np.atleast_1d(np.asarray(b, dtype=np.float64))
+    a = np.atleast_1d(np.asarray(a, dtype=np.float64))
+    order = max(len(a), len(b)) - 1
+    b = np.pad(b, (0, order + 1 - len(b))) / a[0]
+    a = np.pad(a, (0, order + 1 - len(a))) / a[0]
+    return b, a
+
+
+@functools.lru_cache(maxsize=64)
+def _block_matrices(b, a, length):
+    b = np.array(b)
+    a = np.array(a)
+    order = len(a) - 1
+
+    # State update s' = A s + B x, output y = s[0] + b[0] x
+    A = np.zeros((order, order))
+    A[:, 0] = -a[1:]
+    A[:-1, 1:] += np.eye(order - 1)
+    B = b[1:] - a[1:] * b[0]
+
+    observe = np.zeros((length, order))  # row k: e0 A^k
+    row = np.eye(order)[0]
+    for k in range(length):
+        observe[k] = row
+        row = row @ A
+
+    impulse = np.empty(length)  # h[0] = b0, h[k] = e0 A^(k-1) B
+    impulse[0] = b[0]
+    impulse[1:] = observe[:-1] @ B
+    idx = np.arange(length)
+    lag = idx[:, None] - idx[None, :]
+    transfer = np.where(lag >= 0, impulse[np.clip(lag, 0, None)], 0.0)
+
+    reach = np.empty((order, length))  # column k: A^(length-1-k) B
+    col = B.copy()
+    for k in range(length - 1, -1, -1):
+        reach[:, k] = col
+        col = A @ col
+    carry = np.linalg.matrix_power(A, length)
+
+    return transfer.T, observe.T, reach.T, carry.T
+
+
+def _solve_blocks(b, a, x, state, length):
+    transfer, observe, reach, carry = _block_matrices(tuple(b), tuple(a), length)
+    blocks = x.reshape(-1, length)
+    zero_state = blocks @ transfer
+    from_input = blocks @ reach
+
+    starts = np.empty((len(blocks), len(state)))
+    for j in range(len(blocks)):
+        starts[j] = state
+        state = state @ carry + from_input[j]
+
+    return (zero_state + starts @ observe).ravel(), state
+
+
+def lfilter(b, a, x, zi=None):
+    """
+    Filter ``x`` with the IIR filter ``b``/``a``.
+
+    Returns ``(y, zf)`` where ``zf`` is the final filter state, so the next
+    block can continue from it. ``zi`` uses scipy.signal.lfilter's layout.
+    """
+    b, a = _normalize(b, a)
+    order = len(a) - 1
+    x = np.asarray(x, dtype=np.float64)
+    state = np.zeros(order) if zi is None else np.asarray(zi, dtype=np.float64)
+
+    if order == 0:
+        return x * b[0], state
+    if _scipy_lfilter is not None:
+        return _scipy_lfilter(b, a, x, zi=state)
+
+    split = len(x) - len(x) % BLOCK_SIZE
+    head, state = _solve_blocks(b, a, x[:split], state, BLOCK_SIZE)
+    if split == len(x):
+        return head, state
+    tail, state = _solve_blocks(b, a, x[split:], state, len(x) - split)
+    return np.concatenate([head, tail]), state
+
+
+# ─── Stateful filters ──────────────────────────────────
+
+class IIRFilter:
+    """An IIR filter that keeps its state between ``process`` calls."""
+
+    def __init__(self, b, a):
+        self.b, self.a = _normalize(b, a)
+        self.reset()
+
+    def reset(self):
+        self.zi = np.zeros(len(self.a) - 1)
+
+    def process(self, block, out=None):
+        """Filter one block; pass ``out=block`` to filter in place."""
+        y, self.zi = lfilter(self.b, self.a, block, self.zi)
+        if out is None:
+            return y.astype(DTYPE)
+        out[:] = y
+        return out
+
+
+def _clamp_cutoff(cutoff, sr):
+    # Biquad coefficients are only valid between 0 and Nyquist.
+    return min(max(float(cutoff), 1.0), 0.49 * sr)
+
+
+def one_pole_lowpass(cutoff, sr=22050):
+    # Not clamped: the one-pole filter is stable for any positive cutoff, and
+    # cutoffs above Nyquist must filter exactly as the original loop did.
+    rc = 1.0 / (2.0 * math.pi * cutoff)
+    dt = 1.0 / sr
+    alpha = dt / (rc + dt)
+    return IIRFilter([alpha], [1.0, alpha - 1.0])
+
+
+def _biquad_terms(freq, sr, q):
+    w0 = 2.0 * math.pi * _clamp_cutoff(freq, sr) / sr
+    return math.cos(w0), math.sin(w0) / (2.0 * q)
+
+
+def biquad_lowpass(cutoff, sr=22050, q=0.7071):
+    cos_w0, alpha = _biquad_terms(cutoff, sr, q)
+    b = [(1.0 - cos_w0) / 2.0, 1.0 - cos_w0, (1.0 - cos_w0) / 2.0]
+    return IIRFilter(b, [1.0 + alpha, -2.0 * cos_w0, 1.0 - alpha])
+
+
+def biquad_highpass(cutoff, sr=22050, q=0.7071):
+    cos_w0, alpha = _biquad_terms(cutoff, sr, q)
+    b = [(1.0 + cos_w0) / 2.0, -(1.0 + cos_w0), (1.0 + cos_w0) / 2.0]
+    return IIRFilter(b, [1.0 + alpha, -2.0 * cos_w0, 1.0 - alpha])
+
+
+def biquad_bandpass(center, sr=22050, q=1.0):
+    cos_w0, alpha = _biquad_terms(center, sr, q)
+    return IIRFilter([alpha, 0.0, -alpha], [1.0 + alpha, -2.0 * cos_w0, 1.0 - alpha])
+
+
+def resonant_lowpass(cutoff, sr=22050, resonance=0.5):
+    # resonance in [0, 1): 0 is a gentle Q of 0.5, 0.9 peaks around Q=5.
+    resonance = min(max(resonance, 0.0), 0.99)
+    return biquad_lowpass(cutoff, sr, q=0.5 / (1.0 - resonance))
@@ -1,7 +1,28 @@
-import io
-import struct
-import wave
+import numpy as np
 
+from . import encoder
+from .oscillators import DTYPE
+
+
+# ─── In-place array mixing ─────────────────────────────
+
+def mix_into(out, layer, volume=1.0):
+    # Scales ``layer`` in place, then accumulates it into ``out``.
+    n = min(len(out), len(layer))
+    if volume != 1.0:
+        layer *= volume
+    out[:n] += layer[:n]
+    return out
+
+
+def normalize_array(buf, target_peak=0.85):
+    peak = np.abs(buf).max() if len(buf) else 0.0
+    if peak > 0:
+        buf *= target_peak / peak
+    return buf
+
+
+# ─── List API (compatibility layer) ────────────────────
 
 def mix_layers(layers, volumes=None):
     if not layers:
@@ -9,34 +30,17 @@ def mix_layers(layers, volumes=None):
     max_len = max(len(layer) for layer in layers)
     if volumes is None:
         volumes = [1.0] * len(layers)
-    mixed = [0.0] * max_len
+    mixed = np.zeros(max_len, dtype=DTYPE)
     for layer, vol in zip(layers, volumes):
-        for i in range(len(layer)):
-            mixed[i] += layer[i] * vol
-    return mixed
+        mix_into(mixed, np.array(layer, dtype=DTYPE), vol)
+    return mixed.tolist()
 
 
 def normalize(samples, target_peak=0.85):
-    if not samples:
-        return samples
-    peak = max(abs(s) for s in samples)
-    if peak == 0:
+    if len(samples) == 0:
         return samples
-    scale = target_peak / peak
-    return [s * scale for s in samples]
-
-
-def samples_to_wav_bytes(samples, sr=22050):
-    buf = io.BytesIO()
-    with wave.open(buf, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sr)
-        max_val = 32767
-        frame_data = b"".join(
-            struct.pack("<h", max(-max_val, min(max_val, int(s * max_val))))
-            for s in samples
-        )
-        wf.writeframes(frame_data)
-    buf.seek(0)
-    return buf.read()
+    return normalize_array(np.array(samples, dtype=DTYPE), target_peak).tolist()
+
+
+def samples_to_wav_bytes(samples, sr=22050, fmt="pcm16"):
+    return bytes(encoder.encode_wav(samples, sr, fmt))
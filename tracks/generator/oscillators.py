@@ -1,72 +1,100 @@
-import math
 import random
 
+import numpy as np
 
-def sine_wave(freq, duration, sr=22050, phase=0.0):
-    num_samples = int(sr * duration)
-    return [
-        math.sin(2 * math.pi * freq * i / sr + phase)
-        for i in range(num_samples)
-    ]
+DTYPE = np.float32
 
 
-def saw_wave(freq, duration, sr=22050):
-    num_samples = int(sr * duration)
-    samples = []
-    period = sr / freq if freq > 0 else sr
-    for i in range(num_samples):
-        t = (i % period) / period
-        samples.append(2.0 * t - 1.0)
-    return samples
+def _num_samples(duration, sr):
+    return int(sr * duration)
 
 
-def square_wave(freq, duration, sr=22050):
-    num_samples = int(sr * duration)
-    samples = []
+def _cycle_position(freq, num_samples, sr):
+    # Fraction of the current period for every sample index, matching the
+    # ``(i % period) / period`` arithmetic of the original per-sample loops.
     period = sr / freq if freq > 0 else sr
-    half = period / 2
-    for i in range(num_samples):
-        samples.append(1.0 if (i % period) < half else -1.0)
-    return samples
+    return np.arange(num_samples, dtype=np.float64) % period / period
 
 
-def triangle_wave(freq, duration, sr=22050):
-    num_samples = int(sr * duration)
-    samples = []
-    period = sr / freq if freq > 0 else sr
-    for i in range(num_samples):
-        t = (i % period) / period
-        samples.append(4.0 * abs(t - 0.5) - 1.0)
-    return samples
+def _rng():
+    # Draw the noise seed from the stdlib ``random`` module so that
+    # ``random.seed()`` keeps controlling every random source in the generator.
+    return np.random.default_rng(random.getrandbits(64))
 
 
-def pulse_wave(freq, duration, sr=22050, duty=0.25):
-    num_samples = int(sr * duration)
-    samples = []
-    period = sr / freq if freq > 0 else sr
-    threshold = period * duty
-    for i in range(num_samples):
-        samples.append(1.0 if (i % period) < threshold else -1.0)
-    return samples
+# ─── Array oscillators (float32 ndarrays) ──────────────
 
+def sine_array(freq, duration, sr=22050, phase=0.0):
+    t = np.arange(_num_samples(duration, sr), dtype=np.float64)
+    return np.sin(2 * np.pi * freq * t / sr + phase).astype(DTYPE)
 
-def white_noise(duration, sr=22050):
-    num_samples = int(sr * duration)
-    return [random.uniform(-1.0, 1.0) for _ in range(num_samples)]
 
+def saw_array(freq, duration, sr=22050):
+    pos = _cycle_position(freq, _num_samples(duration, sr), sr)
+    return (2.0 * pos - 1.0).astype(DTYPE)
 
-def rich_tone(freq, duration, sr=22050, harmonics=None):
+
+def square_array(freq, duration, sr=22050):
+    return pulse_array(freq, duration, sr, duty=0.5)
+
+
+def triangle_array(freq, duration, sr=22050):
+    pos = _cycle_position(freq, _num_samples(duration, sr), sr)
+    return (4.0 * np.abs(pos - 0.5) - 1.0).astype(DTYPE)
+
+
+def pulse_array(freq, duration, sr=22050, duty=0.25):
+    pos = _cycle_position(freq, _num_samples(duration, sr), sr)
+    return np.where(pos < duty, 1.0, -1.0).astype(DTYPE)
+
+
+def white_noise_array(duration, sr=22050, rng=None):
+    rng = rng if rng is not None else _rng()
+    return rng.uniform(-1.0, 1.0, _num_samples(duration, sr)).astype(DTYPE)
+
+
+def rich_tone_array(freq, duration, sr=22050, harmonics=None):
     if harmonics is None:
         harmonics = [(1, 1.0), (2, 0.5), (3, 0.25), (4, 0.125)]
-    num_samples = int(sr * duration)
-    samples = [0.0] * num_samples
+    num_samples = _num_samples(duration, sr)
+    t = np.arange(num_samples, dtype=np.float64) * (2 * np.pi / sr)
+    samples = np.zeros(num_samples, dtype=np.float64)
     for harmonic_num, amplitude in harmonics:
         h_freq = freq * harmonic_num
         if h_freq >= sr / 2:
             continue
-        for i in range(num_samples):
-            samples[i] += amplitude * math.sin(2 * math.pi * h_freq * i / sr)
-    peak = max(abs(s) for s in samples) if samples else 1.0
+        samples += amplitude * np.sin(h_freq * t)
+    peak = np.abs(samples).max() if num_samples else 1.0
     if peak > 0:
-        samples = [s / peak for s in samples]
-    return samples
+        samples /= peak
+    return samples.astype(DTYPE)
+
+
+# ─── List API (compatibility layer) ────────────────────
+
+def sine_wave(freq, duration, sr=22050, phase=0.0):
+    return sine_array(freq, duration, sr, phase).tolist()
+
+
+def saw_wave(freq, duration, sr=22050):
+    return saw_array(freq, duration, sr).tolist()
+
+
+def square_wave(freq, duration, sr=22050):
+    return square_array(freq, duration, sr).tolist()
+
+
+def triangle_wave(freq, duration, sr=22050):
+    return triangle_array(freq, duration, sr).tolist()
+
+
+def pulse_wave(freq, duration, sr=22050, duty=0.25):
+    return pulse_array(freq, duration, sr, duty).tolist()
+
+
+def white_noise(duration, sr=22050):
+    return white_noise_array(duration, sr).tolist()
+
+
+def rich_tone(freq, duration, sr=22050, harmonics=None):
+    return rich_tone_array(freq, duration, sr, harmonics).tolist()
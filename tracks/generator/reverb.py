@@ -0,0 +1,161 @@
+import functools
+import wave
+
+import numpy as np
+
+from .oscillators import DTYPE
+
+TAP_DELAYS_MS = [23, 37, 53, 71]
+BLOCK_SIZE = 1024
+
+
+# ─── Impulse responses ─────────────────────────────────
+
+def tap_impulse_response(sr=22050, decay=0.3):
+    # The dry signal plus the four decaying echoes of the original
+    # simple_reverb, so convolving with it reproduces that effect exactly.
+    delays = [int(d * sr / 1000) for d in TAP_DELAYS_MS]
+    ir = np.zeros(delays[-1] + 1, dtype=DTYPE)
+    ir[0] = 1.0
+    for delay in delays:
+        ir[delay] += decay * (delays[0] / delay) ** 0.5
+    return ir
+
+
+def diffuse_impulse_response(sr=22050, decay=0.3, length=1.5, seed=0):
+    # Early taps followed by an exponentially decaying noise tail that falls
+    # 60 dB over ``length`` seconds. Seeded so renders stay reproducible.
+    num_samples = int(length * sr)
+    rng = np.random.default_rng(seed)
+    t = np.arange(num_samples) / sr
+    tail = rng.uniform(-1.0, 1.0, num_samples) * np.exp(-6.9 * t / length)
+    ir = np.zeros(num_samples, dtype=np.float64)
+    taps = tap_impulse_response(sr, decay)
+    ir[:len(taps)] += taps
+    ir[1:] += decay * 0.1 * tail[1:]
+    return ir.astype(DTYPE)
+
+
+def load_impulse_response(path):
+    with wave.open(path, "rb") as wf:
+        n_channels = wf.getnchannels()
+        sample_width = wf.getsampwidth()
+        frames = wf.readframes(wf.getnframes())
+    dtype = {1: np.uint8, 2: "<i2", 4: "<i4"}.get(sample_width)
+    if dtype is None:
+        raise ValueError(f"Unsupported impulse response sample width: {sample_width}")
+    data = np.frombuffer(frames, dtype=dtype).astype(np.float64)
+    if sample_width == 1:
+        data -= 128
+    data = data.reshape(-1, n_channels).mean(axis=1)
+    peak = np.abs(data).max() if len(data) else 0.0
+    return (data / peak if peak > 0 else data).astype(DTYPE)
+
+
+# ─── Partition spectra (cached) ────────────────────────
+
+def partition_spectra(ir, block_size=BLOCK_SIZE):
+    num_parts = max(1, -(-len(ir) // block_size))
+    parts = np.zeros((num_parts, block_size), dtype=np.float64)
+    parts.flat[:len(ir)] = ir
+    spectra = np.fft.rfft(parts, n=2 * block_size, axis=1)
+    spectra.flags.writeable = False
+    return spectra
+
+
+@functools.lru_cache(maxsize=32)
+def tap_spectra(sr=22050, decay=0.3, block_size=BLOCK_SIZE):
+    return partition_spectra(tap_impulse_response(sr, decay), block_size)
+
+
+@functools.lru_cache(maxsize=32)
+def diffuse_spectra(sr=22050, decay=0.3, length=1.5, block_size=BLOCK_SIZE):
+    return partition_spectra(diffuse_impulse_response(sr, decay, length), block_size)
+
+
+@functools.lru_cache(maxsize=8)
+def file_spectra(path, block_size=BLOCK_SIZE):
+    return partition_spectra(load_impulse_response(path), block_size)
+
+
+# ─── Convolution ───────────────────────────────────────
+
+def convolve(samples, spectra):
+    """
+    Convolve a whole signal with partitioned IR ``spectra``, returning the
+    first ``len(samples)`` output samples.
+
+    All frames are transformed in one batch and the partitions are
+    accumulated in the frequency domain, so for block size B the cost is
+    O(n log B) plus one spectrum multiply per partition, instead of
+    O(n * len(ir)) for direct convolution.
+    """
+    num_parts, bins = spectra.shape
+    block = bins - 1
+    n = len(samples)
+    num_frames = -(-n // block)
+    frames = np.zeros((num_frames, block), dtype=np.float64)
+    frames.flat[:n] = samples
+    frame_spectra = np.fft.rfft(frames, n=2 * block, axis=1)
+
+    acc = np.zeros_like(frame_spectra)
+    for p in range(min(num_parts, num_frames)):
+        acc[p:] += frame_spectra[:num_frames - p] * spectra[p]
+    segments = np.fft.irfft(acc, n=2 * block, axis=1)
+
+    out = np.zeros((num_frames + 1) * block, dtype=np.float64)
+    out[:num_frames * block] += segments[:, :block].ravel()
+    out[block:] += segments[:, block:].ravel()
+    return out[:n]
+
+
+class ConvolutionReverb:
+    """
+    Uniformly partitioned FFT convolution that streams block by block.
+
+    ``process`` accepts chunks of any length and returns the same number of
+    samples with no added latency: a partially filled frame is convolved
+    right away and recomputed once more input arrives, which leaves the
+    samples already emitted unchanged. Output is ``dry * (1 - mix) + wet * mix``.
+    """
+
+    def __init__(self, spectra, mix=0.25):
+        self.spectra = spectra
+        self.mix = mix
+        self.num_parts, bins = spectra.shape
+        self.block = bins - 1
+        self.reset()
+
+    @classmethod
+    def taps(cls, sr=22050, decay=0.3, mix=0.25, block_size=BLOCK_SIZE):
+        return cls(tap_spectra(sr, decay, block_size), mix)
+
+    def reset(self):
+        self._history = np.zeros_like(self.spectra)  # X_f, X_(f-1), ...
+        self._frame = np.zeros(2 * self.block, dtype=np.float64)
+        self._frame_pos = 0
+        self._overlap = np.zeros(self.block, dtype=np.float64)
+
+    def process(self, chunk):
+        out = np.empty(len(chunk), dtype=DTYPE)
+        pos = 0
+        while pos < len(chunk):
+            n = min(self.block - self._frame_pos, len(chunk) - pos)
+            start = self._frame_pos
+            self._frame[start:start + n] = chunk[pos:pos + n]
+            self._history[0] = np.fft.rfft(self._frame)
+            segment = np.fft.irfft(
+                np.einsum("pk,pk->k", self._history, self.spectra), n=2 * self.block
+            )
+            wet = segment[start:start + n] + self._overlap[start:start + n]
+            out[pos:pos + n] = chunk[pos:pos + n] * (1.0 - self.mix) + wet * self.mix
+
+            pos += n
+            self._frame_pos += n
+            if self._frame_pos == self.block:
+                self._overlap = segment[self.block:]
+                self._history = np.roll(self._history, 1, axis=0)
+                self._history[0] = 0.0
+                self._frame[:] = 0.0
+                self._frame_pos = 0
+        return out
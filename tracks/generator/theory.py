@@ -1,4 +1,3 @@
-import math
 import random
 
 SCALES = {
@@ -90,13 +89,15 @@ GENRE_PROGRESSIONS = {
 
 
 def generate_melody(scale_notes, num_beats, beat_duration, sr=22050,
-                    rest_prob=0.2, chord_tones_midi=None):
+                    rest_prob=0.2, chord_tones_midi=None, rng=None):
+    # ``rng`` is a random.Random; the module-level generator by default.
+    rng = rng or random
     melody_notes = []
     mid = len(scale_notes) // 2
     current_idx = mid
 
     for beat in range(num_beats):
-        if random.random() < rest_prob:
+        if rng.random() < rest_prob:
             melody_notes.append((0, beat_duration))
             continue
 
@@ -110,7 +111,7 @@ def generate_melody(scale_notes, num_beats, beat_duration, sr=22050,
                         closest_idx = j
             current_idx = closest_idx
         else:
-            step = random.choice([-2, -1, -1, 0, 1, 1, 2])
+            step = rng.choice([-2, -1, -1, 0, 1, 1, 2])
             current_idx = max(0, min(len(scale_notes) - 1, current_idx + step))
 
         midi_note = scale_notes[current_idx]
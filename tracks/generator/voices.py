@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+from . import envelopes
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class VoiceCache:
+    """
+    Memoized, ready-enveloped note buffers.
+
+    Chords, bass and pads repeat the same few notes every bar, so each
+    distinct (oscillator, freq, duration, sr, envelope) is rendered
+    once and then only copy-added into the mix. Entries are read-only
+    float32 arrays; the least recently used ones are dropped once the
+    cache holds more than ``max_bytes``. Only deterministic oscillators
+    belong here (not noise).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._voices = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, osc_func, freq, duration, sr, envelope, divisor=1):
+        """
+        ``envelope`` is an (attack, decay, sustain, release) tuple; the
+        enveloped tone is divided by ``divisor`` (voices in a chord).
+        """
+        key = (osc_func, freq, duration, sr, envelope, divisor)
+        with self._lock:
+            tone = self._voices.get(key)
+            if tone is not None:
+                self._voices.move_to_end(key)
+                self.hits += 1
+                return tone
+            self.misses += 1
+
+        tone = render_voice(osc_func, freq, duration, sr, envelope, divisor)
+        tone.flags.writeable = False
+        with self._lock:
+            if tone.nbytes <= self.max_bytes and key not in self._voices:
+                self._voices[key] = tone
+                self._size += tone.nbytes
+                while self._size > self.max_bytes:
+                    _, old = self._voices.popitem(last=False)
+                    self._size -= old.nbytes
+        return tone
+
+    def clear(self):
+        with self._lock:
+            self._voices.clear()
+            self._size = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "voices": len(self._voices),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def render_voice(osc_func, freq, duration, sr, envelope, divisor=1):
+    attack, decay, sustain, release = envelope
+    tone = osc_func(freq, duration, sr)
+    tone *= envelopes.adsr_array(len(tone), attack=attack, decay=decay, sustain=sustain, release=release, sr=sr)
+    if divisor != 1:
+        tone /= divisor
+    return tone
+
+
+# Shared by every render in the process.
+VOICES = VoiceCache()
@@ -0,0 +1,176 @@
+"""
+HLS (HTTP Live Streaming) segmenting and playlists.
+
+Each track is encoded with ffmpeg to AAC at every HLS_QUALITIES bitrate and
+cut into ~HLS_SEGMENT_SECONDS MPEG-TS segments, stored as HLSVariant and
+HLSSegment rows. Players fetch the master playlist, pick a bitrate and
+then fetch only the segments they play: start-up needs one small segment,
+seeking is a segment lookup rather than a Range request into one large
+file, and bandwidth adaptation is switching between media playlists.
+
+Segment URLs carry the segment's content hash, so they are immutable and
+can be cached forever; re-segmenting produces new URLs and new playlists.
+"""
+import hashlib
+import math
+import os
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+
+from .models import HLSSegment, HLSVariant, Track, TrackRendition
+from .transcoding import BITRATES, TRANSCODE_TIMEOUT, TranscodeError, local_copy
+
+PLAYLIST_CONTENT_TYPE = "application/vnd.apple.mpegurl"
+SEGMENT_CONTENT_TYPE = "video/mp2t"
+CODECS = "mp4a.40.2"  # AAC-LC
+
+
+def _cut(source_path, bitrate, segment_seconds, tmp):
+    """Encode and segment with ffmpeg; return [(path, duration)] in order."""
+    playlist = os.path.join(tmp, "index.m3u8")
+    command = [
+        settings.FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+        "-i", source_path,
+        "-vn", "-map_metadata", "-1",
+        "-c:a", "aac", "-b:a", f"{bitrate}k",
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_type", "mpegts",
+        "-hls_segment_filename", os.path.join(tmp, "segment_%04d.ts"),
+        playlist,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, timeout=TRANSCODE_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise TranscodeError(f"ffmpeg failed to run: {e}") from e
+    if result.returncode != 0:
+        raise TranscodeError(result.stderr.decode(errors="replace").strip() or f"ffmpeg exited {result.returncode}")
+
+    segments = []
+    duration = None
+    with open(playlist) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#EXTINF:"):
+                duration = float(line[len("#EXTINF:"):].split(",")[0])
+            elif line and not line.startswith("#"):
+                segments.append((os.path.join(tmp, line), duration))
+    if not segments:
+        raise TranscodeError("ffmpeg produced no segments")
+    return segments
+
+
+def segment_track(track, qualities=None, force=False):
+    """
+    Cut the missing or stale HLS variants of ``track`` (all of them with
+    ``force``) and return the ones created. Raises TranscodeError if ffmpeg
+    fails. A replaced variant's rows are swapped in one transaction and its
+    old segment files deleted after commit.
+    """
+    if not track.audio_file:
+        return []
+    qualities = settings.HLS_QUALITIES if qualities is None else qualities
+    if not track.etag:
+        track.etag = track.compute_etag()
+        Track.objects.filter(pk=track.pk).update(etag=track.etag)
+
+    existing = {v.quality: v for v in track.hls_variants.all()}
+    todo = [
+        quality for quality in qualities
+        if force or quality not in existing or existing[quality].source_etag != track.etag
+    ]
+    if not todo:
+        return []
+
+    created = []
+    with local_copy(track.audio_file) as source_path:
+        for quality in todo:
+            bitrate = BITRATES[TrackRendition.Format.AAC][quality]
+            with tempfile.TemporaryDirectory() as tmp:
+                cut = _cut(source_path, bitrate, settings.HLS_SEGMENT_SECONDS, tmp)
+                created.append(_store_variant(track, quality, bitrate, cut, existing.get(quality)))
+    return created
+
+
+def _store_variant(track, quality, bitrate, cut, old=None):
+    sizes = [os.path.getsize(path) for path, _ in cut]
+    total_duration = sum(duration for _, duration in cut) or 1
+    with transaction.atomic():
+        if old is not None:
+            old_names = list(old.segments.values_list("audio_file", flat=True))
+            old.delete()
+            transaction.on_commit(lambda: _delete_files(old_names))
+        variant = HLSVariant.objects.create(
+            track=track,
+            quality=quality,
+            bitrate=bitrate,
+            target_duration=math.ceil(max(duration for _, duration in cut)),
+            peak_bandwidth=math.ceil(max(size * 8 / max(duration, 0.001) for size, (_, duration) in zip(sizes, cut))),
+            average_bandwidth=math.ceil(sum(sizes) * 8 / total_duration),
+            source_etag=track.etag,
+        )
+        for index, (path, duration) in enumerate(cut):
+            with open(path, "rb") as f:
+                data = f.read()
+            segment = HLSSegment(
+                variant=variant,
+                index=index,
+                duration=duration,
+                size=len(data),
+                etag=hashlib.sha256(data).hexdigest(),
+            )
+            segment.audio_file.save(
+                f"{track.etag[:12]}-{bitrate}k-{index:04d}.ts", ContentFile(data), save=True,
+            )
+    return variant
+
+
+def _delete_files(names):
+    storage = HLSSegment._meta.get_field("audio_file").storage
+    for name in names:
+        storage.delete(name)
+
+
+def current_variants(track):
+    """The track's HLS variants cut from its current audio, lowest bitrate first."""
+    if not track.etag:
+        return []
+    return list(track.hls_variants.filter(source_etag=track.etag).order_by("bitrate"))
+
+
+def master_playlist(variants):
+    """
+    Multivariant playlist. The AUDIO_DEFAULT_QUALITY variant is listed
+    first, since players start with the first entry.
+    """
+    variants = sorted(variants, key=lambda v: (v.quality != settings.AUDIO_DEFAULT_QUALITY, v.bitrate))
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for variant in variants:
+        lines.append(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={variant.peak_bandwidth},"
+            f"AVERAGE-BANDWIDTH={variant.average_bandwidth},CODECS=\"{CODECS}\""
+        )
+        lines.append(f"{variant.quality}.m3u8")
+    return "\n".join(lines) + "\n"
+
+
+def media_playlist(variant, segments):
+    """VOD media playlist; segment URIs are relative to the playlist URL."""
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        f"#EXT-X-TARGETDURATION:{variant.target_duration}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+        "#EXT-X-INDEPENDENT-SEGMENTS",
+    ]
+    for segment in segments:
+        lines.append(f"#EXTINF:{segment.duration:.3f},")
+        lines.append(f"{variant.quality}/{segment.name}.ts")
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,283 @@
+"""
+Database-backed render job queue.
+
+The API only enqueues `RenderJob` rows; `manage.py run_render_worker`
+processes claim them, render the audio and report progress back on the row.
+No external broker is needed: claiming is a conditional UPDATE, so several
+workers can poll the same table safely. A worker only writes to a job while
+the row still names it as the worker, so a job requeued from under a slow
+worker is not finished twice.
+"""
+import logging
+import os
+import random
+import socket
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models import Count, F, IntegerField, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .generator.batch import generate_track_files
+from .generator.cache import default_cache
+from .models import RenderJob, Track, Genre, Mood
+from .transcoding import transcode_on_ingest
+
+logger = logging.getLogger(__name__)
+
+SEED_DURATION = 8
+RETRY_BACKOFF = 30  # seconds, doubled on every attempt
+
+SAMPLE_TRACKS = [
+    {"title": "Midnight Drive", "genre": "Lo-Fi", "mood": "Chill", "tags": "lofi,chill,night,drive", "bpm": 85},
+    {"title": "Neon Pulse", "genre": "Electronic", "mood": "Energetic", "tags": "electronic,synth,upbeat", "bpm": 128},
+    {"title": "Autumn Leaves", "genre": "Acoustic", "mood": "Calm", "tags": "acoustic,guitar,peaceful", "bpm": 72},
+    {"title": "Urban Groove", "genre": "Hip Hop", "mood": "Energetic", "tags": "hiphop,beat,urban,groove", "bpm": 95},
+    {"title": "Starlight Serenade", "genre": "Ambient", "mood": "Dreamy", "tags": "ambient,space,dreamy", "bpm": 60},
+    {"title": "Electric Sunset", "genre": "Electronic", "mood": "Chill", "tags": "electronic,sunset,mellow", "bpm": 110},
+    {"title": "Morning Coffee", "genre": "Jazz", "mood": "Calm", "tags": "jazz,morning,smooth", "bpm": 80},
+    {"title": "Thunder Road", "genre": "Rock", "mood": "Energetic", "tags": "rock,guitar,powerful", "bpm": 140},
+    {"title": "Ocean Whisper", "genre": "Ambient", "mood": "Calm", "tags": "ambient,ocean,waves,relax", "bpm": 55},
+    {"title": "City Lights", "genre": "Lo-Fi", "mood": "Dreamy", "tags": "lofi,city,night,chill", "bpm": 78},
+    {"title": "Solar Flare", "genre": "Electronic", "mood": "Energetic", "tags": "electronic,intense,dance", "bpm": 135},
+    {"title": "Rainy Window", "genre": "Acoustic", "mood": "Melancholy", "tags": "acoustic,rain,sad,piano", "bpm": 65},
+    {"title": "Bass Drop", "genre": "Hip Hop", "mood": "Energetic", "tags": "hiphop,bass,heavy,beat", "bpm": 100},
+    {"title": "Velvet Moon", "genre": "Jazz", "mood": "Dreamy", "tags": "jazz,night,smooth,sax", "bpm": 70},
+    {"title": "Crystal Cave", "genre": "Ambient", "mood": "Calm", "tags": "ambient,crystal,ethereal", "bpm": 50},
+]
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLost(Exception):
+    """The job was requeued (its heartbeat went stale) and belongs to another worker now."""
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ─── Enqueue / cancel ──────────────────────────────────
+
+def enqueue_seed_job(count, duration=SEED_DURATION):
+    """Queue a job that renders `count` sample tracks (picked now, so retries resume)."""
+    items = [
+        dict(item, seed=random.getrandbits(32))
+        for item in random.sample(SAMPLE_TRACKS, min(count, len(SAMPLE_TRACKS)))
+    ]
+    return RenderJob.objects.create(
+        kind="seed",
+        params={"tracks": items, "duration": duration},
+        total=len(items),
+    )
+
+
+def cancel_job(job):
+    """Cancel a queued job right away, or ask the worker to stop a running one."""
+    if job.status == RenderJob.Status.QUEUED:
+        claimed = RenderJob.objects.filter(pk=job.pk, status=RenderJob.Status.QUEUED).update(
+            status=RenderJob.Status.CANCELLED, finished_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    if not job.is_finished:
+        RenderJob.objects.filter(pk=job.pk).update(cancel_requested=True)
+    job.refresh_from_db()
+    return job
+
+
+# ─── Claiming ──────────────────────────────────────────
+
+def requeue_stale_jobs():
+    """Put running jobs whose worker stopped heartbeating back in the queue."""
+    cutoff = timezone.now() - timedelta(seconds=settings.RENDER_JOB_TIMEOUT)
+    return RenderJob.objects.filter(
+        status=RenderJob.Status.RUNNING, heartbeat_at__lt=cutoff,
+    ).update(status=RenderJob.Status.QUEUED, worker_id="", available_at=timezone.now())
+
+
+def claim_next_job(worker_id):
+    """
+    Claim the oldest runnable job for `worker_id`, or return None when the
+    queue is empty or RENDER_MAX_CONCURRENT_JOBS jobs are already running.
+    """
+    requeue_stale_jobs()
+    now = timezone.now()
+    candidates = list(RenderJob.objects.filter(
+        status=RenderJob.Status.QUEUED, available_at__lte=now,
+    ).order_by("available_at", "created_at").values_list("pk", flat=True)[:5])
+
+    running = Coalesce(
+        Subquery(
+            RenderJob.objects.filter(status=RenderJob.Status.RUNNING)
+            .order_by().values("status").annotate(n=Count("pk")).values("n")
+        ),
+        Value(0),
+        output_field=IntegerField(),
+    )
+    for pk in candidates:
+        with transaction.atomic():
+            if connection.features.has_select_for_update:
+                # Concurrent UPDATEs each count running jobs in their own
+                # snapshot. Locking the queued and running rows first makes
+                # claimers take turns, so each one's count sees the claims
+                # before it. (SQLite runs one write statement at a time anyway.)
+                list(RenderJob.objects.select_for_update().filter(
+                    status__in=[RenderJob.Status.QUEUED, RenderJob.Status.RUNNING],
+                ).order_by("pk").values_list("pk", flat=True))
+            # Conditional UPDATE: only one worker can move a row out of
+            # "queued", and only while fewer than the cap are running.
+            claimed = RenderJob.objects.alias(running=running).filter(
+                pk=pk, status=RenderJob.Status.QUEUED, running__lt=settings.RENDER_MAX_CONCURRENT_JOBS,
+            ).update(
+                status=RenderJob.Status.RUNNING,
+                worker_id=worker_id,
+                heartbeat_at=now,
+                started_at=now,
+                attempts=F("attempts") + 1,
+            )
+        if claimed:
+            return RenderJob.objects.get(pk=pk)
+    return None
+
+
+# ─── Running ───────────────────────────────────────────
+
+def run_job(job):
+    """Run a claimed job to completion, retrying or failing it on errors."""
+    try:
+        if job.kind == "seed":
+            _run_seed_job(job)
+        else:
+            raise ValueError(f"Unknown job kind: {job.kind}")
+    except JobLost:
+        logger.warning("Render job %s was requeued while %s ran it; stopping", job.pk, job.worker_id)
+    except JobCancelled:
+        _finish(job, RenderJob.Status.CANCELLED)
+    except Exception as e:
+        logger.exception("Render job %s failed (attempt %s)", job.pk, job.attempts)
+        if job.attempts < job.max_attempts:
+            _owned(job).update(
+                status=RenderJob.Status.QUEUED,
+                worker_id="",
+                error=f"{type(e).__name__}: {e}",
+                available_at=timezone.now() + timedelta(seconds=RETRY_BACKOFF * 2 ** (job.attempts - 1)),
+            )
+        else:
+            _finish(job, RenderJob.Status.FAILED, error=f"{type(e).__name__}: {e}")
+    else:
+        _finish(job, RenderJob.Status.SUCCEEDED, error="")
+    job.refresh_from_db()
+    return job
+
+
+def _owned(job):
+    """The job's row, as long as it is still running under this worker."""
+    return RenderJob.objects.filter(pk=job.pk, status=RenderJob.Status.RUNNING, worker_id=job.worker_id)
+
+
+def _finish(job, status, **fields):
+    _owned(job).update(status=status, finished_at=timezone.now(), **fields)
+
+
+def _heartbeat(job, **fields):
+    """Heartbeat + progress update; raises JobLost if the job was requeued."""
+    if not _owned(job).update(heartbeat_at=timezone.now(), **fields):
+        raise JobLost()
+
+
+def _check_in(job, **fields):
+    """_heartbeat(), then raises JobCancelled if cancellation was requested."""
+    _heartbeat(job, **fields)
+    if RenderJob.objects.filter(pk=job.pk, cancel_requested=True).exists():
+        raise JobCancelled()
+
+
+def _run_seed_job(job):
+    duration = job.params.get("duration", SEED_DURATION)
+    all_items = job.params.get("tracks", [])
+    # Resume after a retry: tracks finished by an earlier attempt are kept.
+    completed = set(job.params.get("completed", []))
+    created_ids = list(job.created_track_ids)
+    pending = [i for i in range(len(all_items)) if i not in completed]
+    specs = [
+        {
+            "genre": all_items[i]["genre"],
+            "bpm": all_items[i]["bpm"],
+            "duration": duration,
+            "seed": all_items[i].get("seed"),
+        }
+        for i in pending
+    ]
+    _check_in(job)
+
+    cache = default_cache()
+    # Each render is encoded straight into a file in render_dir and copied
+    # to storage from there, so no track is ever held in memory whole.
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as render_dir:
+        tracks = generate_track_files(
+            specs, render_dir, workers=settings.RENDER_WORKER_PROCESSES, cache=cache,
+        )
+        for index, spec, seed, wav_path in tracks:
+            item_index = pending[index]
+            item = all_items[item_index]
+            genre, _ = Genre.objects.get_or_create(
+                name=item["genre"],
+                defaults={"slug": item["genre"].lower().replace(" ", "-")},
+            )
+            mood, _ = Mood.objects.get_or_create(
+                name=item["mood"],
+                defaults={"slug": item["mood"].lower().replace(" ", "-")},
+            )
+            track = Track(
+                title=item["title"],
+                genre=genre,
+                mood=mood,
+                tags=item["tags"],
+                bpm=item["bpm"],
+                duration=duration,
+            )
+            # A single render can outlast RENDER_JOB_TIMEOUT; make sure the
+            # job is still ours before storing anything.
+            _check_in(job)
+            try:
+                with open(wav_path, "rb") as wav_file:
+                    # Hashed from the local file, not read back from storage
+                    track.etag = track.compute_etag(wav_file)
+                    track.audio_file.save(
+                        f"{item['title'].lower().replace(' ', '_')}.wav",
+                        File(wav_file),
+                        save=False,
+                    )
+            finally:
+                os.unlink(wav_path)
+
+            completed.add(item_index)
+            job.params["completed"] = sorted(completed)
+            try:
+                # The track only exists if the progress update (which checks
+                # ownership, and locks the job row where supported) succeeds.
+                with transaction.atomic():
+                    track.save()
+                    _heartbeat(
+                        job,
+                        params=job.params,
+                        progress=len(completed),
+                        created_track_ids=created_ids + [str(track.pk)],
+                    )
+            except JobLost:
+                track.audio_file.delete(save=False)
+                raise
+            created_ids.append(str(track.pk))
+            transcode_on_ingest(track)
+            _check_in(job)
+
+    if cache is not None:
+        logger.info("Render cache after job %s: %s", job.pk, cache.stats())
@@ -0,0 +1,42 @@
+"""
+Management command to hash the audio of tracks that have no ETag yet.
+
+Usage:
+    python manage.py compute_etags
+    python manage.py compute_etags --force
+
+Tracks saved before ETags existed are streamed with Last-Modified only,
+and their renditions and HLS segments are not used, until they are
+hashed. Reads every file once (from object storage too); updated_at is
+left alone.
+"""
+from django.core.management.base import BaseCommand
+from tracks.models import Track
+
+
+class Command(BaseCommand):
+    help = "Compute the SHA-256 ETag of tracks missing one"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-hash tracks that already have an ETag")
+
+    def handle(self, *args, **options):
+        tracks = Track.objects.exclude(audio_file="")
+        if not options["force"]:
+            tracks = tracks.filter(etag="")
+        total = tracks.count()
+        self.stdout.write(f"Hashing {total} tracks")
+
+        updated = failed = 0
+        for track in tracks.only("pk", "title", "audio_file", "etag").iterator():
+            try:
+                etag = track.compute_etag()
+            except (FileNotFoundError, ValueError) as e:
+                failed += 1
+                self.stderr.write(f"  Error for {track.title}: {e}")
+                continue
+            if etag != track.etag:
+                Track.objects.filter(pk=track.pk).update(etag=etag)
+                updated += 1
+
+        self.stdout.write(self.style.SUCCESS(f"\nDone: {updated} ETags updated, {failed} tracks failed"))
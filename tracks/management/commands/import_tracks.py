@@ -4,13 +4,15 @@ Management command to bulk import generated tracks from the generate_music.py sc
 Usage:
     python manage.py import_tracks /path/to/generated_tracks/
 
-This reads the metadata.json file and imports all tracks into Django.
+This reads the metadata.json file and imports all tracks into Django,
+encoding compressed renditions of each when ffmpeg is installed.
 """
 import json
 import os
 from django.core.management.base import BaseCommand
 from django.core.files import File
 from tracks.models import Track, Genre, Mood
+from tracks.transcoding import transcode_on_ingest
 
 
 class Command(BaseCommand):
@@ -79,11 +81,13 @@ class Command(BaseCommand):
 
             with open(filepath, "rb") as audio_file:
                 ext = os.path.splitext(filepath)[1]
+                track.etag = track.compute_etag(audio_file)
                 track.audio_file.save(
                     f"{track_data['title'].lower().replace(' ', '_')}{ext}",
                     File(audio_file),
                     save=True,
                 )
+            transcode_on_ingest(track)
 
             imported += 1
             self.stdout.write(f"  ✅ Imported: {track_data['title']}")
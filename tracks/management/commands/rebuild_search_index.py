@@ -0,0 +1,25 @@
+"""
+Management command to (re)create and refill the track search index.
+
+Usage:
+    python manage.py rebuild_search_index
+
+On SQLite this recreates the FTS5 table's triggers if a schema change
+dropped them and repopulates the table; run it after a VACUUM or if
+search results look stale. On PostgreSQL the index is a generated column
+that can't go stale, so this only makes sure it exists.
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from tracks.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = "Create and repopulate the full-text search index of tracks"
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ("postgresql", "sqlite"):
+            self.stdout.write(f"No search index for {connection.vendor}; ?search= uses icontains")
+            return
+        install_search_index(connection)
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({connection.vendor})"))
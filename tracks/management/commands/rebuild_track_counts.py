@@ -0,0 +1,34 @@
+"""
+Management command to recompute the track counts of every genre, mood and
+tag.
+
+Usage:
+    python manage.py rebuild_track_counts
+    python manage.py rebuild_track_counts --tags
+
+Saving or deleting a track keeps the counts current; run this after bulk
+changes that bypass model signals (QuerySet.update, bulk_create, loaddata).
+``--tags`` first re-parses every track's tags string into Track.tag_set.
+"""
+from django.core.management.base import BaseCommand
+from tracks.models import Genre, Mood, Tag, Track
+from tracks.signals import update_track_counts
+from tracks.tags import sync_tags
+
+
+class Command(BaseCommand):
+    help = "Recompute Genre, Mood and Tag track_count from active tracks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tags", action="store_true", help="Re-link every track to the tags in its tags string")
+
+    def handle(self, *args, **options):
+        if options["tags"]:
+            changed = sum(1 for track in Track.objects.only("pk", "tags").iterator() if sync_tags(track))
+            self.stdout.write(f"Re-linked tags of {changed} tracks")
+        genres = update_track_counts(Genre)
+        moods = update_track_counts(Mood)
+        tags = update_track_counts(Tag)
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated track counts of {genres} genres, {moods} moods and {tags} tags"
+        ))
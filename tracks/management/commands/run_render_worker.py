@@ -0,0 +1,51 @@
+"""
+Management command that processes queued render jobs.
+
+Usage:
+    python manage.py run_render_worker
+    python manage.py run_render_worker --once        # drain the queue and exit
+    python manage.py run_render_worker --poll 2
+
+Run as many workers as you like (on any machine sharing the database);
+RENDER_MAX_CONCURRENT_JOBS caps how many jobs run at the same time.
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from tracks.jobs import claim_next_job, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = "Process queued render jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--poll", type=float, default=5.0, help="Seconds between queue checks")
+        parser.add_argument("--once", action="store_true", help="Exit when no job is runnable")
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        name = worker_name()
+        self.stdout.write(f"Render worker {name} started")
+
+        while not self._stopping:
+            job = claim_next_job(name)
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll"])
+                continue
+
+            self.stdout.write(f"  Running {job.kind} job {job.pk} (attempt {job.attempts})")
+            job = run_job(job)
+            self.stdout.write(f"  Job {job.pk}: {job.status} ({job.progress}/{job.total})")
+
+        self.stdout.write(self.style.SUCCESS(f"Render worker {name} stopped"))
+
+    def _stop(self, signum, frame):
+        # Finish the current job, then exit the loop.
+        self._stopping = True
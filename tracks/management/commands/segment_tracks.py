@@ -0,0 +1,51 @@
+"""
+Management command to cut tracks into HLS segments.
+
+Usage:
+    python manage.py segment_tracks
+    python manage.py segment_tracks --qualities low medium
+    python manage.py segment_tracks --force
+
+Tracks whose audio changed since they were segmented are re-cut too.
+Needs ffmpeg (FFMPEG_BINARY).
+"""
+from django.core.management.base import BaseCommand, CommandError
+from tracks.hls import segment_track
+from tracks.models import Track, TrackRendition
+from tracks.transcoding import TranscodeError, ffmpeg_available
+
+
+class Command(BaseCommand):
+    help = "Cut tracks into HLS segments at each bitrate with ffmpeg"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--qualities", nargs="*", choices=TrackRendition.Quality.values,
+            help="Bitrates to cut (default: HLS_QUALITIES)",
+        )
+        parser.add_argument("--force", action="store_true", help="Re-cut variants that are up to date")
+
+    def handle(self, *args, **options):
+        if not ffmpeg_available():
+            raise CommandError("ffmpeg not found; install it or set FFMPEG_BINARY")
+
+        tracks = Track.objects.filter(is_active=True).exclude(audio_file="")
+        total = tracks.count()
+        self.stdout.write(f"Checking HLS variants for {total} tracks")
+
+        created = failed = 0
+        for track in tracks.iterator():
+            try:
+                variants = segment_track(track, qualities=options["qualities"], force=options["force"])
+            except (TranscodeError, FileNotFoundError) as e:
+                failed += 1
+                self.stderr.write(f"  Error for {track.title}: {e}")
+                continue
+            if variants:
+                created += len(variants)
+                cut = ", ".join(f"{v.quality} {v.bitrate}k x{v.segments.count()}" for v in variants)
+                self.stdout.write(f"  Segmented: {track.title} -> {cut}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\nDone: {created} variants cut, {failed} tracks failed")
+        )
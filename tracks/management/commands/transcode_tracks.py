@@ -0,0 +1,59 @@
+"""
+Management command to encode compressed renditions and preview clips for
+tracks missing them.
+
+Usage:
+    python manage.py transcode_tracks
+    python manage.py transcode_tracks --formats opus mp3 --qualities low medium
+    python manage.py transcode_tracks --force
+
+Tracks whose audio changed since their renditions or preview were made
+are re-encoded too. Needs ffmpeg (FFMPEG_BINARY).
+"""
+from django.core.management.base import BaseCommand, CommandError
+from tracks.models import Track, TrackRendition
+from tracks.transcoding import TranscodeError, create_preview, create_renditions, ffmpeg_available
+
+
+class Command(BaseCommand):
+    help = "Encode MP3/AAC/Opus renditions and preview clips of tracks with ffmpeg"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--formats", nargs="*", choices=TrackRendition.Format.values,
+            help="Formats to encode (default: AUDIO_RENDITION_FORMATS)",
+        )
+        parser.add_argument(
+            "--qualities", nargs="*", choices=TrackRendition.Quality.values,
+            help="Quality levels to encode (default: AUDIO_RENDITION_QUALITIES)",
+        )
+        parser.add_argument("--force", action="store_true", help="Re-encode renditions and previews that are up to date")
+
+    def handle(self, *args, **options):
+        if not ffmpeg_available():
+            raise CommandError("ffmpeg not found; install it or set FFMPEG_BINARY")
+
+        tracks = Track.objects.filter(is_active=True).exclude(audio_file="")
+        total = tracks.count()
+        self.stdout.write(f"Checking renditions for {total} tracks")
+
+        created = previews = failed = 0
+        for track in tracks.iterator():
+            try:
+                if create_preview(track, force=options["force"]):
+                    previews += 1
+                renditions = create_renditions(
+                    track, formats=options["formats"], qualities=options["qualities"], force=options["force"],
+                )
+            except (TranscodeError, FileNotFoundError) as e:
+                failed += 1
+                self.stderr.write(f"  Error for {track.title}: {e}")
+                continue
+            if renditions:
+                created += len(renditions)
+                sizes = ", ".join(f"{r.format}/{r.quality} {r.size // 1024} KB" for r in renditions)
+                self.stdout.write(f"  Encoded: {track.title} ({track.audio_file.size // 1024} KB) -> {sizes}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"\nDone: {created} renditions and {previews} previews encoded, {failed} tracks failed")
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0005_add_render_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='etag',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the audio file, used as a strong ETag', max_length=64),
+        ),
+    ]
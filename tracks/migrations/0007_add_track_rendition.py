@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0006_add_track_etag'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('mp3', 'MP3'), ('aac', 'AAC'), ('opus', 'Opus')], max_length=10)),
+                ('quality', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('bitrate', models.PositiveIntegerField(help_text='Target bitrate in kbps')),
+                ('audio_file', models.FileField(upload_to='renditions/%Y/%m/')),
+                ('size', models.PositiveIntegerField(default=0, help_text='File size in bytes')),
+                ('etag', models.CharField(editable=False, help_text='SHA-256 of the rendition file', max_length=64)),
+                ('source_etag', models.CharField(editable=False, help_text='Track ETag the rendition was encoded from; stale when it no longer matches', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='tracks.track')),
+            ],
+            options={
+                'ordering': ['track', 'format', 'quality'],
+                'constraints': [models.UniqueConstraint(fields=('track', 'format', 'quality'), name='unique_track_rendition')],
+            },
+        ),
+    ]
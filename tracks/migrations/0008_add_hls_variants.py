@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:37
+
+import django.db.models.deletion
+import tracks.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0007_add_track_rendition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HLSVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quality', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], max_length=10)),
+                ('bitrate', models.PositiveIntegerField(help_text='Target bitrate in kbps')),
+                ('target_duration', models.PositiveIntegerField(help_text='Longest segment, rounded up (seconds)')),
+                ('peak_bandwidth', models.PositiveIntegerField(help_text='Highest segment bitrate in bits/s')),
+                ('average_bandwidth', models.PositiveIntegerField(help_text='Average bitrate in bits/s')),
+                ('source_etag', models.CharField(editable=False, help_text='Track ETag the segments were cut from; stale when it no longer matches', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hls_variants', to='tracks.track')),
+            ],
+            options={
+                'ordering': ['track', 'bitrate'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HLSSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('duration', models.FloatField(help_text='Seconds')),
+                ('audio_file', models.FileField(upload_to=tracks.models.hls_segment_path)),
+                ('size', models.PositiveIntegerField(default=0, help_text='File size in bytes')),
+                ('etag', models.CharField(editable=False, help_text='SHA-256 of the segment', max_length=64)),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='tracks.hlsvariant')),
+            ],
+            options={
+                'ordering': ['variant', 'index'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hlsvariant',
+            constraint=models.UniqueConstraint(fields=('track', 'quality'), name='unique_track_hls_variant'),
+        ),
+        migrations.AddConstraint(
+            model_name='hlssegment',
+            constraint=models.UniqueConstraint(fields=('variant', 'index'), name='unique_hls_segment'),
+        ),
+    ]
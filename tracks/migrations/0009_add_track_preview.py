@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0008_add_hls_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='track',
+            name='preview_etag',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='preview_file',
+            field=models.FileField(blank=True, editable=False, help_text='Short loudness-normalized clip, made by tracks.transcoding', upload_to='previews/%Y/%m/'),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='preview_source_etag',
+            field=models.CharField(blank=True, editable=False, help_text='Track ETag the preview was cut from; stale when it no longer matches', max_length=64),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:47
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_tracks(apps, schema_editor):
+    for model_name in ("Genre", "Mood"):
+        model = apps.get_model("tracks", model_name)
+        counts = model.objects.annotate(n=Count("tracks", filter=Q(tracks__is_active=True)))
+        for row in counts:
+            model.objects.filter(pk=row.pk).update(track_count=row.n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0009_add_track_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genre',
+            name='track_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Active tracks, kept current by tracks.signals'),
+        ),
+        migrations.AddField(
+            model_name='mood',
+            name='track_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Active tracks, kept current by tracks.signals'),
+        ),
+        migrations.RunPython(count_tracks, migrations.RunPython.noop),
+    ]
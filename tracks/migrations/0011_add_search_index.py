@@ -0,0 +1,85 @@
+# Full-text search index over tracks (see tracks.search): a generated
+# tsvector column with a GIN index on PostgreSQL, an FTS5 table with
+# triggers on SQLite. Nothing on other databases.
+#
+# The SQL is written out here rather than imported from tracks.search, so
+# this migration keeps doing what it did when tracks.search changes.
+#
+# A LATER MIGRATION THAT ALTERS tracks_track MUST HANDLE THIS INDEX:
+# - SQLite: AlterField, RemoveField and most other operations rebuild the
+#   table (copy, drop, rename), which silently drops the three triggers
+#   below; the FTS5 table then stops following writes. Re-create them
+#   afterwards (e.g. RunPython calling tracks.search.install_search_index
+#   as it is at that point, or a copy of the statements) and rebuild the
+#   FTS5 table.
+# - PostgreSQL: search_vector is generated from title, artist_name, tags,
+#   description and lyrics. Changing the type of, renaming or dropping one
+#   of those columns fails while it exists; drop the column (and its GIN
+#   index) first and add it back after.
+from django.db import migrations
+
+POSTGRES_INSTALL = [
+    "ALTER TABLE tracks_track ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A')"
+    " || setweight(to_tsvector('english', coalesce(artist_name, '')), 'A')"
+    " || setweight(to_tsvector('english', coalesce(tags, '')), 'B')"
+    " || setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+    " || setweight(to_tsvector('english', coalesce(lyrics, '')), 'D')"
+    ") STORED",
+    "CREATE INDEX IF NOT EXISTS tracks_track_search_gin ON tracks_track USING gin (search_vector)",
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS tracks_track_search_gin",
+    "ALTER TABLE tracks_track DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tracks_track_fts USING fts5("
+    "title, artist_name, tags, description, lyrics,"
+    " content='tracks_track', content_rowid='rowid',"
+    " tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS tracks_track_fts_insert AFTER INSERT ON tracks_track BEGIN"
+    " INSERT INTO tracks_track_fts(rowid, title, artist_name, tags, description, lyrics)"
+    " VALUES (new.rowid, new.title, new.artist_name, new.tags, new.description, new.lyrics); END",
+    "CREATE TRIGGER IF NOT EXISTS tracks_track_fts_delete AFTER DELETE ON tracks_track BEGIN"
+    " INSERT INTO tracks_track_fts(tracks_track_fts, rowid, title, artist_name, tags, description, lyrics)"
+    " VALUES ('delete', old.rowid, old.title, old.artist_name, old.tags, old.description, old.lyrics); END",
+    "CREATE TRIGGER IF NOT EXISTS tracks_track_fts_update AFTER UPDATE ON tracks_track WHEN"
+    " old.title IS NOT new.title OR old.artist_name IS NOT new.artist_name OR old.tags IS NOT new.tags"
+    " OR old.description IS NOT new.description OR old.lyrics IS NOT new.lyrics BEGIN"
+    " INSERT INTO tracks_track_fts(tracks_track_fts, rowid, title, artist_name, tags, description, lyrics)"
+    " VALUES ('delete', old.rowid, old.title, old.artist_name, old.tags, old.description, old.lyrics);"
+    " INSERT INTO tracks_track_fts(rowid, title, artist_name, tags, description, lyrics)"
+    " VALUES (new.rowid, new.title, new.artist_name, new.tags, new.description, new.lyrics); END",
+    "INSERT INTO tracks_track_fts(tracks_track_fts) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS tracks_track_fts_insert",
+    "DROP TRIGGER IF EXISTS tracks_track_fts_delete",
+    "DROP TRIGGER IF EXISTS tracks_track_fts_update",
+    "DROP TABLE IF EXISTS tracks_track_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def install(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRES_INSTALL, "sqlite": SQLITE_INSTALL})
+
+
+def uninstall(apps, schema_editor):
+    _run(schema_editor, {"postgresql": POSTGRES_UNINSTALL, "sqlite": SQLITE_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0010_add_track_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:04
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils.text import slugify
+
+BATCH_SIZE = 1000
+MAX_TAG_LENGTH = 50
+
+
+# Copy of tracks.tags.split_tags as of this migration, so the backfill
+# doesn't change when that module does.
+def split_tags(value):
+    tags = {}
+    for part in (value or "").split(","):
+        name = " ".join(part.lower().split())[:MAX_TAG_LENGTH]
+        slug = slugify(name)[:MAX_TAG_LENGTH]
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
+
+def backfill_tags(apps, schema_editor):
+    # Parse every track's tags string into Tag rows and tag_set links, in bulk.
+    Tag = apps.get_model("tracks", "Tag")
+    Track = apps.get_model("tracks", "Track")
+    Link = Track.tag_set.through
+
+    parsed = [(pk, split_tags(tags)) for pk, tags in Track.objects.exclude(tags="").values_list("pk", "tags").iterator()]
+    names = {}
+    for _, tags in parsed:
+        for slug, name in tags.items():
+            names.setdefault(slug, name)
+    Tag.objects.bulk_create([Tag(slug=slug, name=name) for slug, name in names.items()], batch_size=BATCH_SIZE)
+    ids = dict(Tag.objects.values_list("slug", "pk"))
+    Link.objects.bulk_create(
+        [Link(track_id=pk, tag_id=ids[slug]) for pk, tags in parsed for slug in tags],
+        batch_size=BATCH_SIZE,
+    )
+    for tag in Tag.objects.annotate(n=Count("tracks", filter=Q(tracks__is_active=True))):
+        Tag.objects.filter(pk=tag.pk).update(track_count=tag.n)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0011_add_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('slug', models.SlugField(unique=True)),
+                ('track_count', models.PositiveIntegerField(default=0, editable=False, help_text='Active tracks, kept current by tracks.signals')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, editable=False, help_text='Parsed from tags on save, for ?tag= filtering', related_name='tracks', to='tracks.tag'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracks', '0012_add_tags'),
+    ]
+
+    # The new indexes are built before the ones they replace are dropped.
+    operations = [
+        migrations.AddIndex(
+            model_name='track',
+            index=models.Index(fields=['-download_count', '-id'], name='tracks_track_downloads_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='track',
+            index=models.Index(fields=['-created_at', '-id'], name='tracks_track_created_keyset'),
+        ),
+        migrations.RemoveIndex(
+            model_name='track',
+            name='tracks_trac_downloa_d2336c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='track',
+            name='tracks_trac_created_a8f63a_idx',
+        ),
+    ]
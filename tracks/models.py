@@ -1,10 +1,17 @@
+import hashlib
 import uuid
+from django.core.files import File
 from django.db import models
+from django.utils import timezone
 
 
 class Genre(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True)
+    track_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text="Active tracks, kept current by tracks.signals",
+    )
 
     class Meta:
         ordering = ["name"]
@@ -16,6 +23,26 @@ class Genre(models.Model):
 class Mood(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True)
+    track_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text="Active tracks, kept current by tracks.signals",
+    )
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class Tag(models.Model):
+    """A normalized track tag, parsed from Track.tags by tracks.tags."""
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=50, unique=True)
+    track_count = models.PositiveIntegerField(
+        default=0, editable=False,
+        help_text="Active tracks, kept current by tracks.signals",
+    )
 
     class Meta:
         ordering = ["name"]
@@ -25,6 +52,10 @@ class Mood(models.Model):
 
 
 class Track(models.Model):
+    # title, artist_name, tags, description and lyrics feed the full-text
+    # index (migration 0011): a migration that alters this table must
+    # re-create the SQLite triggers, and on Postgres drop and re-add the
+    # generated search_vector column around changes to those columns.
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -33,9 +64,26 @@ class Track(models.Model):
     genre = models.ForeignKey(Genre, on_delete=models.SET_NULL, null=True, related_name="tracks")
     mood = models.ForeignKey(Mood, on_delete=models.SET_NULL, null=True, related_name="tracks")
     tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
+    tag_set = models.ManyToManyField(
+        Tag, blank=True, editable=False, related_name="tracks",
+        help_text="Parsed from tags on save, for ?tag= filtering",
+    )
     
     # Audio file
     audio_file = models.FileField(upload_to="tracks/%Y/%m/", blank=True)
+    etag = models.CharField(
+        max_length=64, blank=True, editable=False,
+        help_text="SHA-256 of the audio file, used as a strong ETag",
+    )
+    preview_file = models.FileField(
+        upload_to="previews/%Y/%m/", blank=True, editable=False,
+        help_text="Short loudness-normalized clip, made by tracks.transcoding",
+    )
+    preview_etag = models.CharField(max_length=64, blank=True, editable=False)
+    preview_source_etag = models.CharField(
+        max_length=64, blank=True, editable=False,
+        help_text="Track ETag the preview was cut from; stale when it no longer matches",
+    )
 
     # Extra metadata
     lyrics = models.TextField(blank=True, help_text="Song lyrics or spoken word text")
@@ -64,14 +112,45 @@ class Track(models.Model):
     class Meta:
         ordering = ["-created_at"]
         indexes = [
-            models.Index(fields=["-download_count"]),
-            models.Index(fields=["-created_at"]),
+            # Keyset pagination (tracks.pagination) breaks ties on id
+            models.Index(fields=["-download_count", "-id"], name="tracks_track_downloads_keyset"),
+            models.Index(fields=["-created_at", "-id"], name="tracks_track_created_keyset"),
             models.Index(fields=["genre", "mood"]),
         ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Hash new uploads once here, from the upload itself, so stream and
+        # download never have to read the file to validate. Files already
+        # in storage are not read back on every save: code that stores one
+        # sets etag itself, and `manage.py compute_etags` fills in the rest.
+        if not self.audio_file:
+            self.etag = ""
+        elif not self.audio_file._committed:
+            self.etag = self.compute_etag(self.audio_file.file)
+        super().save(*args, **kwargs)
+
+    def compute_etag(self, file=None):
+        """SHA-256 of ``file`` (rewound afterwards), or of the stored audio."""
+        digest = hashlib.sha256()
+        if file is not None:
+            file = file if isinstance(file, File) else File(file)
+            file.seek(0)
+            for chunk in file.chunks():
+                digest.update(chunk)
+            file.seek(0)
+        else:
+            with self.audio_file.storage.open(self.audio_file.name, "rb") as f:
+                for chunk in f.chunks():
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    @property
+    def has_current_preview(self):
+        return bool(self.preview_file) and bool(self.etag) and self.preview_source_etag == self.etag
+
     @property
     def duration_display(self):
         """Return duration as MM:SS format."""
@@ -86,3 +165,149 @@ class Track(models.Model):
             return round(self.audio_file.size / (1024 * 1024), 1)
         except (FileNotFoundError, ValueError):
             return 0
+
+
+class TrackRendition(models.Model):
+    """A compressed copy of a track's audio, made by tracks.transcoding."""
+
+    class Format(models.TextChoices):
+        MP3 = "mp3", "MP3"
+        AAC = "aac", "AAC"
+        OPUS = "opus", "Opus"
+
+    class Quality(models.TextChoices):
+        LOW = "low", "Low"
+        MEDIUM = "medium", "Medium"
+        HIGH = "high", "High"
+
+    track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name="renditions")
+    format = models.CharField(max_length=10, choices=Format.choices)
+    quality = models.CharField(max_length=10, choices=Quality.choices)
+    bitrate = models.PositiveIntegerField(help_text="Target bitrate in kbps")
+    audio_file = models.FileField(upload_to="renditions/%Y/%m/")
+    size = models.PositiveIntegerField(default=0, help_text="File size in bytes")
+    etag = models.CharField(max_length=64, editable=False, help_text="SHA-256 of the rendition file")
+    source_etag = models.CharField(
+        max_length=64, editable=False,
+        help_text="Track ETag the rendition was encoded from; stale when it no longer matches",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["track", "format", "quality"]
+        constraints = [
+            models.UniqueConstraint(fields=["track", "format", "quality"], name="unique_track_rendition"),
+        ]
+
+    def __str__(self):
+        return f"{self.track} ({self.format} {self.bitrate}k)"
+
+    @property
+    def is_current(self):
+        return bool(self.track.etag) and self.source_etag == self.track.etag
+
+
+def hls_segment_path(instance, filename):
+    return f"hls/{instance.variant.track_id}/{filename}"
+
+
+class HLSVariant(models.Model):
+    """One bitrate of a track cut into HLS segments by tracks.hls."""
+
+    track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name="hls_variants")
+    quality = models.CharField(max_length=10, choices=TrackRendition.Quality.choices)
+    bitrate = models.PositiveIntegerField(help_text="Target bitrate in kbps")
+    target_duration = models.PositiveIntegerField(help_text="Longest segment, rounded up (seconds)")
+    peak_bandwidth = models.PositiveIntegerField(help_text="Highest segment bitrate in bits/s")
+    average_bandwidth = models.PositiveIntegerField(help_text="Average bitrate in bits/s")
+    source_etag = models.CharField(
+        max_length=64, editable=False,
+        help_text="Track ETag the segments were cut from; stale when it no longer matches",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["track", "bitrate"]
+        constraints = [
+            models.UniqueConstraint(fields=["track", "quality"], name="unique_track_hls_variant"),
+        ]
+
+    def __str__(self):
+        return f"{self.track} (HLS {self.bitrate}k)"
+
+    @property
+    def is_current(self):
+        return bool(self.track.etag) and self.source_etag == self.track.etag
+
+
+class HLSSegment(models.Model):
+    variant = models.ForeignKey(HLSVariant, on_delete=models.CASCADE, related_name="segments")
+    index = models.PositiveIntegerField()
+    duration = models.FloatField(help_text="Seconds")
+    audio_file = models.FileField(upload_to=hls_segment_path)
+    size = models.PositiveIntegerField(default=0, help_text="File size in bytes")
+    etag = models.CharField(max_length=64, editable=False, help_text="SHA-256 of the segment")
+
+    class Meta:
+        ordering = ["variant", "index"]
+        constraints = [
+            models.UniqueConstraint(fields=["variant", "index"], name="unique_hls_segment"),
+        ]
+
+    def __str__(self):
+        return f"{self.variant} #{self.index}"
+
+    @property
+    def name(self):
+        # Content-addressed, so a segment URL never changes meaning and can be cached forever.
+        return f"{self.index:04d}-{self.etag[:12]}"
+
+
+class RenderJob(models.Model):
+    """A queued procedural render, picked up by `manage.py run_render_worker`."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+        CANCELLED = "cancelled", "Cancelled"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=30, default="seed")
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+
+    # Progress
+    total = models.PositiveIntegerField(default=0)
+    progress = models.PositiveIntegerField(default=0)
+    created_track_ids = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+
+    # Retry & cancellation
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time")
+    cancel_requested = models.BooleanField(default=False)
+
+    # Worker bookkeeping
+    worker_id = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED, self.Status.CANCELLED)
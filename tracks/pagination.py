@@ -0,0 +1,174 @@
+"""
+Pagination for the track list.
+
+Page numbers (``?page=N``) cost a COUNT(*) plus an OFFSET that grows with
+N, so a crawl of the whole catalog is quadratic. Passing ``?cursor=``
+(empty for the first page) switches to keyset pagination instead: each
+page is fetched with ``WHERE (created_at, id) < (last row)`` on the
+``(-created_at, -id)`` or ``(-download_count, -id)`` index, so page 1000
+costs the same as page 1. Cursor pages have a ``next`` link but no
+``previous``, and only include ``count`` when ``?count=true`` is given.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.encoding import force_str
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+CURSOR_PARAM = "cursor"
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward-only keyset pagination over one indexed field, with ties
+    broken on the primary key. The cursor is an opaque encoding of the
+    ordering and the last row's (value, pk).
+    """
+    cursor_query_param = CURSOR_PARAM
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+    # Fields that have a (field, pk) index on the model
+    ordering_fields = ("created_at", "download_count")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, view)
+        field_name = self.ordering.lstrip("-")
+        descending = self.ordering.startswith("-")
+        direction = "-" if descending else ""
+        self.field = queryset.model._meta.get_field(field_name)
+
+        queryset = queryset.order_by(self.ordering, f"{direction}pk")
+        self.count = queryset.count() if self.wants_count(request) else None
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            value, pk = position
+            # The range condition is what uses the index; the exclude only
+            # drops rows tied on ``value`` that the previous page returned.
+            bound, seen = ("lte", "gte") if descending else ("gte", "lte")
+            queryset = queryset.filter(**{f"{field_name}__{bound}": value}).exclude(
+                **{field_name: value, f"pk__{seen}": pk}
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request, view):
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM)
+        if ordering is None:
+            ordering = (getattr(view, "ordering", None) or ["-created_at"])[0]
+        if ordering.lstrip("-") not in self.ordering_fields:
+            choices = " or ".join(self.ordering_fields)
+            raise ValidationError({api_settings.ORDERING_PARAM: f"Cursor pagination can only order by {choices}"})
+        return ordering
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() in ("1", "true", "yes")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            if data["o"] != self.ordering:
+                raise ValueError("cursor is for another ordering")
+            value = self.field.to_python(data["v"])
+            pk = self.field.model._meta.pk.to_python(data["pk"])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def encode_cursor(self, row):
+        data = {"o": self.ordering, "v": self.field.value_to_string(row), "pk": force_str(row.pk)}
+        return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode("ascii")
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), "page")
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        response = {"next": self.get_next_link(), "results": data}
+        if self.count is not None:
+            response = {"count": self.count, **response}
+        return Response(response)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination cursor; pass it empty for the first page, then follow `next`",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Results per cursor page (up to {self.max_page_size})",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include the total count in cursor pages (costs a COUNT query)",
+                "schema": {"type": "boolean"},
+            },
+        ]
+
+
+class TrackPagination(PageNumberPagination):
+    """Page numbers by default; KeysetPagination when ``?cursor=`` is given."""
+
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if CURSOR_PARAM in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + self.keyset_class().get_schema_operation_parameters(view)
@@ -0,0 +1,190 @@
+"""
+Full-text search over the track catalog.
+
+`?search=` used to be DRF's SearchFilter, i.e. ``icontains`` on several
+text columns: a full table scan on every keystroke. Tracks are now
+indexed by the database itself (migration 0011), over title, artist
+name, tags, description and lyrics, in that order of weight:
+
+- PostgreSQL: a generated ``search_vector`` tsvector column with a GIN
+  index. It is computed by Postgres on every write, so it can't go stale.
+- SQLite (local development): an FTS5 table, ``tracks_track_fts``, over
+  the track table, kept current by triggers. `manage.py
+  rebuild_search_index` repopulates it, e.g. after a VACUUM (which may
+  renumber the rowids it is keyed on).
+
+Every search word is matched as a prefix ("chil" finds "chill"), all
+words must match, and results are ordered best match first unless
+``?ordering=`` asks otherwise. Other databases fall back to ``icontains``.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+SEARCH_PARAM = "search"
+MAX_TERMS = 8
+
+FTS_TABLE = "tracks_track_fts"
+# Highest weight first
+INDEXED_COLUMNS = ["title", "artist_name", "tags", "description", "lyrics"]
+
+# bm25 column weights for the FTS5 table, same order as its columns
+FTS_WEIGHTS = (10.0, 8.0, 5.0, 2.0, 1.0)
+
+_POSTGRES_VECTOR = " || ".join(
+    f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')"
+    for column, weight in zip(INDEXED_COLUMNS, "AABCD")
+)
+
+POSTGRES_INSTALL = [
+    f"ALTER TABLE tracks_track ADD COLUMN IF NOT EXISTS search_vector tsvector"
+    f" GENERATED ALWAYS AS ({_POSTGRES_VECTOR}) STORED",
+    "CREATE INDEX IF NOT EXISTS tracks_track_search_gin ON tracks_track USING gin (search_vector)",
+]
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS tracks_track_search_gin",
+    "ALTER TABLE tracks_track DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _fts_values(prefix):
+    return ", ".join(f"{prefix}.{column}" for column in INDEXED_COLUMNS)
+
+
+_COLUMNS = ", ".join(INDEXED_COLUMNS)
+_CHANGED = " OR ".join(f"old.{column} IS NOT new.{column}" for column in INDEXED_COLUMNS)
+
+# External-content FTS5 table: the text lives only in tracks_track, the
+# index is keyed by its rowid. The prefix indexes speed up 2-3 letter
+# prefixes typed into the search bar.
+SQLITE_INSTALL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({_COLUMNS},"
+    f" content='tracks_track', content_rowid='rowid',"
+    f" tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON tracks_track BEGIN"
+    f" INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.rowid, {_fts_values('new')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON tracks_track BEGIN"
+    f" INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.rowid, {_fts_values('old')}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE ON tracks_track WHEN {_CHANGED} BEGIN"
+    f" INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS}) VALUES ('delete', old.rowid, {_fts_values('old')});"
+    f" INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.rowid, {_fts_values('new')}); END",
+]
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def search_terms(text):
+    """Lower-cased words of a search string, at most MAX_TERMS."""
+    return re.findall(r"\w+", text.lower())[:MAX_TERMS]
+
+
+def _postgres_query(terms):
+    # to_tsquery syntax: every term as a prefix, all of them required
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+def _fts_query(terms):
+    # FTS5 syntax: quoted so no word is read as an operator, * for prefix
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search_tracks(queryset, text):
+    """
+    Narrow ``queryset`` to tracks matching ``text`` and annotate each with
+    ``search_rank`` (higher is better). Returns it unchanged if ``text``
+    has no words.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+    table = queryset.model._meta.db_table
+
+    if connection.vendor == "postgresql":
+        query = _postgres_query(terms)
+        return queryset.filter(
+            RawSQL(f"{table}.search_vector @@ to_tsquery('english', %s)", [query], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank_cd({table}.search_vector, to_tsquery('english', %s))", [query], output_field=FloatField()
+            )
+        )
+
+    if connection.vendor == "sqlite":
+        # Joined rather than a correlated subquery, so bm25() is computed
+        # by the FTS5 cursor while it scans the matches (~1000x faster).
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        return queryset.extra(
+            select={"search_rank": f"-bm25({FTS_TABLE}, {weights})"},
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {table}.rowid", f"{FTS_TABLE} MATCH %s"],
+            params=[_fts_query(terms)],
+        )
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(*[Q(**{f"{field}__icontains": term}) for field in INDEXED_COLUMNS], _connector=Q.OR)
+    return queryset.filter(condition)
+
+
+def _execute(connection, statements):
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install_search_index(connection):
+    """
+    Create the search column/index (Postgres) or FTS5 table and triggers
+    (SQLite) if they are missing, and fill the FTS5 table. Safe to re-run:
+    SQLite drops the triggers whenever Django rebuilds tracks_track for a
+    schema change, so migrations that alter Track should call this again.
+    """
+    if connection.vendor == "postgresql":
+        _execute(connection, POSTGRES_INSTALL)
+    elif connection.vendor == "sqlite":
+        _execute(connection, SQLITE_INSTALL + [f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"])
+
+
+def uninstall_search_index(connection):
+    if connection.vendor == "postgresql":
+        _execute(connection, POSTGRES_UNINSTALL)
+    elif connection.vendor == "sqlite":
+        _execute(connection, SQLITE_UNINSTALL)
+
+
+def _is_ranked(queryset):
+    return "search_rank" in queryset.query.annotations or "search_rank" in queryset.query.extra
+
+
+class TrackSearchFilter(BaseFilterBackend):
+    """
+    ``?search=`` backed by the full-text index. Place it after
+    OrderingFilter: without an explicit ``?ordering=``, matches are sorted
+    by rank ahead of the view's default ordering.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(SEARCH_PARAM, "")
+        searched = search_tracks(queryset, text)
+        if searched is queryset:
+            return queryset
+        if request.query_params.get(api_settings.ORDERING_PARAM) or not _is_ranked(searched):
+            return searched
+        return searched.order_by("-search_rank", *(searched.query.order_by or searched.model._meta.ordering))
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            "name": SEARCH_PARAM,
+            "required": False,
+            "in": "query",
+            "description": "Full-text search of title, artist, tags, description and lyrics (word prefixes match)",
+            "schema": {"type": "string"},
+        }]
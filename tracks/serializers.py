@@ -1,27 +1,31 @@
 from rest_framework import serializers
-from .models import Track, Genre, Mood
+from .models import Track, TrackRendition, Genre, Mood, Tag, RenderJob
 
 
 class GenreSerializer(serializers.ModelSerializer):
-    track_count = serializers.SerializerMethodField()
-
     class Meta:
         model = Genre
         fields = ["id", "name", "slug", "track_count"]
 
-    def get_track_count(self, obj):
-        return obj.tracks.filter(is_active=True).count()
-
 
 class MoodSerializer(serializers.ModelSerializer):
-    track_count = serializers.SerializerMethodField()
-
     class Meta:
         model = Mood
         fields = ["id", "name", "slug", "track_count"]
 
-    def get_track_count(self, obj):
-        return obj.tracks.filter(is_active=True).count()
+
+class TagSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ["name", "slug", "track_count"]
+
+
+class TrackRenditionSerializer(serializers.ModelSerializer):
+    """A compressed version of a track; request it with ?quality= on the stream URL."""
+
+    class Meta:
+        model = TrackRendition
+        fields = ["format", "quality", "bitrate", "size"]
 
 
 class TrackListSerializer(serializers.ModelSerializer):
@@ -31,6 +35,7 @@ class TrackListSerializer(serializers.ModelSerializer):
     duration_display = serializers.ReadOnlyField()
     file_size = serializers.ReadOnlyField()
     audio_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
     download_url = serializers.SerializerMethodField()
 
     class Meta:
@@ -39,7 +44,7 @@ class TrackListSerializer(serializers.ModelSerializer):
             "id", "title", "genre_name", "mood_name",
             "duration", "duration_display", "bpm",
             "download_count", "play_count",
-            "audio_url", "download_url", "file_size",
+            "audio_url", "preview_url", "download_url", "file_size",
             "is_featured", "created_at",
         ]
 
@@ -52,6 +57,15 @@ class TrackListSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(stream_path)
         return None
 
+    def get_preview_url(self, obj):
+        """Returns the preview clip URL, when the track has a current preview."""
+        request = self.context.get("request")
+        if obj.has_current_preview and request:
+            from django.urls import reverse
+            preview_path = reverse("track-preview", kwargs={"pk": obj.pk})
+            return request.build_absolute_uri(preview_path)
+        return None
+
     def get_download_url(self, obj):
         """Returns the download URL."""
         request = self.context.get("request")
@@ -69,8 +83,11 @@ class TrackDetailSerializer(serializers.ModelSerializer):
     duration_display = serializers.ReadOnlyField()
     file_size = serializers.ReadOnlyField()
     audio_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
     download_url = serializers.SerializerMethodField()
     tags_list = serializers.SerializerMethodField()
+    renditions = serializers.SerializerMethodField()
+    hls_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Track
@@ -79,8 +96,8 @@ class TrackDetailSerializer(serializers.ModelSerializer):
             "genre", "mood", "tags_list",
             "duration", "duration_display", "bpm",
             "download_count", "play_count",
-            "audio_url", "download_url", "file_size",
-            "waveform_data",
+            "audio_url", "preview_url", "download_url", "file_size",
+            "renditions", "hls_url", "waveform_data",
             "is_featured", "created_at",
         ]
 
@@ -93,6 +110,15 @@ class TrackDetailSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(stream_path)
         return None
 
+    def get_preview_url(self, obj):
+        """Returns the preview clip URL, when the track has a current preview."""
+        request = self.context.get("request")
+        if obj.has_current_preview and request:
+            from django.urls import reverse
+            preview_path = reverse("track-preview", kwargs={"pk": obj.pk})
+            return request.build_absolute_uri(preview_path)
+        return None
+
     def get_download_url(self, obj):
         """Returns the download URL."""
         request = self.context.get("request")
@@ -102,7 +128,35 @@ class TrackDetailSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(download_path)
         return None
 
+    def get_renditions(self, obj):
+        """Current renditions only; stale ones are never streamed."""
+        renditions = obj.renditions.filter(source_etag=obj.etag) if obj.etag else []
+        return TrackRenditionSerializer(renditions, many=True).data
+
+    def get_hls_url(self, obj):
+        """Master HLS playlist, when the track has been segmented."""
+        request = self.context.get("request")
+        if request and obj.etag and obj.hls_variants.filter(source_etag=obj.etag).exists():
+            from django.urls import reverse
+            return request.build_absolute_uri(reverse("track-hls", kwargs={"pk": obj.pk}))
+        return None
+
     def get_tags_list(self, obj):
+        # As written, in order; ?tag= matches their slugs (tracks.tags).
         if obj.tags:
             return [tag.strip() for tag in obj.tags.split(",") if tag.strip()]
         return []
+
+
+class RenderJobSerializer(serializers.ModelSerializer):
+    """Progress report for a queued render job."""
+
+    class Meta:
+        model = RenderJob
+        fields = [
+            "id", "kind", "status",
+            "total", "progress", "created_track_ids",
+            "error", "attempts", "max_attempts", "cancel_requested",
+            "created_at", "started_at", "finished_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,110 @@
+"""
+Keep Track.tag_set and the track_count of genres, moods and tags current.
+
+When a track is saved, its tags string is parsed into Track.tag_set (see
+tracks.tags). When it is saved or deleted, the counts of the genres,
+moods and tags it belonged to before and after are recomputed with one
+UPDATE each, so they can't drift. QuerySet.update(), bulk_create() and
+loaddata skip these signals; run `manage.py rebuild_track_counts` after
+those.
+
+Any change to the catalog also bumps the version of cached results
+(tracks.cache) once it commits.
+"""
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version
+from .models import Genre, Mood, Tag, Track
+from .tags import sync_tags
+
+# Track fields (names and attnames) that affect the counts or tag_set
+COUNTED_FIELDS = {"genre", "genre_id", "mood", "mood_id", "is_active", "tags"}
+
+
+def update_track_counts(model, pks=None):
+    """Recompute track_count of ``model`` (Genre, Mood or Tag) rows, all of them by default."""
+    # The Track field pointing at ``model`` (the reverse of its "tracks")
+    field = model._meta.get_field("tracks").field.name
+    active = (
+        Track.objects.filter(is_active=True, **{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    rows = model.objects.all() if pks is None else model.objects.filter(pk__in=pks)
+    return rows.update(track_count=Coalesce(Subquery(active), 0))
+
+
+def _refresh(genre_ids, mood_ids):
+    genre_ids = {pk for pk in genre_ids if pk is not None}
+    mood_ids = {pk for pk in mood_ids if pk is not None}
+    if genre_ids:
+        update_track_counts(Genre, genre_ids)
+    if mood_ids:
+        update_track_counts(Mood, mood_ids)
+
+
+def _counted_state(track):
+    return (track.genre_id, track.mood_id, track.is_active, track.tags)
+
+
+@receiver(pre_save, sender=Track)
+def remember_counted_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._counted_state = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not COUNTED_FIELDS.intersection(update_fields):
+        instance._counted_state = _counted_state(instance)
+        return
+    instance._counted_state = (
+        Track.objects.filter(pk=instance.pk).values_list("genre_id", "mood_id", "is_active", "tags").first()
+    )
+
+
+@receiver(post_save, sender=Track)
+def update_counts_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, "_counted_state", None)
+    new = _counted_state(instance)
+    if old == new:
+        return
+    old = old or (None, None, None, None)
+    _refresh({old[0], new[0]}, {old[1], new[1]})
+
+    tag_ids = sync_tags(instance) if created or old[3] != new[3] else set()
+    if old[2] != new[2]:
+        # (De)activated: every tag of the track changes count
+        tag_ids.update(instance.tag_set.values_list("pk", flat=True))
+    if tag_ids:
+        update_track_counts(Tag, tag_ids)
+
+
+@receiver(pre_delete, sender=Track)
+def remember_tags(sender, instance, **kwargs):
+    # The tag_set links are gone by post_delete
+    instance._deleted_tag_ids = set(instance.tag_set.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Track)
+def update_counts_on_delete(sender, instance, **kwargs):
+    _refresh({instance.genre_id}, {instance.mood_id})
+    tag_ids = getattr(instance, "_deleted_tag_ids", None)
+    if tag_ids:
+        update_track_counts(Tag, tag_ids)
+
+
+@receiver(post_save, sender=Track)
+@receiver(post_delete, sender=Track)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Mood)
+@receiver(post_delete, sender=Mood)
+def invalidate_cached_results(sender, **kwargs):
+    # Raw saves (loaddata) too: they change the catalog all the same.
+    transaction.on_commit(bump_catalog_version)
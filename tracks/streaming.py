@@ -0,0 +1,289 @@
+"""
+HTTP Range serving for track audio.
+
+Responses stream the file in CHUNK_SIZE pieces, so memory per connection
+stays constant regardless of file or range size. Single ranges on local
+storage go out as a FileResponse over a bounded file object that exposes
+``fileno()``, letting servers with ``wsgi.file_wrapper`` (gunicorn) use
+``os.sendfile``. On S3 storage each range is fetched with a ranged GET
+instead of downloading the whole object.
+"""
+import io
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+MAX_RANGES = 16  # more than this and the Range header is ignored (full 200)
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(header, size):
+    """
+    Parse a ``Range: bytes=...`` header into a list of inclusive
+    ``(start, end)`` byte ranges, sorted and with overlapping or adjacent
+    ranges merged.
+
+    Returns None when the header is absent, malformed or uses another unit
+    (the caller then serves the full file, as RFC 9110 requires), and raises
+    RangeNotSatisfiable when no range overlaps the file.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        first, sep, last = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else max(start, size - 1)
+                if start < 0 or end < start:
+                    return None
+            else:
+                suffix = int(last)  # bytes=-N: the final N bytes
+                if suffix < 0:
+                    return None
+                if suffix == 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+
+    if len(ranges) > MAX_RANGES:
+        return None
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeFile(io.RawIOBase):
+    """
+    Read-only view of ``length`` bytes of ``fileobj`` starting at ``start``.
+    Reads never go past the end of the range, and ``fileno()`` is passed
+    through so a sendfile-capable server can stream it zero-copy.
+    """
+
+    def __init__(self, fileobj, start, length, seek=True):
+        self._file = fileobj
+        self._start = start
+        self._length = length
+        self._pos = 0
+        if seek:
+            fileobj.seek(start)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        remaining = self._length - self._pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        if size <= 0:
+            return b""
+        data = self._file.read(size)
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def seekable(self):
+        return False
+
+    def fileno(self):
+        try:
+            return self._file.fileno()
+        except (AttributeError, OSError, ValueError):
+            # Not backed by an OS file (S3 body, in-memory file): servers
+            # check for AttributeError and fall back to reading chunks.
+            raise AttributeError("fileno")
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def open_range(fieldfile, start, length):
+    """Open ``length`` bytes of a FieldFile starting at ``start``."""
+    if length <= 0:
+        return RangeFile(io.BytesIO(), 0, 0)
+    storage = fieldfile.storage
+    try:
+        path = storage.path(fieldfile.name)
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        return RangeFile(open(path, "rb"), start, length)
+
+    bucket_name = getattr(storage, "bucket_name", None)
+    if bucket_name is not None:
+        # S3: fetch just this range rather than spooling the whole object.
+        key = "/".join(part for part in (storage.location.strip("/"), fieldfile.name) if part)
+        body = storage.connection.meta.client.get_object(
+            Bucket=bucket_name, Key=key, Range=f"bytes={start}-{start + length - 1}",
+        )["Body"]
+        return RangeFile(body, start, length, seek=False)
+
+    return RangeFile(storage.open(fieldfile.name, "rb"), start, length)
+
+
+def iter_range(fieldfile, start, length, chunk_size=CHUNK_SIZE):
+    with open_range(fieldfile, start, length) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def aiter_range(fieldfile, start, length, chunk_size=CHUNK_SIZE):
+    """
+    Async version of iter_range for ASGI servers. Each blocking open/read
+    runs in a worker thread only for its duration, and the next chunk is
+    not read until the server has accepted the previous one, so a slow
+    client holds one coroutine and one chunk, not a thread.
+    """
+    f = await sync_to_async(open_range, thread_sensitive=False)(fieldfile, start, length)
+    try:
+        while True:
+            chunk = await sync_to_async(f.read, thread_sensitive=False)(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(f.close, thread_sensitive=False)()
+
+
+async def aiter_sync(iterator):
+    """
+    Iterate a blocking iterator (e.g. a chunked render) from ASGI, each
+    ``next()`` in a worker thread once the previous chunk has been sent.
+    """
+    done = object()
+    while True:
+        chunk = await sync_to_async(next, thread_sensitive=False)(iterator, done)
+        if chunk is done:
+            break
+        yield chunk
+
+
+def if_range_matches(request, etag=None, last_modified=None):
+    """
+    Whether a Range header may be honored given the request's If-Range:
+    the validator must equal the current strong ETag or Last-Modified
+    (a Unix timestamp); otherwise the full file is sent.
+    """
+    if_range = request.META.get("HTTP_IF_RANGE", "").strip()
+    if not if_range:
+        return True
+    if if_range.startswith(("\"", "W/")):
+        return etag is not None and if_range == etag
+    if_range_date = parse_http_date_safe(if_range)
+    return (
+        if_range_date is not None
+        and last_modified is not None
+        and if_range_date == int(last_modified)
+    )
+
+
+def range_response(request, fieldfile, content_type, size=None, etag=None, last_modified=None, asynchronous=False):
+    """
+    Serve ``fieldfile`` honoring the request's Range header: 200 with the
+    whole file, 206 with one range or a multipart/byteranges body, or 416.
+    ``etag`` (quoted) and ``last_modified`` are checked against If-Range.
+    With ``asynchronous=True`` the body is an async iterator (for ASGI).
+    """
+    size = fieldfile.size if size is None else size
+    range_header = request.META.get("HTTP_RANGE", "")
+    if range_header and not if_range_matches(request, etag, last_modified):
+        range_header = ""
+    try:
+        ranges = parse_range_header(range_header, size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if ranges is not None and len(ranges) > 1:
+        return _multipart_response(fieldfile, ranges, size, content_type, asynchronous)
+
+    start, end = ranges[0] if ranges else (0, size - 1)
+    length = end - start + 1
+    if asynchronous:
+        response = StreamingHttpResponse(aiter_range(fieldfile, start, length), content_type=content_type)
+    else:
+        response = FileResponse(open_range(fieldfile, start, length), content_type=content_type)
+        response.block_size = CHUNK_SIZE
+    response["Content-Length"] = length
+    if ranges:
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+def _multipart_response(fieldfile, ranges, size, content_type, asynchronous=False):
+    boundary = uuid.uuid4().hex
+    headers = [
+        (
+            f"--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode()
+        for start, end in ranges
+    ]
+    closing = f"\r\n--{boundary}--\r\n".encode()
+    length = (
+        sum(len(h) for h in headers)
+        + sum(end - start + 1 for start, end in ranges)
+        + 2 * (len(ranges) - 1)  # CRLF before each following boundary
+        + len(closing)
+    )
+
+    def body():
+        for i, ((start, end), header) in enumerate(zip(ranges, headers)):
+            yield (b"\r\n" if i else b"") + header
+            yield from iter_range(fieldfile, start, end - start + 1)
+        yield closing
+
+    async def abody():
+        for i, ((start, end), header) in enumerate(zip(ranges, headers)):
+            yield (b"\r\n" if i else b"") + header
+            async for chunk in aiter_range(fieldfile, start, end - start + 1):
+                yield chunk
+        yield closing
+
+    response = StreamingHttpResponse(
+        abody() if asynchronous else body(),
+        status=206,
+        content_type=f"multipart/byteranges; boundary={boundary}",
+    )
+    response["Content-Length"] = length
+    return response
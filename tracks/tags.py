@@ -0,0 +1,85 @@
+"""
+Normalized track tags.
+
+Track.tags stays the editable, comma-separated string (it is also what
+the search index reads), but every save parses it into Tag rows linked
+through Track.tag_set, an indexed many-to-many table. ``?tag=`` filters
+and the ``/api/tracks/tags/`` facet join that table instead of matching
+substrings of the string, so they only touch the tracks that carry the
+tag.
+
+Tags are identified by slug: "Hip Hop", "hip-hop" and "hip hop " are all
+the tag ``hip-hop``, named after the first spelling seen.
+"""
+from django.db.models import Count
+from django.utils.text import slugify
+
+from .models import Tag
+
+MAX_TAG_LENGTH = 50
+
+
+def normalize_tag(value):
+    """Lower-cased, whitespace-collapsed tag name."""
+    return " ".join(value.lower().split())[:MAX_TAG_LENGTH]
+
+
+def split_tags(value):
+    """
+    The tags of a comma-separated string as ``{slug: name}``, in order,
+    without duplicates or tags that have no slug (e.g. "!!!").
+    """
+    tags = {}
+    for part in (value or "").split(","):
+        name = normalize_tag(part)
+        slug = slugify(name)[:MAX_TAG_LENGTH]
+        if slug and slug not in tags:
+            tags[slug] = name
+    return tags
+
+
+def get_or_create_tags(tags):
+    """Map each slug of ``tags`` ({slug: name}) to its Tag id, creating missing ones."""
+    ids = dict(Tag.objects.filter(slug__in=tags).values_list("slug", "pk"))
+    missing = [Tag(slug=slug, name=name) for slug, name in tags.items() if slug not in ids]
+    if missing:
+        # Another process may create the same tag meanwhile; read back the ids.
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        ids = dict(Tag.objects.filter(slug__in=tags).values_list("slug", "pk"))
+    return ids
+
+
+def sync_tags(track):
+    """
+    Link ``track`` to exactly the tags in its ``tags`` string. Returns the
+    ids of the tags that were added or removed.
+    """
+    wanted = set(get_or_create_tags(split_tags(track.tags)).values())
+    current = set(track.tag_set.values_list("pk", flat=True))
+    if wanted - current:
+        track.tag_set.add(*(wanted - current))
+    if current - wanted:
+        track.tag_set.remove(*(current - wanted))
+    return wanted ^ current
+
+
+def tag_facets(tracks=None, limit=None):
+    """
+    ``[(tag, count)]`` most used first. Over all active tracks the stored
+    Tag.track_count is used; for a narrowed ``tracks`` queryset the tag_set
+    links of just those tracks are counted, in one grouped query.
+    """
+    if tracks is None:
+        tags = Tag.objects.filter(track_count__gt=0).order_by("-track_count", "name")
+        return [(tag, tag.track_count) for tag in tags[:limit]]
+
+    # Grouped on the filtered queryset itself rather than as a subquery:
+    # tracks.search refers to tracks_track by name, which a subquery aliases.
+    counts = list(
+        tracks.filter(tag_set__isnull=False)
+        .values_list("tag_set")
+        .annotate(n=Count("pk"))
+        .order_by("-n", "tag_set")[:limit]
+    )
+    tags = Tag.objects.in_bulk([tag_id for tag_id, _ in counts])
+    return sorted(((tags[tag_id], n) for tag_id, n in counts), key=lambda facet: (-facet[1], facet[0].name))
@@ -0,0 +1,899 @@
+import base64
+import hashlib
+import io
+import math
+import mimetypes
+import os
+import random
+import shutil
+import struct
+import tempfile
+import wave
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.throttling import SimpleRateThrottle
+
+from . import async_views, hls, jobs
+from .cache import response_cache_stats
+from .counters import COUNTERS
+from .generator import effects, encoder, render_track
+from .generator.cache import RenderCache
+from .models import Genre, Mood, RenderJob, Tag, Track, TrackRendition
+from .search import TrackSearchFilter
+from .transcoding import negotiate_format
+
+
+def _struct_pack_wav(samples, sr=22050):
+    # The per-sample encoder the vectorized one replaced
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sr)
+        wf.writeframes(b"".join(struct.pack("<h", max(-32767, min(32767, int(s * 32767)))) for s in samples))
+    return buf.getvalue()
+
+
+class EncoderTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(5)
+        # Past the clip range too, and longer than one CHUNK_FRAMES slice
+        self.samples = [rng.uniform(-1.2, 1.2) for _ in range(encoder.CHUNK_FRAMES + 1000)]
+
+    def test_pcm16_matches_struct_pack(self):
+        expected = _struct_pack_wav(self.samples)
+        self.assertEqual(bytes(encoder.encode_wav(self.samples)), expected)
+        self.assertEqual(bytes(encoder.encode_wav(np.array(self.samples))), expected)
+        float32 = np.array(self.samples, dtype=np.float32)
+        self.assertEqual(bytes(encoder.encode_wav(float32)), _struct_pack_wav(float32.tolist()))
+
+    def test_pcm16_output_is_pinned(self):
+        digest = hashlib.sha256(encoder.encode_wav(self.samples)).hexdigest()
+        self.assertEqual(digest, "965dace005821d7be24e91d6751bf186445bda481833c1ff9bdedc33434ed298")
+
+    def test_stream_writer_matches_encode_wav(self):
+        buf = io.BytesIO()
+        with encoder.WavStreamWriter(buf) as writer:
+            writer.write(np.array(self.samples[:5000]))
+            writer.write(np.array(self.samples[5000:]))
+        self.assertEqual(buf.getvalue(), bytes(encoder.encode_wav(self.samples)))
+
+
+class LowPassTests(SimpleTestCase):
+    def test_matches_per_sample_loop_above_nyquist(self):
+        rng = random.Random(3)
+        samples = [rng.uniform(-1.0, 1.0) for _ in range(3000)]
+        for cutoff in (200.0, 15000.0, 40000.0):
+            rc = 1.0 / (2.0 * math.pi * cutoff)
+            dt = 1.0 / 22050
+            alpha = dt / (rc + dt)
+            expected = [alpha * samples[0]]
+            for sample in samples[1:]:
+                expected.append(expected[-1] + alpha * (sample - expected[-1]))
+            np.testing.assert_allclose(effects.low_pass_filter(samples, cutoff), expected, atol=1e-6)
+
+
+class RenderCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_overwrite_does_not_grow_size(self):
+        cache = RenderCache(self.directory, max_bytes=1000)
+        cache.size_bytes()
+        for _ in range(5):
+            cache.put("ab" * 32, b"x" * 300)
+        self.assertEqual(cache.size_bytes(), 300)
+        self.assertEqual(cache.evictions, 0)
+
+    def test_seeded_render_leaves_global_random_alone(self):
+        random.seed(1)
+        expected = random.random()
+        random.seed(1)
+        render_track("lofi", duration=1, seed=7)
+        self.assertEqual(random.random(), expected)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class QueryCountTests(TestCase):
+    """Reads that must not go back to one query per row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.genres = [Genre.objects.create(name=f"Genre {i}", slug=f"genre-{i}") for i in range(3)]
+        cls.moods = [Mood.objects.create(name=f"Mood {i}", slug=f"mood-{i}") for i in range(3)]
+        for i in range(6):
+            track = Track.objects.create(
+                title=f"Track {i}", genre=cls.genres[i % 3], mood=cls.moods[i % 3], tags="Lofi, Hip Hop,night",
+            )
+        # etag is only computed from an audio file; the detail view queries
+        # renditions and HLS variants only for tracks that have one.
+        Track.objects.filter(pk=track.pk).update(etag="0" * 64)
+        cls.track = track
+
+    def test_genres_use_denormalized_track_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("track-genres"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([genre["track_count"] for genre in response.json()], [2, 2, 2])
+
+    def test_moods_use_denormalized_track_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("track-moods"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([mood["track_count"] for mood in response.json()], [2, 2, 2])
+
+    def test_detail(self):
+        # Track with genre and mood, renditions, HLS variants
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("track-detail", kwargs={"pk": self.track.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["tags_list"], ["Lofi", "Hip Hop", "night"])
+
+
+class TempMediaMixin:
+    """Stores the files a test case saves in a temporary MEDIA_ROOT."""
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media_root))
+        super().setUpClass()
+
+
+@override_settings(RENDER_CACHE_DIR="", RENDER_WORKER_PROCESSES=1, AUDIO_TRANSCODE_ON_INGEST=False)
+class RenderJobTests(TempMediaMixin, TestCase):
+    def _enqueue(self):
+        return jobs.enqueue_seed_job(1, duration=1)
+
+    @override_settings(RENDER_MAX_CONCURRENT_JOBS=1)
+    def test_claim_respects_running_cap(self):
+        first, second = self._enqueue(), self._enqueue()
+        claimed = jobs.claim_next_job("worker-1")
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, RenderJob.Status.RUNNING)
+        self.assertIsNone(jobs.claim_next_job("worker-2"))
+
+        jobs.run_job(claimed)
+        self.assertEqual(jobs.claim_next_job("worker-2").pk, second.pk)
+
+    def test_seed_job_creates_hashed_tracks(self):
+        self._enqueue()
+        job = jobs.run_job(jobs.claim_next_job("worker-1"))
+        self.assertEqual(job.status, RenderJob.Status.SUCCEEDED)
+        self.assertEqual(job.progress, 1)
+        track = Track.objects.get(pk=job.created_track_ids[0])
+        self.assertEqual(track.etag, track.compute_etag())
+
+    def test_cancel_queued_job(self):
+        job = jobs.cancel_job(self._enqueue())
+        self.assertEqual(job.status, RenderJob.Status.CANCELLED)
+        self.assertIsNone(jobs.claim_next_job("worker-1"))
+
+    def test_cancel_running_job(self):
+        self._enqueue()
+        claimed = jobs.claim_next_job("worker-1")
+        self.assertTrue(jobs.cancel_job(claimed).cancel_requested)
+        job = jobs.run_job(claimed)
+        self.assertEqual(job.status, RenderJob.Status.CANCELLED)
+        self.assertFalse(Track.objects.exists())
+
+    def test_requeued_job_is_left_to_its_new_worker(self):
+        self._enqueue()
+        stale = jobs.claim_next_job("worker-1")
+        RenderJob.objects.filter(pk=stale.pk).update(
+            heartbeat_at=timezone.now() - timedelta(seconds=settings.RENDER_JOB_TIMEOUT + 1),
+        )
+        current = jobs.claim_next_job("worker-2")
+        self.assertEqual(current.pk, stale.pk)
+
+        with self.assertLogs("tracks.jobs", "WARNING"):
+            job = jobs.run_job(stale)
+        self.assertEqual(job.status, RenderJob.Status.RUNNING)
+        self.assertEqual(job.worker_id, "worker-2")
+        self.assertFalse(Track.objects.exists())
+
+
+AUDIO = bytes(range(256)) * 4
+
+
+def _create_audio_track(title="Track", data=AUDIO, **fields):
+    track = Track(title=title, **fields)
+    track.audio_file = SimpleUploadedFile(f"{title.lower()}.wav", data, content_type="audio/wav")
+    track.save()
+    return track
+
+
+@override_settings(AUDIO_DELIVERY_MODE="proxy")
+class RangeTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.track = _create_audio_track()
+        cls.url = reverse("track-stream", kwargs={"pk": cls.track.pk})
+
+    def test_full_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Length"], str(len(AUDIO)))
+        self.assertEqual(response.getvalue(), AUDIO)
+
+    def test_range(self):
+        response = self.client.get(self.url, headers={"range": "bytes=10-19"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(AUDIO)}")
+        self.assertEqual(response.getvalue(), AUDIO[10:20])
+
+    def test_open_ended_and_suffix_ranges(self):
+        response = self.client.get(self.url, headers={"range": "bytes=1000-"})
+        self.assertEqual(response["Content-Range"], f"bytes 1000-1023/{len(AUDIO)}")
+        self.assertEqual(response.getvalue(), AUDIO[1000:])
+
+        response = self.client.get(self.url, headers={"range": "bytes=-5"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 1019-1023/{len(AUDIO)}")
+        self.assertEqual(response.getvalue(), AUDIO[-5:])
+
+    def test_multiple_ranges(self):
+        # The last two overlap and are merged into one part
+        response = self.client.get(self.url, headers={"range": "bytes=0-1,10-12,12-14"})
+        self.assertEqual(response.status_code, 206)
+        content_type, _, boundary = response["Content-Type"].partition("; boundary=")
+        self.assertEqual(content_type, "multipart/byteranges")
+        body = response.getvalue()
+        self.assertEqual(response["Content-Length"], str(len(body)))
+        parts = body.split(f"--{boundary}".encode())
+        self.assertEqual(parts[0], b"")
+        self.assertEqual(parts[-1], b"--\r\n")
+        self.assertEqual(len(parts), 4)
+        self.assertIn(f"Content-Range: bytes 0-1/{len(AUDIO)}\r\n\r\n".encode() + AUDIO[0:2] + b"\r\n", parts[1])
+        self.assertIn(f"Content-Range: bytes 10-14/{len(AUDIO)}\r\n\r\n".encode() + AUDIO[10:15] + b"\r\n", parts[2])
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, headers={"range": f"bytes={len(AUDIO)}-"})
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(AUDIO)}")
+
+    def test_malformed_range_sends_whole_file(self):
+        for header in ("bytes=abc", "items=0-1", "bytes=5-1"):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, headers={"range": header})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.getvalue(), AUDIO)
+
+
+@override_settings(AUDIO_DELIVERY_MODE="proxy")
+class ConditionalRequestTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.track = _create_audio_track()
+        cls.url = reverse("track-stream", kwargs={"pk": cls.track.pk})
+        cls.etag = f'"{hashlib.sha256(AUDIO).hexdigest()}"'
+
+    def test_upload_is_hashed_on_save(self):
+        self.assertEqual(f'"{self.track.etag}"', self.etag)
+        response = self.client.get(self.url)
+        self.assertEqual(response["ETag"], self.etag)
+        self.assertIn("Last-Modified", response)
+
+    def test_saving_a_stored_file_does_not_read_it_back(self):
+        Track.objects.filter(pk=self.track.pk).update(etag="")
+        track = Track.objects.get(pk=self.track.pk)
+        track.title = "Renamed"
+        with mock.patch.object(FileSystemStorage, "open", side_effect=AssertionError("read from storage")):
+            track.save()
+        self.assertEqual(track.etag, "")
+
+    def test_if_none_match(self):
+        for url in (self.url, reverse("track-download", kwargs={"pk": self.track.pk})):
+            with self.subTest(url=url):
+                response = self.client.get(url, headers={"if-none-match": self.etag})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], self.etag)
+                response = self.client.get(url, headers={"if-none-match": '"stale"'})
+                self.assertEqual(response.status_code, 200)
+
+    def test_if_range(self):
+        response = self.client.get(self.url, headers={"range": "bytes=0-9", "if-range": self.etag})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.getvalue(), AUDIO[:10])
+
+        # The file changed since the client's copy: send all of it
+        response = self.client.get(self.url, headers={"range": "bytes=0-9", "if-range": '"stale"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.getvalue(), AUDIO)
+
+    def test_track_without_etag_sends_no_validator(self):
+        Track.objects.filter(pk=self.track.pk).update(etag="")
+        response = self.client.get(self.url, headers={"range": "bytes=0-9", "if-range": self.etag})
+        self.assertNotIn("ETag", response)
+        self.assertEqual(response.status_code, 200)
+
+
+class _RemoteStorage(FileSystemStorage):
+    """Local files posing as object storage: no path(), and S3's url() signature."""
+
+    querystring_auth = True
+
+    def path(self, name):
+        raise NotImplementedError
+
+    def url(self, name, parameters=None, expire=None):
+        return f"https://bucket.example/{name}?{urlencode({**(parameters or {}), 'expire': expire})}"
+
+
+@override_settings(AUDIO_DELIVERY_MODE="redirect", AUDIO_URL_EXPIRE=300)
+class RedirectDeliveryTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.track = _create_audio_track(title="Night Drive")
+
+    def _remote(self):
+        return mock.patch.object(Track._meta.get_field("audio_file"), "storage", _RemoteStorage())
+
+    def test_stream_redirects_to_object_url(self):
+        with self._remote():
+            response = self.client.get(reverse("track-stream", kwargs={"pk": self.track.pk}))
+        self.assertEqual(response.status_code, 302)
+        url = urlsplit(response["Location"])
+        self.assertEqual(f"{url.scheme}://{url.netloc}{url.path}", f"https://bucket.example/{self.track.audio_file.name}")
+        query = parse_qs(url.query)
+        self.assertEqual(query["expire"], ["300"])
+        self.assertEqual(query["ResponseContentType"], [mimetypes.guess_type("track.wav")[0]])
+        # Cached for less than the signed URL lives
+        self.assertEqual(response["Cache-Control"], "private, max-age=150")
+
+    def test_download_redirect_names_the_file(self):
+        with self._remote():
+            response = self.client.get(reverse("track-download", kwargs={"pk": self.track.pk}))
+        self.assertEqual(response.status_code, 302)
+        query = parse_qs(urlsplit(response["Location"]).query)
+        self.assertEqual(query["ResponseContentDisposition"], ['attachment; filename="Night_Drive.wav"'])
+
+    def test_local_storage_is_proxied(self):
+        response = self.client.get(reverse("track-stream", kwargs={"pk": self.track.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.getvalue(), AUDIO)
+
+
+@override_settings(AUDIO_DELIVERY_MODE="accel", AUDIO_ACCEL_HEADER="X-Accel-Redirect", AUDIO_ACCEL_PREFIX="/protected-media/")
+class AccelDeliveryTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.track = _create_audio_track(title="Night Drive")
+
+    def test_stream_hands_the_file_to_the_front_server(self):
+        response = self.client.get(
+            reverse("track-stream", kwargs={"pk": self.track.pk}), headers={"range": "bytes=0-9"},
+        )
+        # nginx applies the Range itself
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.track.audio_file.name}")
+        self.assertEqual(response["ETag"], f'"{self.track.etag}"')
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_conditional_requests_are_answered_by_django(self):
+        response = self.client.get(
+            reverse("track-stream", kwargs={"pk": self.track.pk}), headers={"if-none-match": f'"{self.track.etag}"'},
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertNotIn("X-Accel-Redirect", response)
+
+    def test_download(self):
+        response = self.client.get(reverse("track-download", kwargs={"pk": self.track.pk}))
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.track.audio_file.name}")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="Night_Drive.wav"')
+
+    @override_settings(AUDIO_ACCEL_HEADER="X-Sendfile")
+    def test_x_sendfile_uses_the_absolute_path(self):
+        response = self.client.get(reverse("track-stream", kwargs={"pk": self.track.pk}))
+        self.assertEqual(response["X-Sendfile"], self.track.audio_file.path)
+        self.assertNotIn("X-Accel-Redirect", response)
+
+
+@override_settings(AUDIO_DELIVERY_MODE="proxy")
+class AsyncViewTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.track = _create_audio_track()
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        rates = mock.patch.object(SimpleRateThrottle, "THROTTLE_RATES", {"anon": "2/min", "generate": "1/min"})
+        rates.start()
+        self.addCleanup(rates.stop)
+
+    def _request(self, headers=None):
+        request = AsyncRequestFactory().get("/", headers=headers)
+        request.user = AnonymousUser()
+        return request
+
+    async def _body(self, response):
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    async def test_stream(self):
+        response = await async_views.stream(self._request({"range": "bytes=10-19"}), self.track.pk)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(await self._body(response), AUDIO[10:20])
+
+    async def test_stream_and_download_share_the_anon_throttle(self):
+        for view in (async_views.stream, async_views.download):
+            response = await view(self._request(), self.track.pk)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(await self._body(response), AUDIO)
+        response = await async_views.download(self._request(), self.track.pk)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "60")
+
+    async def test_throttled_download_is_not_counted(self):
+        for _ in range(3):
+            await async_views.download(self._request({"if-none-match": f'"{self.track.etag}"'}), self.track.pk)
+        with mock.patch.object(COUNTERS, "increment") as increment:
+            response = await async_views.download(self._request(), self.track.pk)
+        self.assertEqual(response.status_code, 429)
+        increment.assert_not_called()
+
+
+class NegotiateFormatTests(SimpleTestCase):
+    FORMATS = ["mp3", "aac", "opus"]
+
+    def test_server_preference_breaks_ties(self):
+        for accept in ("", "*/*", "audio/*", "audio/mpeg, audio/ogg"):
+            with self.subTest(accept=accept):
+                self.assertEqual(negotiate_format(accept, self.FORMATS), "mp3")
+
+    def test_highest_q_wins(self):
+        self.assertEqual(negotiate_format("audio/ogg", self.FORMATS), "opus")
+        self.assertEqual(negotiate_format("audio/*;q=0.5, audio/mp4", self.FORMATS), "aac")
+        self.assertEqual(negotiate_format("audio/mpeg;q=0.8, application/ogg;q=0.9", self.FORMATS), "opus")
+
+    def test_nothing_acceptable(self):
+        self.assertIsNone(negotiate_format("audio/mpeg;q=0", ["mp3"]))
+        self.assertIsNone(negotiate_format("video/*", self.FORMATS))
+        self.assertIsNone(negotiate_format("audio/ogg", ["mp3", "aac"]))
+
+
+@override_settings(AUDIO_DELIVERY_MODE="proxy", AUDIO_RENDITION_FORMATS=["mp3", "opus"], AUDIO_DEFAULT_QUALITY="medium")
+class RenditionTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.track = _create_audio_track()
+        cls.url = reverse("track-stream", kwargs={"pk": cls.track.pk})
+        for fmt, data in (("mp3", b"mp3 data"), ("opus", b"opus data")):
+            TrackRendition.objects.create(
+                track=cls.track, format=fmt, quality="medium", bitrate=128,
+                audio_file=SimpleUploadedFile(f"track.{fmt}", data), size=len(data),
+                etag=hashlib.sha256(data).hexdigest(), source_etag=cls.track.etag,
+            )
+
+    def test_stream_sends_the_negotiated_rendition(self):
+        for accept, content_type, body in (
+            ("", "audio/mpeg", b"mp3 data"),
+            ("audio/ogg, audio/mpeg;q=0.5", "audio/ogg", b"opus data"),
+        ):
+            with self.subTest(accept=accept):
+                response = self.client.get(self.url, headers={"accept": accept} if accept else {})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], content_type)
+                self.assertIn("Accept", response["Vary"])
+                self.assertEqual(response.getvalue(), body)
+
+    def test_original(self):
+        for query, headers in (({"quality": "original"}, {}), ({}, {"accept": "audio/mp4"})):
+            with self.subTest(query=query, headers=headers):
+                response = self.client.get(self.url, query, headers=headers)
+                self.assertEqual(response.getvalue(), AUDIO)
+
+    def test_stale_renditions_are_not_sent(self):
+        TrackRendition.objects.filter(track=self.track).update(source_etag="0" * 64)
+        response = self.client.get(self.url)
+        self.assertEqual(response.getvalue(), AUDIO)
+        self.assertEqual(self.client.get(reverse("track-detail", kwargs={"pk": self.track.pk})).json()["renditions"], [])
+
+
+class TrackAdminTests(TempMediaMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser("admin", "admin@example.com", "password")
+        cls.genre = Genre.objects.create(name="Lo-Fi", slug="lo-fi")
+        cls.mood = Mood.objects.create(name="Chill", slug="chill")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _post(self, url, **fields):
+        data = {
+            "title": "Upload", "description": "", "genre": self.genre.pk, "mood": self.mood.pk,
+            "tags": "", "duration": 1, "bpm": "", "is_active": "on",
+            "renditions-TOTAL_FORMS": 0, "renditions-INITIAL_FORMS": 0,
+            "hls_variants-TOTAL_FORMS": 0, "hls_variants-INITIAL_FORMS": 0,
+            **fields,
+        }
+        with mock.patch("tracks.admin.transcode_on_ingest") as transcode:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        return transcode
+
+    def test_new_and_replaced_audio_is_transcoded(self):
+        transcode = self._post(
+            reverse("admin:tracks_track_add"), audio_file=SimpleUploadedFile("upload.wav", AUDIO),
+        )
+        track = Track.objects.get(title="Upload")
+        transcode.assert_called_once_with(track)
+        self.assertEqual(track.etag, hashlib.sha256(AUDIO).hexdigest())
+
+        change_url = reverse("admin:tracks_track_change", args=[track.pk])
+        transcode = self._post(change_url, title="Renamed")
+        transcode.assert_not_called()
+
+        transcode = self._post(change_url, audio_file=SimpleUploadedFile("other.wav", b"other"))
+        transcode.assert_called_once()
+        track.refresh_from_db()
+        self.assertEqual(track.etag, hashlib.sha256(b"other").hexdigest())
+
+
+@override_settings(AUDIO_DELIVERY_MODE="proxy", AUDIO_DEFAULT_QUALITY="medium")
+class HLSTests(TempMediaMixin, TestCase):
+    SEGMENTS = [b"segment 0" * 100, b"segment 1" * 80]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.track = _create_audio_track()
+        for quality, bitrate in (("low", 48), ("medium", 96)):
+            with tempfile.TemporaryDirectory() as tmp:
+                cut = []
+                for index, data in enumerate(cls.SEGMENTS):
+                    path = os.path.join(tmp, f"{index}.ts")
+                    with open(path, "wb") as f:
+                        f.write(data)
+                    cut.append((path, 6.0 - index))
+                hls._store_variant(cls.track, quality, bitrate, cut)
+        cls.base = reverse("track-hls", kwargs={"pk": cls.track.pk}).rsplit("/", 1)[0]
+
+    def test_master_playlist_lists_the_default_quality_first(self):
+        response = self.client.get(f"{self.base}/master.m3u8")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], hls.PLAYLIST_CONTENT_TYPE)
+        self.assertEqual(response["Cache-Control"], "public, max-age=60")
+        uris = [line for line in response.content.decode().splitlines() if not line.startswith("#")]
+        self.assertEqual(uris, ["medium.m3u8", "low.m3u8"])
+
+        detail = self.client.get(reverse("track-detail", kwargs={"pk": self.track.pk})).json()
+        self.assertEqual(detail["hls_url"], f"http://testserver{self.base}/master.m3u8")
+
+    def test_segment_urls_from_the_media_playlist(self):
+        playlist = self.client.get(f"{self.base}/medium.m3u8").content.decode()
+        self.assertIn("#EXT-X-TARGETDURATION:6", playlist)
+        self.assertTrue(playlist.endswith("#EXT-X-ENDLIST\n"))
+        uris = [line for line in playlist.splitlines() if not line.startswith("#")]
+        self.assertEqual(len(uris), 2)
+        for uri, data in zip(uris, self.SEGMENTS):
+            self.assertRegex(uri, rf"^medium/\d{{4}}-{hashlib.sha256(data).hexdigest()[:12]}\.ts$")
+            response = self.client.get(f"{self.base}/{uri}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], hls.SEGMENT_CONTENT_TYPE)
+            self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+            self.assertEqual(response.getvalue(), data)
+
+    def test_unknown_segment(self):
+        for name in ("0000-000000000000", "0000", "abcd-" + hashlib.sha256(self.SEGMENTS[0]).hexdigest()[:12]):
+            with self.subTest(name=name):
+                self.assertEqual(self.client.get(f"{self.base}/medium/{name}.ts").status_code, 404)
+
+    def test_stale_variants_are_not_served(self):
+        Track.objects.filter(pk=self.track.pk).update(etag="0" * 64)
+        self.assertEqual(self.client.get(f"{self.base}/master.m3u8").status_code, 404)
+        self.assertEqual(self.client.get(f"{self.base}/medium.m3u8").status_code, 404)
+        detail = self.client.get(reverse("track-detail", kwargs={"pk": self.track.pk})).json()
+        self.assertIsNone(detail["hls_url"])
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.title_match = Track.objects.create(title="Midnight Drive", tags="lofi,night")
+        cls.description_match = Track.objects.create(title="City Lights", description="A walk after midnight")
+        cls.other = Track.objects.create(title="Ocean Whisper", tags="ambient,waves")
+
+    def _search(self, text):
+        return [track.title for track in TrackSearchFilter().filter_queryset(
+            Request(RequestFactory().get("/", {"search": text})), Track.objects.all(), None,
+        )]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self._search("midnight"), ["Midnight Drive", "City Lights"])
+
+    def test_prefixes_stems_and_every_term(self):
+        self.assertEqual(self._search("midn"), ["Midnight Drive", "City Lights"])
+        self.assertEqual(self._search("drives"), ["Midnight Drive"])
+        self.assertEqual(self._search("midnight lofi"), ["Midnight Drive"])
+        self.assertEqual(self._search("midnight waves"), [])
+        # Quotes and operators are not FTS syntax; OR is just a word
+        self.assertEqual(self._search('"wave*" -'), ["Ocean Whisper"])
+        self.assertEqual(self._search("waves OR midnight"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        Track.objects.filter(pk=self.other.pk).update(title="Midnight Ocean")
+        self.assertEqual(self._search("ocean"), ["Midnight Ocean"])
+        self.assertEqual(self._search("whisper"), [])
+        self.assertEqual(len(self._search("midnight")), 3)
+
+        self.title_match.delete()
+        self.assertEqual(self._search("drive"), [])
+        Track.objects.create(title="Night Drive")
+        self.assertEqual(self._search("drive"), ["Night Drive"])
+
+    def test_api(self):
+        response = self.client.get(reverse("track-list"), {"search": "midn", "ordering": "created_at"})
+        self.assertEqual(response.status_code, 200)
+        # An explicit ordering replaces the rank
+        self.assertEqual([t["title"] for t in response.json()["results"]], ["Midnight Drive", "City Lights"])
+        response = self.client.get(reverse("track-list"), {"search": "midn", "ordering": "-created_at"})
+        self.assertEqual([t["title"] for t in response.json()["results"]], ["City Lights", "Midnight Drive"])
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class TagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.hip_hop = Track.objects.create(title="Urban Groove", tags="Hip Hop, beat")
+        cls.hip_hop_2 = Track.objects.create(title="Bass Drop", tags="hip-hop,bass")
+        cls.other = Track.objects.create(title="Hipster Jazz", tags="jazz,hipster")
+
+    def _titles(self, **params):
+        response = self.client.get(reverse("track-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(track["title"] for track in response.json()["results"])
+
+    def test_tag_filter_matches_by_slug(self):
+        for value in ("hip-hop", "Hip Hop", " HIP  hop "):
+            with self.subTest(value=value):
+                self.assertEqual(self._titles(tag=value), ["Bass Drop", "Urban Groove"])
+        # Whole tags only, not substrings of the tags string
+        self.assertEqual(self._titles(tag="hip"), [])
+
+    def test_tags_follow_edits_and_deactivation(self):
+        self.hip_hop.tags = "beat"
+        self.hip_hop.save()
+        self.assertEqual(self._titles(tag="hip-hop"), ["Bass Drop"])
+        self.assertEqual(Tag.objects.get(slug="hip-hop").track_count, 1)
+
+        self.hip_hop_2.is_active = False
+        self.hip_hop_2.save()
+        self.assertEqual(self._titles(tag="hip-hop"), [])
+        self.assertEqual(Tag.objects.get(slug="hip-hop").track_count, 0)
+
+    def test_tag_facets(self):
+        response = self.client.get(reverse("track-tags"))
+        counts = {tag["slug"]: tag["track_count"] for tag in response.json()}
+        self.assertEqual(counts, {"hip-hop": 2, "beat": 1, "bass": 1, "jazz": 1, "hipster": 1})
+        self.assertEqual(response.json()[0]["slug"], "hip-hop")
+
+        response = self.client.get(reverse("track-tags"), {"search": "groove"})
+        self.assertEqual({tag["slug"]: tag["track_count"] for tag in response.json()}, {"hip-hop": 1, "beat": 1})
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Ties on download_count across page boundaries
+        for i, downloads in enumerate([5, 5, 5, 3, 3, 1, 0]):
+            Track.objects.create(title=f"Track {i}", download_count=downloads)
+
+    def _walk(self, **params):
+        url, pages, titles = reverse("track-list"), 0, []
+        params = {"cursor": "", "page_size": 2, **params}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertNotIn("previous", body)
+            titles += [track["title"] for track in body["results"]]
+            url, params, pages = body["next"], {}, pages + 1
+        return titles, pages
+
+    def test_walks_every_track_once(self):
+        for ordering in ("-download_count", "download_count", "-created_at", "created_at"):
+            with self.subTest(ordering=ordering):
+                tiebreak = "-pk" if ordering.startswith("-") else "pk"
+                expected = list(Track.objects.order_by(ordering, tiebreak).values_list("title", flat=True))
+                titles, pages = self._walk(ordering=ordering)
+                self.assertEqual(titles, expected)
+                self.assertEqual(pages, 4)
+
+    def test_count_only_on_request(self):
+        response = self.client.get(reverse("track-list"), {"cursor": ""})
+        self.assertNotIn("count", response.json())
+        response = self.client.get(reverse("track-list"), {"cursor": "", "count": "true"})
+        self.assertEqual(response.json()["count"], 7)
+        # Page numbers are unchanged
+        response = self.client.get(reverse("track-list"), {"page": 1})
+        self.assertEqual(response.json()["count"], 7)
+
+    def test_invalid_cursor(self):
+        next_url = self.client.get(
+            reverse("track-list"), {"cursor": "", "page_size": 2, "ordering": "-download_count"},
+        ).json()["next"]
+        cursor = parse_qs(urlsplit(next_url).query)["cursor"][0]
+        for params in (
+            {"cursor": "not-a-cursor"},
+            {"cursor": base64.urlsafe_b64encode(b'{"o":"-download_count"}').decode()},
+            # A cursor only continues the ordering it was made for
+            {"cursor": cursor, "ordering": "-created_at"},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse("track-list"), params).status_code, 404)
+
+    def test_unindexed_ordering(self):
+        response = self.client.get(reverse("track-list"), {"cursor": "", "ordering": "bpm"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ordering", response.json())
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        lofi = Genre.objects.create(name="Lofi", slug="lofi")
+        jazz = Genre.objects.create(name="Jazz", slug="jazz")
+        chill = Mood.objects.create(name="Chill", slug="chill")
+        dark = Mood.objects.create(name="Dark", slug="dark")
+        for genre, mood, bpm, duration, featured, tags in [
+            (lofi, chill, 85, 150, True, "night"),
+            (lofi, chill, 70, 90, False, ""),
+            (jazz, chill, 110, 200, False, "night"),
+            (jazz, dark, 125, 320, False, ""),
+        ]:
+            Track.objects.create(
+                title="Track", genre=genre, mood=mood, bpm=bpm, duration=duration, is_featured=featured, tags=tags,
+            )
+        Track.objects.create(title="Inactive", genre=lofi, mood=dark, bpm=85, is_active=False)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _facets(self, **params):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("track-facets"), params)
+        self.assertEqual(response.status_code, 200)
+        facets = response.json()
+        named = {dimension: {f["slug"]: f["count"] for f in facets[dimension]} for dimension in ("genre", "mood")}
+        ranges = {dimension: [f["count"] for f in facets[dimension]] for dimension in ("bpm", "duration")}
+        featured = {f["value"]: f["count"] for f in facets["featured"]}
+        return facets["count"], named, ranges, featured
+
+    def test_unfiltered(self):
+        count, named, ranges, featured = self._facets()
+        self.assertEqual(count, 4)
+        self.assertEqual(named, {"genre": {"jazz": 2, "lofi": 2}, "mood": {"chill": 3, "dark": 1}})
+        self.assertEqual(ranges, {"bpm": [0, 1, 1, 1, 1, 0], "duration": [0, 1, 1, 1, 1]})
+        self.assertEqual(featured, {True: 1, False: 3})
+
+    def test_each_dimension_ignores_its_own_filter(self):
+        count, named, ranges, featured = self._facets(genre="lofi")
+        self.assertEqual(count, 2)
+        self.assertEqual(named, {"genre": {"jazz": 2, "lofi": 2}, "mood": {"chill": 2}})
+        self.assertEqual(ranges["bpm"], [0, 1, 1, 0, 0, 0])
+
+        count, named, ranges, featured = self._facets(genre="lofi", mood="dark")
+        self.assertEqual(count, 0)
+        self.assertEqual(named, {"genre": {"jazz": 1}, "mood": {"chill": 2}})
+
+        count, named, ranges, featured = self._facets(min_bpm=100, featured="false")
+        self.assertEqual(count, 2)
+        self.assertEqual(ranges["bpm"], [0, 1, 0, 1, 1, 0])
+        self.assertEqual(featured, {True: 0, False: 2})
+
+    def test_tag_and_search_narrow_every_dimension(self):
+        count, named, ranges, featured = self._facets(tag="night")
+        self.assertEqual(count, 2)
+        self.assertEqual(named, {"genre": {"jazz": 1, "lofi": 1}, "mood": {"chill": 2}})
+        count, named, ranges, featured = self._facets(search="inactive")
+        self.assertEqual(count, 0)
+
+    def test_invalid_filter(self):
+        self.assertEqual(self.client.get(reverse("track-facets"), {"min_bpm": "fast"}).status_code, 400)
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=60)
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.genre = Genre.objects.create(name="Lofi", slug="lofi")
+        Track.objects.create(title="Track", genre=cls.genre)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _get(self, name, queries, **params):
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_miss_hit_then_invalidated_by_catalog_change(self):
+        self.assertEqual(self._get("track-genres", 1)["X-Cache"], "MISS")
+        response = self._get("track-genres", 0)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual([genre["slug"] for genre in response.json()], ["lofi"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Genre.objects.create(name="Jazz", slug="jazz")
+        response = self._get("track-genres", 1)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(sorted(genre["slug"] for genre in response.json()), ["jazz", "lofi"])
+        self.assertEqual(response_cache_stats()["genres"], {"hits": 1, "misses": 2})
+
+    def test_key_covers_only_the_params_read(self):
+        self.assertEqual(self.client.get(reverse("track-list"), {"genre": "lofi", "page": 1})["X-Cache"], "MISS")
+        # Same parameters in another order, plus one the list doesn't read
+        response = self.client.get(reverse("track-list"), {"page": 1, "utm_source": "x", "genre": "lofi"})
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(self.client.get(reverse("track-list"), {"genre": "jazz", "page": 1})["X-Cache"], "MISS")
+        self.assertEqual(self.client.get(reverse("track-list"), {"genre": "lofi", "cursor": ""})["X-Cache"], "MISS")
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            response = self.client.get(reverse("track-list"), {"cursor": "", "ordering": "bpm"})
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(response_cache_stats()["list"], {"hits": 0, "misses": 2})
+
+    def test_facets_invalidated_by_catalog_change(self):
+        self.assertEqual(self._get("track-facets", 1).json()["count"], 1)
+        self._get("track-facets", 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Track.objects.create(title="Track 2", genre=self.genre)
+        self.assertEqual(self._get("track-facets", 1).json()["count"], 2)
+
+
+class GenerateStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        rates = mock.patch.object(SimpleRateThrottle, "THROTTLE_RATES", {"anon": "100/min", "generate": "2/min"})
+        rates.start()
+        self.addCleanup(rates.stop)
+
+    def test_seeded_render_and_generate_throttle(self):
+        params = {"genre": "lofi", "duration": 1, "seed": 7, "sr": 22050}
+        bodies = []
+        for _ in range(2):
+            response = self.client.get(reverse("generate-stream"), params)
+            self.assertEqual(response.status_code, 200)
+            bodies.append(b"".join(response.streaming_content))
+        self.assertEqual(bodies[0], bodies[1])
+        self.assertGreater(len(bodies[0]), 22050)
+        # Renders have their own, lower limit than the rest of the API
+        self.assertEqual(self.client.get(reverse("generate-stream"), params).status_code, 429)
+        self.assertEqual(self.client.get(reverse("track-genres")).status_code, 200)
+
+    async def test_async_view_uses_the_generate_throttle(self):
+        for expected in (200, 200, 429):
+            request = AsyncRequestFactory().get("/", {"duration": 1, "seed": 7})
+            request.user = AnonymousUser()
+            response = await async_views.generate_stream(request)
+            self.assertEqual(response.status_code, expected)
+
+    def test_duration_limit(self):
+        response = self.client.get(reverse("generate-stream"), {"duration": settings.GENERATE_STREAM_MAX_SECONDS + 1})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("duration", response.json()["error"])
@@ -0,0 +1,311 @@
+"""
+Compressed renditions of track audio.
+
+Uploaded and rendered tracks are stored as they arrive (mostly WAV, about
+1.4-2.8 MB per 28 s clip). At ingest, and from `manage.py transcode_tracks`,
+each track is also encoded with ffmpeg into every format/quality in
+AUDIO_RENDITION_FORMATS x AUDIO_RENDITION_QUALITIES and stored as a
+TrackRendition next to the original. ffmpeg is optional: without it
+ingest skips this step and `stream` keeps serving the original.
+
+A rendition remembers the track ETag it was encoded from, so replacing a
+track's audio makes its renditions stale until they are re-encoded.
+HLS segmenting (tracks.hls) reuses the helpers here.
+
+Each track also gets a short preview clip (Track.preview_file) for
+browsing: PREVIEW_SECONDS from past the intro, loudness-normalized and
+faded, so a grid of tracks loads small clips instead of full files.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+import mutagen
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from .models import Track, TrackRendition
+
+logger = logging.getLogger(__name__)
+
+TRANSCODE_TIMEOUT = 300  # seconds per rendition
+
+# format: (ffmpeg encoder, ffmpeg muxer, extension, Content-Type)
+FORMATS = {
+    TrackRendition.Format.MP3: ("libmp3lame", "mp3", ".mp3", "audio/mpeg"),
+    TrackRendition.Format.AAC: ("aac", "ipod", ".m4a", "audio/mp4"),
+    TrackRendition.Format.OPUS: ("libopus", "ogg", ".opus", "audio/ogg"),
+}
+
+# Media types in an Accept header that each format satisfies
+ACCEPT_TYPES = {
+    TrackRendition.Format.MP3: ("audio/mpeg", "audio/mp3"),
+    TrackRendition.Format.AAC: ("audio/mp4", "audio/aac", "audio/x-m4a"),
+    TrackRendition.Format.OPUS: ("audio/ogg", "audio/opus", "application/ogg"),
+}
+
+# kbps for mono sources at 22.05-32 kHz; MP3 tops out at 160 below 32 kHz.
+BITRATES = {
+    TrackRendition.Format.MP3: {"low": 64, "medium": 96, "high": 160},
+    TrackRendition.Format.AAC: {"low": 48, "medium": 96, "high": 128},
+    TrackRendition.Format.OPUS: {"low": 32, "medium": 64, "high": 96},
+}
+
+# Preview clips: short, MP3 for every browser, normalized to -16 LUFS so
+# previews in a grid play at the same loudness.
+PREVIEW_FORMAT = TrackRendition.Format.MP3
+PREVIEW_BITRATE = 96
+PREVIEW_SAMPLE_RATE = 44100  # loudnorm resamples to 192 kHz internally
+PREVIEW_LOUDNORM = "loudnorm=I=-16:TP=-1.5:LRA=11"
+PREVIEW_FADE_OUT = 1.0  # seconds
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def ffmpeg_available():
+    return shutil.which(settings.FFMPEG_BINARY) is not None
+
+
+def content_type(fmt):
+    return FORMATS[fmt][3]
+
+
+def transcode(source_path, fmt, bitrate, start=None, length=None, filters=None, sample_rate=None):
+    """
+    Encode the audio file at ``source_path`` and return the encoded bytes,
+    optionally only ``length`` seconds from ``start`` and through an ffmpeg
+    audio filter chain.
+    """
+    codec, muxer, ext, _ = FORMATS[fmt]
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, f"rendition{ext}")
+        command = [settings.FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-nostdin", "-y"]
+        if start:
+            command += ["-ss", f"{start:.3f}"]
+        command += ["-i", source_path]
+        if length:
+            command += ["-t", f"{length:.3f}"]
+        if filters:
+            command += ["-af", filters]
+        if sample_rate:
+            command += ["-ar", str(sample_rate)]
+        command += [
+            "-vn", "-map_metadata", "-1",
+            "-c:a", codec, "-b:a", f"{bitrate}k",
+            "-f", muxer,
+        ]
+        if muxer == "ipod":
+            # moov atom first, so playback can start before the whole file arrives
+            command += ["-movflags", "+faststart"]
+        command.append(output)
+        try:
+            result = subprocess.run(command, capture_output=True, timeout=TRANSCODE_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise TranscodeError(f"ffmpeg failed to run: {e}") from e
+        if result.returncode != 0:
+            raise TranscodeError(result.stderr.decode(errors="replace").strip() or f"ffmpeg exited {result.returncode}")
+        with open(output, "rb") as f:
+            return f.read()
+
+
+@contextmanager
+def local_copy(fieldfile):
+    """A filesystem path for ``fieldfile``, spooling remote storage to a temp file."""
+    try:
+        path = fieldfile.storage.path(fieldfile.name)
+    except NotImplementedError:
+        path = None
+    if path is not None:
+        yield path
+        return
+    suffix = os.path.splitext(fieldfile.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+        with fieldfile.storage.open(fieldfile.name, "rb") as f:
+            for chunk in f.chunks():
+                tmp.write(chunk)
+        tmp.flush()
+        yield tmp.name
+
+
+def create_renditions(track, formats=None, qualities=None, force=False):
+    """
+    Encode the missing or stale renditions of ``track`` (all of them with
+    ``force``) and return the ones created. Raises TranscodeError if ffmpeg
+    fails; renditions finished before the failure are kept.
+    """
+    if not track.audio_file:
+        return []
+    formats = settings.AUDIO_RENDITION_FORMATS if formats is None else formats
+    qualities = settings.AUDIO_RENDITION_QUALITIES if qualities is None else qualities
+    if not track.etag:
+        track.etag = track.compute_etag()
+        Track.objects.filter(pk=track.pk).update(etag=track.etag)
+
+    existing = {(r.format, r.quality): r for r in track.renditions.all()}
+    todo = [
+        (fmt, quality)
+        for fmt in formats
+        for quality in qualities
+        if force or (fmt, quality) not in existing or existing[(fmt, quality)].source_etag != track.etag
+    ]
+    if not todo:
+        return []
+
+    created = []
+    stem = os.path.splitext(os.path.basename(track.audio_file.name))[0]
+    with local_copy(track.audio_file) as source_path:
+        for fmt, quality in todo:
+            bitrate = BITRATES[fmt][quality]
+            data = transcode(source_path, fmt, bitrate)
+            old = existing.get((fmt, quality))
+            if old is not None:
+                old.audio_file.delete(save=False)
+                old.delete()
+            rendition = TrackRendition(
+                track=track,
+                format=fmt,
+                quality=quality,
+                bitrate=bitrate,
+                size=len(data),
+                etag=hashlib.sha256(data).hexdigest(),
+                source_etag=track.etag,
+            )
+            rendition.audio_file.save(f"{stem}_{quality}{FORMATS[fmt][2]}", ContentFile(data), save=True)
+            created.append(rendition)
+    return created
+
+
+def _audio_length(path):
+    try:
+        audio = mutagen.File(path)
+    except mutagen.MutagenError:
+        return None
+    return audio.info.length if audio is not None else None
+
+
+def preview_window(length, clip_seconds):
+    """
+    (start, duration) of the preview clip in a track ``length`` seconds
+    long. Skips the first 30% where it can, since intros tend to be quiet.
+    """
+    if not length or length <= clip_seconds:
+        return 0.0, length or clip_seconds
+    return min(length * 0.3, length - clip_seconds), clip_seconds
+
+
+def create_preview(track, force=False):
+    """
+    Cut the loudness-normalized preview clip of ``track`` unless a current
+    one exists (or ``force``), and return its FieldFile. The track row is
+    updated without touching updated_at. Raises TranscodeError if ffmpeg fails.
+    """
+    if not track.audio_file:
+        return None
+    if not track.etag:
+        track.etag = track.compute_etag()
+        Track.objects.filter(pk=track.pk).update(etag=track.etag)
+    if not force and track.preview_file and track.preview_source_etag == track.etag:
+        return None
+
+    with local_copy(track.audio_file) as source_path:
+        start, clip = preview_window(_audio_length(source_path) or track.duration, settings.PREVIEW_SECONDS)
+        filters = ",".join([
+            PREVIEW_LOUDNORM,
+            "afade=t=in:d=0.3",
+            f"afade=t=out:st={max(clip - PREVIEW_FADE_OUT, 0):.3f}:d={PREVIEW_FADE_OUT}",
+        ])
+        data = transcode(
+            source_path, PREVIEW_FORMAT, PREVIEW_BITRATE,
+            start=start, length=clip, filters=filters, sample_rate=PREVIEW_SAMPLE_RATE,
+        )
+
+    old_name = track.preview_file.name
+    stem = os.path.splitext(os.path.basename(track.audio_file.name))[0]
+    track.preview_file.save(f"{stem}_preview{FORMATS[PREVIEW_FORMAT][2]}", ContentFile(data), save=False)
+    track.preview_etag = hashlib.sha256(data).hexdigest()
+    track.preview_source_etag = track.etag
+    Track.objects.filter(pk=track.pk).update(
+        preview_file=track.preview_file.name,
+        preview_etag=track.preview_etag,
+        preview_source_etag=track.preview_source_etag,
+    )
+    if old_name and old_name != track.preview_file.name:
+        track.preview_file.storage.delete(old_name)
+    return track.preview_file
+
+
+def transcode_on_ingest(track):
+    """
+    Create the preview, renditions and HLS variants of a newly imported
+    track when AUDIO_TRANSCODE_ON_INGEST is on and ffmpeg is installed.
+    Failures are logged rather than raised; `transcode_tracks` and
+    `segment_tracks` can retry them later.
+    """
+    from .hls import segment_track
+
+    if not settings.AUDIO_TRANSCODE_ON_INGEST or not ffmpeg_available():
+        return
+    try:
+        create_preview(track)
+        create_renditions(track)
+        segment_track(track)
+    except (TranscodeError, FileNotFoundError):
+        logger.exception("Transcoding failed for track %s", track.pk)
+
+
+def _parse_accept(header):
+    # [(media range, q)] from an Accept header
+    ranges = []
+    for part in header.split(","):
+        media_range, *params = [p.strip() for p in part.split(";")]
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range.lower(), q))
+    return ranges
+
+
+def _quality_for(media_type, ranges):
+    # q of the most specific range matching media_type (RFC 9110 12.5.1)
+    main_type = media_type.split("/")[0]
+    best = None
+    for media_range, q in ranges:
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == f"{main_type}/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        if best is None or specificity > best[0]:
+            best = (specificity, q)
+    return best[1] if best else 0.0
+
+
+def negotiate_format(accept_header, formats):
+    """
+    Pick the format from ``formats`` (in server preference order) that the
+    Accept header rates highest, or None if it accepts none of them. A
+    missing header accepts anything.
+    """
+    ranges = _parse_accept(accept_header or "*/*")
+    best, best_q = None, 0.0
+    for fmt in formats:
+        q = max(_quality_for(t, ranges) for t in ACCEPT_TYPES[fmt])
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
@@ -1,10 +1,29 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TrackViewSet
+from . import async_views
+from .views import TrackViewSet, JobViewSet, GenerateStreamView, hls_master, hls_playlist, hls_segment
 
 router = DefaultRouter()
 router.register(r"tracks", TrackViewSet, basename="track")
+router.register(r"jobs", JobViewSet, basename="job")
 
 urlpatterns = [
+    path("tracks/<uuid:pk>/hls/master.m3u8", hls_master, name="track-hls"),
+    path("tracks/<uuid:pk>/hls/<str:quality>.m3u8", hls_playlist, name="track-hls-playlist"),
+    path("tracks/<uuid:pk>/hls/<str:quality>/<str:name>.ts", hls_segment, name="track-hls-segment"),
+]
+
+if settings.AUDIO_ASYNC_STREAMING:
+    # Take precedence over the router's sync stream/download actions and the
+    # sync generate/stream view.
+    urlpatterns += [
+        path("tracks/<uuid:pk>/stream/", async_views.stream),
+        path("tracks/<uuid:pk>/download/", async_views.download),
+        path("generate/stream", async_views.generate_stream),
+    ]
+
+urlpatterns += [
+    path("generate/stream", GenerateStreamView.as_view(), name="generate-stream"),
     path("", include(router.urls)),
 ]
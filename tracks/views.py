@@ -1,24 +1,67 @@
 import mimetypes
 import os
-import random
-import re
 
-from django.core.files.base import ContentFile
-from django.db.models import F
-from django.http import FileResponse, StreamingHttpResponse
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.settings import api_settings
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
 
-from .models import Track, Genre, Mood
+from .models import Track, TrackRendition, HLSVariant, HLSSegment, Genre, Mood, RenderJob
 from .serializers import (
     TrackListSerializer,
     TrackDetailSerializer,
     GenreSerializer,
     MoodSerializer,
+    TagSerializer,
+    RenderJobSerializer,
 )
+from .cache import cache_response
+from .facets import cached_track_facets
 from .filters import TrackFilter
-from .generator import generate_track
+from .pagination import KeysetPagination, TrackPagination
+from .search import SEARCH_PARAM, TrackSearchFilter
+from .tags import tag_facets
+from .jobs import enqueue_seed_job, cancel_job
+from .counters import COUNTERS
+from .streaming import range_response, aiter_range, aiter_sync
+from .delivery import redirect_url, redirect_response, accel_enabled, accel_response
+from .transcoding import PREVIEW_FORMAT, negotiate_format, content_type as rendition_content_type
+from .generator import encoder, generate_track_stream
+from .hls import (
+    PLAYLIST_CONTENT_TYPE, SEGMENT_CONTENT_TYPE, current_variants, master_playlist, media_playlist,
+)
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    For actions that pick their own audio Content-Type: an Accept header of
+    e.g. ``audio/ogg`` must not be refused with 406 just because no DRF
+    renderer produces it. Error bodies still render with the first renderer.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+def _has_seed_key(request):
+    seed_key = os.getenv("SEED_API_KEY", "")
+    return bool(seed_key) and request.headers.get("X-Seed-Key", "") == seed_key
 
 
 def _get_audio_content_type(filename):
@@ -27,22 +70,215 @@ def _get_audio_content_type(filename):
     return content_type or "application/octet-stream"
 
 
+def _get_validators(track, rendition=None):
+    """
+    Return the (quoted ETag, Last-Modified timestamp) of a track's audio,
+    or of ``rendition`` when given. The ETag is None for tracks saved
+    before ETags existed (until ``manage.py compute_etags`` hashes them):
+    hashing here would read the whole file on a request.
+    """
+    if rendition is not None:
+        return f'"{rendition.etag}"', int(rendition.created_at.timestamp())
+    etag = f'"{track.etag}"' if track.etag else None
+    return etag, int(track.updated_at.timestamp())
+
+
+def _set_validators(response, etag, last_modified):
+    if etag is not None:
+        response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def _select_rendition(request, track):
+    """
+    The rendition ``stream`` should send: AUDIO_DEFAULT_QUALITY or the
+    ``?quality=`` level, in the format the Accept header prefers. None means
+    the original (``?quality=original``, no current rendition, or an Accept
+    header that rules them all out).
+    """
+    quality = request.GET.get("quality")
+    if quality not in TrackRendition.Quality.values and quality != "original":
+        quality = settings.AUDIO_DEFAULT_QUALITY
+    if quality == "original" or not track.etag:
+        return None
+    renditions = {
+        r.format: r
+        for r in track.renditions.filter(quality=quality, source_etag=track.etag)
+    }
+    formats = [f for f in settings.AUDIO_RENDITION_FORMATS if f in renditions]
+    fmt = negotiate_format(request.META.get("HTTP_ACCEPT", ""), formats)
+    return renditions.get(fmt)
+
+
+def _stream_response(request, track, asynchronous=False):
+    """
+    Build the stream response for ``track`` (shared by the sync action and
+    the ASGI view), or return None when its file is missing.
+    """
+    rendition = _select_rendition(request, track)
+    if rendition is not None:
+        audio_file = rendition.audio_file
+        content_type = rendition_content_type(rendition.format)
+    else:
+        audio_file = track.audio_file
+        content_type = _get_audio_content_type(audio_file.name or "")
+
+    # Redirect mode: the object store serves the bytes (and Ranges).
+    url = redirect_url(audio_file, content_type)
+    if url:
+        response = redirect_response(url)
+        response["Access-Control-Allow-Origin"] = "*"
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    try:
+        file_size = audio_file.size
+    except (FileNotFoundError, ValueError):
+        return None
+    etag, last_modified = _get_validators(track, rendition)
+
+    # 304 / 412 for If-None-Match, If-Modified-Since and friends
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None and accel_enabled(audio_file):
+        # The front server applies Range/If-Range to the file itself.
+        response = accel_response(audio_file.name, content_type)
+    elif response is None:
+        response = range_response(
+            request, audio_file, content_type, size=file_size,
+            etag=etag, last_modified=last_modified, asynchronous=asynchronous,
+        )
+
+    _set_validators(response, etag, last_modified)
+    patch_vary_headers(response, ["Accept"])
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = "inline"
+    response["Access-Control-Allow-Origin"] = "*"
+    response["Access-Control-Allow-Headers"] = "Range"
+    response["Access-Control-Expose-Headers"] = "Content-Range, Content-Length, Accept-Ranges, ETag, Last-Modified"
+    response["Cache-Control"] = "public, max-age=86400"
+    return response
+
+
+def _preview_response(request, track):
+    """
+    Build the preview clip response for ``track``, or None when it has no
+    current preview. Clips are only cut at ingest or by `transcode_tracks`,
+    never here: that means fetching the whole source and running ffmpeg in
+    a web worker, with concurrent first requests racing on the same file.
+    """
+    if not track.has_current_preview:
+        return None
+
+    preview_file = track.preview_file
+    content_type = rendition_content_type(PREVIEW_FORMAT)
+    url = redirect_url(preview_file, content_type)
+    if url:
+        response = redirect_response(url)
+        response["Access-Control-Allow-Origin"] = "*"
+        return response
+
+    etag = f'"{track.preview_etag}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None and accel_enabled(preview_file):
+        response = accel_response(preview_file.name, content_type)
+    elif response is None:
+        try:
+            response = range_response(request, preview_file, content_type, etag=etag)
+        except FileNotFoundError:
+            return None
+    response["ETag"] = etag
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = "inline"
+    response["Access-Control-Allow-Origin"] = "*"
+    response["Access-Control-Allow-Headers"] = "Range"
+    response["Access-Control-Expose-Headers"] = "Content-Range, Content-Length, Accept-Ranges, ETag"
+    response["Cache-Control"] = "public, max-age=86400"
+    return response
+
+
+def _download_response(request, track, asynchronous=False):
+    """Build the download response for ``track``, or None when its file is missing."""
+    # Use original file extension instead of hardcoding .mp3
+    ext = os.path.splitext(track.audio_file.name or "")[1] or ".mp3"
+    filename = f"{track.title.replace(' ', '_')}{ext}"
+
+    url = redirect_url(
+        track.audio_file,
+        _get_audio_content_type(track.audio_file.name or ""),
+        attachment_filename=filename,
+    )
+    if url:
+        COUNTERS.increment(track.pk, "download_count")
+        return redirect_response(url)
+
+    etag, last_modified = _get_validators(track)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return _set_validators(response, etag, last_modified)
+
+    # Buffered; written in bulk by tracks.counters
+    COUNTERS.increment(track.pk, "download_count")
+
+    try:
+        audio_file = track.audio_file
+        content_type = _get_audio_content_type(audio_file.name)
+        if accel_enabled(audio_file):
+            response = accel_response(audio_file.name, content_type)
+        elif asynchronous:
+            size = audio_file.size
+            response = StreamingHttpResponse(aiter_range(audio_file, 0, size), content_type=content_type)
+            response["Content-Length"] = size
+        else:
+            response = FileResponse(
+                audio_file.open("rb"),
+                content_type=content_type,
+            )
+    except FileNotFoundError:
+        return None
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return _set_validators(response, etag, last_modified)
+
+
+# Query parameters the track list reads, and so its response cache key
+LIST_PARAMS = [
+    *TrackFilter.base_filters, SEARCH_PARAM, api_settings.ORDERING_PARAM,
+    TrackPagination.page_query_param, KeysetPagination.cursor_query_param,
+    KeysetPagination.page_size_query_param, KeysetPagination.count_query_param,
+]
+
+TAG_FACET_LIMIT = 100
+TAG_FACET_MAX_LIMIT = 1000
+# Query parameters that don't narrow the tracks a tag facet counts
+TAG_FACET_IGNORED_PARAMS = {"limit", "ordering", "page", "format"}
+
+
 class TrackViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for browsing and downloading tracks.
 
-    list: GET /api/tracks/
+    list: GET /api/tracks/ (?page=N, or ?cursor= for keyset pages)
+
     retrieve: GET /api/tracks/{id}/
-    stream: GET /api/tracks/{id}/stream/ (supports Range requests for mobile)
+    stream: GET /api/tracks/{id}/stream/?quality= (supports Range requests for mobile)
+    preview: GET /api/tracks/{id}/preview/ (short clip for browsing)
     download: GET /api/tracks/{id}/download/
     genres: GET /api/tracks/genres/
     moods: GET /api/tracks/moods/
+    facets: GET /api/tracks/facets/ (counts for every list filter)
+    tags: GET /api/tracks/tags/ (tag counts, narrowed by the list filters)
     featured: GET /api/tracks/featured/
     popular: GET /api/tracks/popular/
+    seed: POST /api/tracks/seed/ (queues a render job, returns 202)
+
+    list, genres, moods, featured and popular responses are cached
+    (tracks.cache) until the catalog changes or RESPONSE_CACHE_TIMEOUT.
     """
     queryset = Track.objects.filter(is_active=True).select_related("genre", "mood")
     filterset_class = TrackFilter
-    search_fields = ["title", "description", "tags"]
+    pagination_class = TrackPagination
+    # Search runs last so it can put the best matches first (tracks.search).
+    filter_backends = [DjangoFilterBackend, OrderingFilter, TrackSearchFilter]
     ordering_fields = ["created_at", "download_count", "play_count", "duration", "bpm"]
     ordering = ["-created_at"]
 
@@ -51,97 +287,72 @@ class TrackViewSet(viewsets.ReadOnlyModelViewSet):
             return TrackDetailSerializer
         return TrackListSerializer
 
-    @action(detail=True, methods=["get"])
+    @cache_response(params=LIST_PARAMS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=True, methods=["get"], content_negotiation_class=IgnoreClientContentNegotiation)
     def stream(self, request, pk=None):
         """
         Stream a track with HTTP Range request support.
 
         This is the endpoint mobile browsers need — they send Range headers
-        and expect 206 Partial Content responses to play audio.
+        and expect 206 Partial Content responses to play audio. Suffix
+        (bytes=-N) and multi-range requests are supported; the file is
+        streamed in chunks, never read into memory whole. In redirect
+        delivery mode the client is sent to object storage instead.
+
+        Sends a compressed rendition when one exists: ``?quality=low|medium|high``
+        (default AUDIO_DEFAULT_QUALITY) picks the bitrate and the Accept header
+        the format; ``?quality=original`` sends the uploaded file.
         """
-        track = self.get_object()
-
-        try:
-            audio_file = track.audio_file
-            file_size = audio_file.size
-            content_type = _get_audio_content_type(audio_file.name)
-        except (FileNotFoundError, ValueError):
+        response = _stream_response(request, self.get_object())
+        if response is None:
             return Response(
                 {"error": "File not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
+        return response
 
-        range_header = request.META.get("HTTP_RANGE", "")
-        range_match = re.match(r"bytes=(\d+)-(\d*)", range_header)
-
-        if range_match:
-            # Partial content (206) — required by mobile browsers
-            start = int(range_match.group(1))
-            end = int(range_match.group(2)) if range_match.group(2) else file_size - 1
-            end = min(end, file_size - 1)
-            length = end - start + 1
-
-            f = audio_file.open("rb")
-            f.seek(start)
-            data = f.read(length)
-            f.close()
-
-            response = StreamingHttpResponse(
-                iter([data]),
-                status=206,
-                content_type=content_type,
-            )
-            response["Content-Length"] = length
-            response["Content-Range"] = f"bytes {start}-{end}/{file_size}"
-        else:
-            # Full file (200)
-            response = FileResponse(
-                audio_file.open("rb"),
-                content_type=content_type,
+    @action(detail=True, methods=["get"], content_negotiation_class=IgnoreClientContentNegotiation)
+    def preview(self, request, pk=None):
+        """
+        Short loudness-normalized MP3 clip for browsing, cut at ingest or by
+        `transcode_tracks`; 404 until then. Supports Range requests.
+        """
+        response = _preview_response(request, self.get_object())
+        if response is None:
+            return Response(
+                {"error": "Preview not available"},
+                status=status.HTTP_404_NOT_FOUND,
             )
-            response["Content-Length"] = file_size
-
-        response["Accept-Ranges"] = "bytes"
-        response["Content-Disposition"] = "inline"
-        response["Access-Control-Allow-Origin"] = "*"
-        response["Access-Control-Allow-Headers"] = "Range"
-        response["Access-Control-Expose-Headers"] = "Content-Range, Content-Length, Accept-Ranges"
-        response["Cache-Control"] = "public, max-age=86400"
         return response
 
-    @action(detail=True, methods=["get"])
+    @action(detail=True, methods=["get"], content_negotiation_class=IgnoreClientContentNegotiation)
     def download(self, request, pk=None):
-        """Download a track and increment the download counter."""
-        track = self.get_object()
-
-        # Increment download count atomically
-        Track.objects.filter(pk=track.pk).update(download_count=F("download_count") + 1)
+        """
+        Download a track and increment the download counter.
 
-        try:
-            content_type = _get_audio_content_type(track.audio_file.name)
-            response = FileResponse(
-                track.audio_file.open("rb"),
-                content_type=content_type,
-            )
-            # Use original file extension instead of hardcoding .mp3
-            ext = os.path.splitext(track.audio_file.name)[1] or ".mp3"
-            filename = f"{track.title.replace(' ', '_')}{ext}"
-            response["Content-Disposition"] = f'attachment; filename="{filename}"'
-            return response
-        except FileNotFoundError:
+        Conditional requests answered with 304 don't count as downloads.
+        In redirect delivery mode this answers with a 302 to the object URL.
+        """
+        response = _download_response(request, self.get_object())
+        if response is None:
             return Response(
                 {"error": "File not found"},
                 status=status.HTTP_404_NOT_FOUND,
             )
+        return response
 
     @action(detail=True, methods=["post"])
     def play(self, request, pk=None):
         """Increment play count (called when user plays a track)."""
         track = self.get_object()
-        Track.objects.filter(pk=track.pk).update(play_count=F("play_count") + 1)
+        COUNTERS.increment(track.pk, "play_count")
         return Response({"status": "ok"})
 
     @action(detail=False, methods=["get"])
+    @cache_response()
     def genres(self, request):
         """List all genres with track counts."""
         genres = Genre.objects.all()
@@ -149,6 +360,7 @@ class TrackViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"])
+    @cache_response()
     def moods(self, request):
         """List all moods with track counts."""
         moods = Mood.objects.all()
@@ -156,6 +368,39 @@ class TrackViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """
+        Track counts for each genre, mood, BPM range, duration range and
+        featured value, under the same filter and search parameters as the
+        list. Each dimension ignores its own filter, so the alternatives to
+        a selected genre are still counted. Cached per combination.
+        """
+        filterset = TrackFilter(request.query_params, queryset=self.get_queryset(), request=request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        return Response(cached_track_facets(filterset, request.query_params.get(SEARCH_PARAM, "")))
+
+    @action(detail=False, methods=["get"])
+    def tags(self, request):
+        """
+        Tags with active track counts, most used first (``?limit=``, default
+        TAG_FACET_LIMIT). Takes the same filter and search parameters as the
+        list, and then counts only the matching tracks.
+        """
+        try:
+            limit = min(int(request.query_params.get("limit", TAG_FACET_LIMIT)), TAG_FACET_MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        if set(request.query_params) - TAG_FACET_IGNORED_PARAMS:
+            facets = tag_facets(self.filter_queryset(self.get_queryset()), limit=max(limit, 0))
+        else:
+            facets = tag_facets(limit=max(limit, 0))
+        for tag, count in facets:
+            tag.track_count = count
+        return Response(TagSerializer([tag for tag, _ in facets], many=True).data)
+
+    @action(detail=False, methods=["get"])
+    @cache_response()
     def featured(self, request):
         """List featured tracks."""
         tracks = self.queryset.filter(is_featured=True)[:10]
@@ -163,6 +408,7 @@ class TrackViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=["get"])
+    @cache_response()
     def popular(self, request):
         """List most downloaded tracks."""
         tracks = self.queryset.order_by("-download_count")[:20]
@@ -176,75 +422,191 @@ class TrackViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=["post"])
     def seed(self, request):
-        """Create sample tracks. Protected by SEED_API_KEY."""
-        seed_key = os.getenv("SEED_API_KEY", "")
-        provided_key = request.headers.get("X-Seed-Key", "")
-        if not seed_key or provided_key != seed_key:
+        """Queue a job that renders sample tracks. Protected by SEED_API_KEY."""
+        if not _has_seed_key(request):
             return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
 
         try:
             count = min(int(request.data.get("count", 5)), 20)
-            return self._do_seed(count)
-        except Exception as e:
-            import traceback
-            return Response(
-                {"error": str(e), "type": type(e).__name__, "trace": traceback.format_exc()},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        except (TypeError, ValueError):
+            return Response({"error": "count must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Rendering happens in `manage.py run_render_worker`; poll the job URL for progress.
+        job = enqueue_seed_job(count)
+        return Response(
+            {
+                "job_id": str(job.pk),
+                "status": job.status,
+                "url": request.build_absolute_uri(reverse("job-detail", kwargs={"pk": job.pk})),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint for render job progress.
 
-    def _do_seed(self, count):
-        SAMPLE_TRACKS = [
-            {"title": "Midnight Drive", "genre": "Lo-Fi", "mood": "Chill", "tags": "lofi,chill,night,drive", "bpm": 85},
-            {"title": "Neon Pulse", "genre": "Electronic", "mood": "Energetic", "tags": "electronic,synth,upbeat", "bpm": 128},
-            {"title": "Autumn Leaves", "genre": "Acoustic", "mood": "Calm", "tags": "acoustic,guitar,peaceful", "bpm": 72},
-            {"title": "Urban Groove", "genre": "Hip Hop", "mood": "Energetic", "tags": "hiphop,beat,urban,groove", "bpm": 95},
-            {"title": "Starlight Serenade", "genre": "Ambient", "mood": "Dreamy", "tags": "ambient,space,dreamy", "bpm": 60},
-            {"title": "Electric Sunset", "genre": "Electronic", "mood": "Chill", "tags": "electronic,sunset,mellow", "bpm": 110},
-            {"title": "Morning Coffee", "genre": "Jazz", "mood": "Calm", "tags": "jazz,morning,smooth", "bpm": 80},
-            {"title": "Thunder Road", "genre": "Rock", "mood": "Energetic", "tags": "rock,guitar,powerful", "bpm": 140},
-            {"title": "Ocean Whisper", "genre": "Ambient", "mood": "Calm", "tags": "ambient,ocean,waves,relax", "bpm": 55},
-            {"title": "City Lights", "genre": "Lo-Fi", "mood": "Dreamy", "tags": "lofi,city,night,chill", "bpm": 78},
-            {"title": "Solar Flare", "genre": "Electronic", "mood": "Energetic", "tags": "electronic,intense,dance", "bpm": 135},
-            {"title": "Rainy Window", "genre": "Acoustic", "mood": "Melancholy", "tags": "acoustic,rain,sad,piano", "bpm": 65},
-            {"title": "Bass Drop", "genre": "Hip Hop", "mood": "Energetic", "tags": "hiphop,bass,heavy,beat", "bpm": 100},
-            {"title": "Velvet Moon", "genre": "Jazz", "mood": "Dreamy", "tags": "jazz,night,smooth,sax", "bpm": 70},
-            {"title": "Crystal Cave", "genre": "Ambient", "mood": "Calm", "tags": "ambient,crystal,ethereal", "bpm": 50},
-        ]
-
-        duration = 8
-        random.shuffle(SAMPLE_TRACKS)
-        created = []
-
-        for item in SAMPLE_TRACKS[:count]:
-            genre, _ = Genre.objects.get_or_create(
-                name=item["genre"],
-                defaults={"slug": item["genre"].lower().replace(" ", "-")},
-            )
-            mood, _ = Mood.objects.get_or_create(
-                name=item["mood"],
-                defaults={"slug": item["mood"].lower().replace(" ", "-")},
-            )
+    retrieve: GET /api/jobs/{id}/
+    cancel: POST /api/jobs/{id}/cancel/ (protected by SEED_API_KEY)
+    """
+    queryset = RenderJob.objects.all()
+    serializer_class = RenderJobSerializer
 
-            wav_data = generate_track(
-                genre_name=item["genre"],
-                bpm=item["bpm"],
-                duration=duration,
-            )
+    def list(self, request, *args, **kwargs):
+        # Job ids act as capabilities; don't enumerate them.
+        return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
-            track = Track(
-                title=item["title"],
-                genre=genre,
-                mood=mood,
-                tags=item["tags"],
-                bpm=item["bpm"],
-                duration=duration,
-            )
-            track.audio_file.save(
-                f"{item['title'].lower().replace(' ', '_')}.wav",
-                ContentFile(wav_data),
-                save=False,
-            )
-            track.save()
-            created.append(track.title)
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        """Cancel a queued job, or ask the worker to stop a running one."""
+        if not _has_seed_key(request):
+            return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
+        job = cancel_job(self.get_object())
+        return Response(RenderJobSerializer(job).data)
+
+
+GENERATE_SAMPLE_RATES = (22050, 44100)
+
+
+def _generate_params(query):
+    """
+    Render parameters of a generate/stream request. Raises ValueError with
+    a message for the client when one is invalid.
+    """
+    try:
+        duration = float(query.get("duration", 30))
+        bpm = int(query["bpm"]) if query.get("bpm") else None
+        seed = int(query["seed"]) if query.get("seed") else None
+        sr = int(query.get("sr", 22050))
+    except ValueError:
+        raise ValueError("duration, bpm, seed and sr must be numbers")
+    if not 1 <= duration <= settings.GENERATE_STREAM_MAX_SECONDS:
+        raise ValueError(f"duration must be between 1 and {settings.GENERATE_STREAM_MAX_SECONDS} seconds")
+    if bpm is not None and not 40 <= bpm <= 240:
+        raise ValueError("bpm must be between 40 and 240")
+    if sr not in GENERATE_SAMPLE_RATES:
+        raise ValueError(f"sr must be one of {', '.join(map(str, GENERATE_SAMPLE_RATES))}")
+    fmt = query.get("fmt", "pcm16")
+    if fmt not in encoder.FORMATS:
+        raise ValueError(f"fmt must be one of {', '.join(encoder.FORMATS)}")
+    return {
+        "genre_name": query.get("genre") or "electronic",
+        "bpm": bpm,
+        "duration": duration,
+        "sr": sr,
+        "fmt": fmt,
+        "seed": seed,
+    }
+
+
+def _generate_stream_response(params, asynchronous=False):
+    """WAV response whose body is rendered while it is being sent."""
+    chunks = generate_track_stream(**params)
+    response = StreamingHttpResponse(
+        aiter_sync(chunks) if asynchronous else chunks, content_type="audio/wav",
+    )
+    response["Content-Disposition"] = "inline"
+    response["Access-Control-Allow-Origin"] = "*"
+    if params["seed"] is None:
+        response["Cache-Control"] = "no-store"
+    return response
+
+
+class GenerateStreamView(APIView):
+    """
+    GET /api/generate/stream?genre=&duration=&bpm=&seed=&sr=&fmt=
+
+    Render a procedural track on the fly and stream it as WAV. Audio is
+    rendered one pass through the chord progression at a time as the client
+    reads it, so playback starts after the first few seconds are rendered
+    and memory stays flat however long ``duration`` is (up to
+    GENERATE_STREAM_MAX_SECONDS). The same seed gives the same track.
+
+    Under WSGI each stream holds a worker for the whole render, so it has
+    its own low "generate" throttle on top of the default ones; serve long
+    renders through the ASGI app (tracks.async_views.generate_stream).
+    """
+    content_negotiation_class = IgnoreClientContentNegotiation
+    throttle_classes = [*api_settings.DEFAULT_THROTTLE_CLASSES, ScopedRateThrottle]
+    throttle_scope = "generate"
+
+    def get(self, request):
+        try:
+            params = _generate_params(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return _generate_stream_response(params)
+
+
+# ─── HLS ──────────────────────────────────────────────
+# Plain Django views: segment URLs need a ".ts" suffix and no trailing slash.
+
+def _playlist_response(text):
+    response = HttpResponse(text, content_type=PLAYLIST_CONTENT_TYPE)
+    # Playlists change when a track is re-segmented; segments never do.
+    response["Cache-Control"] = "public, max-age=60"
+    response["Access-Control-Allow-Origin"] = "*"
+    return response
+
+
+@require_safe
+def hls_master(request, pk):
+    """GET /api/tracks/{id}/hls/master.m3u8: one entry per bitrate."""
+    track = get_object_or_404(Track, pk=pk, is_active=True)
+    variants = current_variants(track)
+    if not variants:
+        raise Http404("No HLS variants for this track")
+    return _playlist_response(master_playlist(variants))
+
+
+@require_safe
+def hls_playlist(request, pk, quality):
+    """GET /api/tracks/{id}/hls/{quality}.m3u8: the segments of one bitrate."""
+    variant = get_object_or_404(
+        HLSVariant.objects.select_related("track"),
+        track_id=pk, track__is_active=True, quality=quality,
+    )
+    if not variant.is_current:
+        raise Http404("HLS variant is out of date")
+    return _playlist_response(media_playlist(variant, variant.segments.all()))
+
+
+@require_safe
+def hls_segment(request, pk, quality, name):
+    """
+    GET /api/tracks/{id}/hls/{quality}/{index}-{hash}.ts
 
-        return Response({"created": created, "count": len(created)})
+    The name includes the segment's content hash, so the response is
+    immutable and cacheable forever by browsers and CDNs.
+    """
+    index, _, digest = name.partition("-")
+    if not index.isdigit() or len(digest) != 12:
+        raise Http404("No such segment")
+    segment = get_object_or_404(
+        HLSSegment,
+        variant__track_id=pk, variant__track__is_active=True, variant__quality=quality,
+        index=int(index), etag__startswith=digest,
+    )
+    audio_file = segment.audio_file
+
+    url = redirect_url(audio_file, SEGMENT_CONTENT_TYPE)
+    if url:
+        response = redirect_response(url)
+        response["Access-Control-Allow-Origin"] = "*"
+        return response
+
+    etag = f'"{segment.etag}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None and accel_enabled(audio_file):
+        response = accel_response(audio_file.name, SEGMENT_CONTENT_TYPE)
+    elif response is None:
+        try:
+            response = range_response(request, audio_file, SEGMENT_CONTENT_TYPE, size=segment.size, etag=etag)
+        except FileNotFoundError:
+            raise Http404("Segment file not found")
+        response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    response["Access-Control-Allow-Origin"] = "*"
+    return response